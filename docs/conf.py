@@ -17,7 +17,6 @@ sys.path.insert(0, os.path.abspath("."))
 sys.path.insert(0, os.path.abspath("../"))
 sys.path.insert(1, os.path.dirname(os.path.abspath("../")))
 autodoc_mock_imports = ["scipy",
-                        'hampel',
                         'pandas',
                         'numpy',
                         'folium',
@@ -428,9 +428,7 @@ class GuiHandler:
         selected_function = self._window.featureListWidget.selectedItems()[0].text()
 
         if selected_function == 'Linear Interpolation':
-            params = inspect.getfullargspec(Interpolation.interpolate_position).args
-            params.remove('dataframe')
-            params.remove('ip_type')
+            params = ['sampling_rate', 'class_label_col']
             args = self._get_input_params(params, title="Enter Parameters",
                                           placeHolder=['Sampling rate (in seconds)',
                                                        'Name of the column that contains class label (Leave empty if '
@@ -443,9 +441,7 @@ class GuiHandler:
                                                                 class_label_col=args[1].strip())
 
         elif selected_function == 'Cubic Interpolation':
-            params = inspect.getfullargspec(Interpolation.interpolate_position).args
-            params.remove('dataframe')
-            params.remove('ip_type')
+            params = ['sampling_rate', 'class_label_col']
             args = self._get_input_params(params, title="Enter Parameters",
                                           placeHolder=['Sampling rate (in seconds)',
                                                        'Name of the column that contains class label (Leave empty if '
@@ -459,9 +455,7 @@ class GuiHandler:
                                                                 class_label_col=args[1].strip())
 
         elif selected_function == 'Kinematic Interpolation':
-            params = inspect.getfullargspec(Interpolation.interpolate_position).args
-            params.remove('dataframe')
-            params.remove('ip_type')
+            params = ['sampling_rate', 'class_label_col']
             args = self._get_input_params(params, title="Enter Parameters",
                                           placeHolder=['Sampling rate (in seconds)',
                                                        'Name of the column that contains class label (Leave empty if '
@@ -474,20 +468,20 @@ class GuiHandler:
                                                                 class_label_col=args[1].strip())
 
         elif selected_function == 'Random-Walk Interpolation':
-            params = inspect.getfullargspec(Interpolation.interpolate_position).args
-            params.remove('dataframe')
-            params.remove('ip_type')
+            params = ['sampling_rate', 'class_label_col', 'seed']
             args = self._get_input_params(params, title="Enter Parameters",
                                           placeHolder=['Sampling rate (in seconds)',
                                                        'Name of the column that contains class label (Leave empty if '
-                                                       'none)']
+                                                       'none)',
+                                                       'Seed of the random walk (Leave empty for a random seed)']
                                           )
 
             if args:
                 self._data = Interpolation.interpolate_position(dataframe=self._data,
                                                                 ip_type='random_walk',
                                                                 sampling_rate=float(args[0].strip()),
-                                                                class_label_col=args[1].strip())
+                                                                class_label_col=args[1].strip(),
+                                                                seed=int(args[2].strip()) if args[2].strip() else None)
 
         self._window.statusBar.showMessage("Task Done ...")
 
@@ -543,8 +537,7 @@ class GuiHandler:
             self._window.selectStatDropdown.addItems(['Distance_from_start'])
 
         elif selected_function == 'Point within Range':
-            params = inspect.getfullargspec(KinematicFeatures.create_point_within_range_column).args
-            params.remove('dataframe')
+            params = ['coordinates', 'dist_range']
             args = self._get_input_params(params, title="Enter Parameters",
                                           placeHolder=['Coordinates (lat1, lon1, lat2, lon2)',
                                                        'Max distance from coordinates (metres)'])
@@ -563,8 +556,7 @@ class GuiHandler:
                                                                                 dist_range=dist_range)
 
         elif selected_function == 'Distance from Co-ordinates':
-            params = inspect.getfullargspec(KinematicFeatures.create_distance_from_point_column).args
-            params.remove('dataframe')
+            params = ['coordinates']
 
             args = self._get_input_params(params, title="Enter Parameters",
                                           placeHolder=['Coordinates (lat1, lon1, lat2, lon2)'])
@@ -661,16 +653,20 @@ class GuiHandler:
         selected_function = self._window.featureListWidget.selectedItems()[0].text()
 
         if selected_function == 'Hampel Filter':
-            params = inspect.getfullargspec(Filters.hampel_outlier_detection).args
-            params.remove('dataframe')
+            params = ['column_name', 'window_size', 'n_sigma']
 
             args = self._get_input_params(params, title="Enter Parameters",
-                                          placeHolder=['Filter by Metric (Enter Column Name)'])
+                                          placeHolder=['Filter by Metric (Enter Column Name)',
+                                                       'Points on each side of the window (Default: 5)',
+                                                       'Number of standard deviations (Default: 3)'])
             # If the user provided the input params, then run the function, else
             # wait for the user to play their part.
             if args:
-                self._data = Filters.hampel_outlier_detection(dataframe=self._data,
-                                                              column_name=args[0].strip())
+                self._data = Filters.hampel_outlier_detection(
+                    dataframe=self._data,
+                    column_name=args[0].strip(),
+                    window_size=int(args[1].strip()) if args[1].strip() else 5,
+                    n_sigma=float(args[2].strip()) if args[2].strip() else 3)
 
         elif selected_function == 'Remove Duplicates':
             self._data = Filters.remove_duplicates(self._data)
@@ -858,8 +854,7 @@ class GuiHandler:
         selected_function = self._window.featureListWidget.selectedItems()[0].text()
 
         if selected_function == 'Segment Trajectories':
-            params = inspect.getfullargspec(Statistics.segment_traj_by_days).args
-            params.remove('dataframe')
+            params = ['num_days']
 
             args = self._get_input_params(params, title="Enter Parameters",
                                           placeHolder=['Duration of each segment in days'])
@@ -870,8 +865,7 @@ class GuiHandler:
                                                              num_days=int(args[0].strip()))
                 self._map_data = self._data
         elif selected_function == 'Generate Kinematic Statistics':
-            params = inspect.getfullargspec(Statistics.generate_kinematic_stats).args
-            params.remove('dataframe')
+            params = ['target_col_name', 'segmented']
 
             args = self._get_input_params(params, title="Enter Parameters",
                                           placeHolder=['Class-label column name', 'Is the trajectory segmented?'])
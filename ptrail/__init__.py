@@ -1,8 +1,11 @@
 from .core.TrajectoryDF import PTRAILDataFrame
+from .core.OutOfCore import OutOfCore
 from .features import helper_functions
 from .features import contextual_features
+from .features import geo_layer_index
 from .features import kinematic_features
 from .features import temporal_features
+from .preprocessing import filter_plan
 from .preprocessing import filters
 from .preprocessing import helpers
 from .preprocessing import interpolation
@@ -16,6 +19,10 @@ from .utilities import (
     conversions,
     DistanceCalculator,
     exceptions,
+    executor,
+    partitioner,
+    resources,
+    transport,
 )
 
 __version__ = "0.7.1 Beta"
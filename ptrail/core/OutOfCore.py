@@ -0,0 +1,216 @@
+"""
+    The OutOfCore module is used to run the operations of the library on
+    datasets that are too large to fit in the memory. The dataset is stored
+    as a directory of Parquet partitions wherein each partition contains the
+    points of a range of whole trajectories. The operations are then run
+    partition by partition and the results are written back to the disk,
+    hence only one partition (and the carried over points of a trajectory
+    that continues into the next partition) is held in the memory at once.
+
+    | Authors: Yaksh J Haranwala, Salman Haidri
+"""
+import os
+from typing import Callable, Iterable, List, Optional, Text
+
+import pandas as pd
+
+from ptrail.core.TrajectoryDF import PTRAILDataFrame
+from ptrail.utilities import constants as const
+
+
+class OutOfCore:
+    @staticmethod
+    def write_partitions(batches: Iterable[PTRAILDataFrame], output_dir: Text, prefix: Text = 'part'):
+        """
+            Write the batches of trajectories to a directory as Parquet partitions, one
+            partition for each batch. The batches are typically obtained from the
+            PTRAILDataFrame.read_csv_chunks() or PTRAILDataFrame.read_parquet_batches()
+            functions.
+
+            Note
+            ----
+                Writing Parquet files requires the pyarrow package to be installed.
+
+            Parameters
+            ----------
+                batches: Iterable[PTRAILDataFrame]
+                    The batches of trajectories that are to be written.
+                output_dir: Text
+                    The directory in which the partitions are to be written. It is
+                    created if it does not exist.
+                prefix: Text
+                    The prefix of the names of the partition files.
+
+            Returns
+            -------
+                list:
+                    The paths of the partitions written in the order of the batches.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+
+        paths = []
+        for i, batch in enumerate(batches):
+            path = os.path.join(output_dir, f"{prefix}-{i:05d}.parquet")
+            OutOfCore._write_partition(batch, path)
+            paths.append(path)
+        return paths
+
+    @staticmethod
+    def iter_partitions(input_dir: Text, latitude: Text = const.LAT, longitude: Text = const.LONG,
+                        datetime: Text = const.DateTime, traj_id: Text = const.TRAJECTORY_ID):
+        """
+            Read the Parquet partitions of a directory one by one in the order of their
+            names and yield them as PTRAILDataFrames.
+
+            Note
+            ----
+                | The points of each trajectory are expected to be stored in contiguous rows
+                  across the partitions. If a trajectory continues from one partition into
+                  the next one, then its points are carried over and yielded along with
+                  the next partition, hence a trajectory is never split.
+                | Reading Parquet files requires the pyarrow package to be installed.
+
+            Parameters
+            ----------
+                input_dir: Text
+                    The directory containing the Parquet partitions.
+                latitude: Text
+                    The header of the latitude column.
+                longitude: Text
+                    The header of the longitude column.
+                datetime: Text
+                    The header of the datetime column.
+                traj_id: Text
+                    The header of the Trajectory ID column.
+
+            Yields
+            ------
+                PTRAILDataFrame
+                    The partition containing the points of one or more whole trajectories.
+
+            Raises
+            ------
+                FileNotFoundError:
+                    There are no Parquet files in the directory.
+                ValueError:
+                    The points of a trajectory are not stored in contiguous rows.
+        """
+        paths = OutOfCore._get_partition_paths(input_dir)
+        frames = (pd.read_parquet(path) for path in paths)
+        yield from PTRAILDataFrame._batches_by_trajectory(frames, latitude, longitude, datetime, traj_id)
+
+    @staticmethod
+    def map_partitions(input_dir: Text, output_dir: Text, func: Callable, *args,
+                       latitude: Text = const.LAT, longitude: Text = const.LONG,
+                       datetime: Text = const.DateTime, traj_id: Text = const.TRAJECTORY_ID,
+                       prefix: Optional[Text] = None, **kwargs):
+        """
+            Run an operation of the library on each of the Parquet partitions of a
+            directory and write the results of each partition to the output directory.
+            For example, the kinematic features of a partitioned dataset can be
+            generated as follows:
+
+            ``OutOfCore.map_partitions('data/', 'features/', KinematicFeatures.generate_kinematic_features)``
+
+            Note
+            ----
+                | Only one partition is held in the memory at once, hence the operations
+                  that need the points of a single trajectory at a time (such as the ones
+                  in the KinematicFeatures, TemporalFeatures and Filters modules) give the
+                  same results as they would on the entire dataset. The operations that
+                  compare different trajectories with each other only see the trajectories
+                  of a single partition.
+                | The result of the operation is written as is if it is a dataframe. The
+                  index of the result is written as columns so that the output partitions
+                  can be read again using the iter_partitions() function.
+
+            Parameters
+            ----------
+                input_dir: Text
+                    The directory containing the Parquet partitions.
+                output_dir: Text
+                    The directory in which the results are to be written. It is created
+                    if it does not exist.
+                func: Callable
+                    The operation that is to be run on each partition. The partition is
+                    passed as the first argument of the function.
+                args:
+                    The other positional arguments that are to be passed to the function.
+                latitude: Text
+                    The header of the latitude column.
+                longitude: Text
+                    The header of the longitude column.
+                datetime: Text
+                    The header of the datetime column.
+                traj_id: Text
+                    The header of the Trajectory ID column.
+                prefix: Optional[Text]
+                    The prefix of the names of the output partition files. If None, then
+                    the name of the function is used.
+                kwargs:
+                    The other keyword arguments that are to be passed to the function.
+
+            Returns
+            -------
+                list:
+                    The paths of the output partitions.
+
+            Raises
+            ------
+                TypeError:
+                    The operation does not return a dataframe.
+        """
+        prefix = func.__name__ if prefix is None else prefix
+        partitions = OutOfCore.iter_partitions(input_dir, latitude, longitude, datetime, traj_id)
+
+        def results():
+            for partition in partitions:
+                result = func(partition, *args, **kwargs)
+                if not isinstance(result, pd.DataFrame):
+                    raise TypeError(f"The function {func.__name__} must return a dataframe, "
+                                    f"but it returned {type(result).__name__}.")
+                yield result
+
+        return OutOfCore.write_partitions(results(), output_dir, prefix)
+
+    @staticmethod
+    def _write_partition(dataframe: pd.DataFrame, path: Text):
+        """
+            Write a single dataframe to a Parquet file with its index as columns.
+
+            Parameters
+            ----------
+                dataframe: pandas.core.dataframe.DataFrame
+                    The dataframe that is to be written.
+                path: Text
+                    The path of the Parquet file.
+        """
+        if any(name is not None for name in dataframe.index.names):
+            dataframe = dataframe.reset_index()
+        pd.DataFrame(dataframe).to_parquet(path, index=False)
+
+    @staticmethod
+    def _get_partition_paths(input_dir: Text) -> List[Text]:
+        """
+            Get the paths of all the Parquet partitions of a directory sorted by name.
+
+            Parameters
+            ----------
+                input_dir: Text
+                    The directory containing the Parquet partitions.
+
+            Returns
+            -------
+                list:
+                    The sorted list of the paths of the partitions.
+
+            Raises
+            ------
+                FileNotFoundError:
+                    There are no Parquet files in the directory.
+        """
+        paths = sorted(os.path.join(input_dir, name) for name in os.listdir(input_dir)
+                       if name.endswith('.parquet'))
+        if len(paths) == 0:
+            raise FileNotFoundError(f"No Parquet files were found in the directory '{input_dir}'.")
+        return paths
@@ -20,6 +20,10 @@ from ptrail.utilities.exceptions import *
 
 
 class PTRAILDataFrame(DataFrame):
+    # The cached trajectory offset index is an internal attribute and not a column.
+    _internal_names = DataFrame._internal_names + ['_traj_index_cache']
+    _internal_names_set = DataFrame._internal_names_set | {'_traj_index_cache'}
+
     def __init__(self, data_set: Union[DataFrame, List, Dict], latitude: Text, longitude: Text, datetime: Text,
                  traj_id: Text, rest_of_columns: Optional[List[Text]] = None):
         """
@@ -85,6 +89,55 @@ class PTRAILDataFrame(DataFrame):
             data_set.sort_values([const.TRAJECTORY_ID, const.DateTime], inplace=True)
             super(PTRAILDataFrame, self).__init__(data_set)
 
+    @classmethod
+    def _from_validated(cls, data_set: DataFrame):
+        """
+            Construct a PTRAILDataFrame from data that is already known to be a canonical
+            PTRAIL dataframe without renaming, validating or sorting it again. This is an
+            internal constructor used by the library functions which take a PTRAILDataFrame,
+            add/remove columns or rows from it without changing the order of the points and
+            then need to return a PTRAILDataFrame again.
+
+            Note
+            ----
+                | The data is expected to satisfy the following conditions:
+                |    1. It is either indexed by (traj_id, DateTime) or contains both of them
+                       as columns.
+                |    2. The points are already sorted by traj_id and DateTime.
+                | The sorting order is trusted and is not checked. If the mandatory columns
+                  are missing or do not have the library default dtypes, then the data is
+                  passed through the regular constructor instead.
+
+            Parameters
+            ----------
+                data_set: pandas.core.dataframe.DataFrame
+                    The data that is to be wrapped in a PTRAILDataFrame.
+
+            Returns
+            -------
+                PTRAILDataFrame
+                    The PTRAILDataFrame sharing the data of the given dataframe.
+        """
+        index_names = [const.TRAJECTORY_ID, const.DateTime]
+        if list(data_set.index.names) != index_names:
+            if not np.isin(index_names, data_set.columns).all():
+                return cls(data_set.reset_index(), const.LAT, const.LONG, const.DateTime, const.TRAJECTORY_ID)
+            data_set = data_set.set_index(index_names)
+
+        # Check the dtypes using the metadata only, and if any of them is not the library
+        # default dtype, then let the regular constructor take care of the conversion.
+        dtypes = data_set.dtypes
+        if not (np.isin([const.LAT, const.LONG], data_set.columns).all()
+                and dtypes[const.LAT] == 'float64' and dtypes[const.LONG] == 'float64'
+                and data_set.index.levels[1].dtype == 'datetime64[ns]'
+                and (pd.api.types.is_string_dtype(data_set.index.levels[0].dtype)
+                     or pd.api.types.is_object_dtype(data_set.index.levels[0].dtype))):
+            return cls(data_set.reset_index(), const.LAT, const.LONG, const.DateTime, const.TRAJECTORY_ID)
+
+        obj = DataFrame.__new__(cls)
+        DataFrame.__init__(obj, data_set, copy=False)
+        return obj
+
     # ------------------------------ General (Private) Utilities ----------------------------- #
     def _rename_df_col_headers(self, data: DataFrame, lat: Text, lon: Text,
                                datetime: Text, traj_id: Text):
@@ -327,6 +380,103 @@ class PTRAILDataFrame(DataFrame):
             raise MissingColumnsException("The Trajectory_ID column is not present in the DataFrame, please verify "
                                           "again.")
 
+    # ------------------------------- Trajectory Offset Index ---------------------------------- #
+    @staticmethod
+    def _build_traj_offsets(traj_ids):
+        """
+            Build the offset index of the trajectories from the trajectory IDs of
+            the points. The offset index is in a CSR-like format wherein the points
+            of the i-th trajectory are present in the rows offsets[i] to offsets[i + 1].
+
+            Parameters
+            ----------
+                traj_ids: array-like
+                    The trajectory ID of each point in the order in which the points
+                    are stored in the dataframe.
+
+            Returns
+            -------
+                tuple:
+                    The array containing the unique trajectory IDs in the order of their
+                    appearance and the array containing the offsets of the trajectories.
+
+            Raises
+            ------
+                ValueError:
+                    The points of a trajectory are not stored in contiguous rows.
+        """
+        codes, uniques = pd.factorize(np.asarray(traj_ids), sort=False)
+        starts = np.flatnonzero(np.diff(codes, prepend=-1) != 0)
+        if len(starts) != len(uniques):
+            raise ValueError("The points of each trajectory must be stored in contiguous rows. "
+                             "Please sort the dataframe by traj_id and DateTime and try again.")
+        return np.asarray(uniques), np.append(starts, len(codes))
+
+    @property
+    def traj_offsets(self):
+        """
+            Accessor method for the offset index of the trajectories. The offset index
+            is calculated once and is cached until the index of the dataframe changes.
+
+            Returns
+            -------
+                tuple:
+                    The array containing the unique trajectory IDs in the order of their
+                    appearance and the array containing the offsets of the trajectories.
+                    The points of the i-th trajectory are present in the rows
+                    offsets[i] to offsets[i + 1].
+        """
+        cache = getattr(self, '_traj_index_cache', None)
+        if cache is None or cache[0] is not self.index:
+            if const.TRAJECTORY_ID in self.index.names:
+                traj_ids = self.index.get_level_values(const.TRAJECTORY_ID)
+            else:
+                traj_ids = self[const.TRAJECTORY_ID]
+            ids_, offsets = self._build_traj_offsets(traj_ids)
+            cache = (self.index, ids_, offsets, dict(zip(ids_, range(len(ids_)))))
+            self._traj_index_cache = cache
+        return cache[1], cache[2]
+
+    def get_trajectory(self, traj_id: Text):
+        """
+            Get the points of a single trajectory using the offset index.
+
+            Parameters
+            ----------
+                traj_id: Text
+                    The ID of the trajectory.
+
+            Returns
+            -------
+                pandas.core.dataframe.DataFrame
+                    The dataframe containing the points of the trajectory.
+
+            Raises
+            ------
+                MissingTrajIDException:
+                    The trajectory ID is not present in the dataframe.
+        """
+        ids_, offsets = self.traj_offsets
+        try:
+            pos = self._traj_index_cache[3][traj_id]
+        except KeyError:
+            raise MissingTrajIDException(f"The Trajectory ID '{traj_id}' is not present in the data.")
+        return self.iloc[offsets[pos]:offsets[pos + 1]]
+
+    def iter_trajectories(self):
+        """
+            Iterate over the trajectories of the dataframe using the offset index.
+
+            Yields
+            ------
+                tuple:
+                    The trajectory ID and the dataframe containing the points of the
+                    trajectory.
+        """
+        ids_, offsets = self.traj_offsets
+        for i in range(len(ids_)):
+            yield ids_[i], self.iloc[offsets[i]:offsets[i + 1]]
+
     def __str__(self):
         return f"------------------------ Dataset Facts ------------------------------\n\n" \
                f"Number of unique Trajectories in the data: {self.traj_id.nunique()}\n" \
@@ -379,3 +529,203 @@ class PTRAILDataFrame(DataFrame):
         """
         return self.sort_values([const.TRAJECTORY_ID, const.DateTime], ascending=ascending)
 
+
+    # ------------------------------- Chunked File Readers ----------------------------- #
+    @classmethod
+    def read_csv_chunks(cls, filepath_or_buffer, latitude: Text, longitude: Text, datetime: Text,
+                        traj_id: Text, chunksize: int = 100000, **kwargs):
+        """
+            Read a CSV file that is too large to fit in the memory in chunks and yield
+            the data in PTRAILDataFrame batches. A trajectory is never split across
+            2 batches.
+
+            Note
+            ----
+                | The points of each trajectory are expected to be stored in contiguous rows
+                  of the file, as they are when the data is sorted by the trajectory ID.
+                | The points of the last trajectory of each chunk are carried over to the
+                  next chunk since the trajectory may continue in it. Hence, a batch may
+                  contain more or less rows than the chunksize.
+
+            Parameters
+            ----------
+                filepath_or_buffer: str, path object or file-like object
+                    The CSV file that is to be read.
+                latitude: str
+                    The header of the latitude column.
+                longitude: str
+                    The header of the longitude column.
+                datetime: str
+                    The header of the datetime column.
+                traj_id: str
+                    The header of the Trajectory ID column.
+                chunksize: int
+                    The number of rows that are read from the file at once.
+                kwargs:
+                    Any other arguments that are to be passed to pandas.read_csv().
+
+            Yields
+            ------
+                PTRAILDataFrame
+                    The batch containing the points of one or more whole trajectories.
+
+            Raises
+            ------
+                ValueError:
+                    The points of a trajectory are not stored in contiguous rows.
+        """
+        reader = pd.read_csv(filepath_or_buffer, chunksize=chunksize, **kwargs)
+        with reader:
+            yield from cls._batches_by_trajectory(reader, latitude, longitude, datetime, traj_id)
+
+    @classmethod
+    def read_parquet_batches(cls, path, latitude: Text, longitude: Text, datetime: Text,
+                             traj_id: Text, batch_size: int = 100000, columns: Optional[List[Text]] = None):
+        """
+            Read a Parquet file that is too large to fit in the memory in batches and
+            yield the data in PTRAILDataFrame batches. A trajectory is never split
+            across 2 batches.
+
+            Note
+            ----
+                | Reading Parquet files requires the pyarrow package to be installed.
+                | The points of each trajectory are expected to be stored in contiguous rows
+                  of the file, as they are when the data is sorted by the trajectory ID.
+                | The points of the last trajectory of each batch are carried over to the
+                  next batch since the trajectory may continue in it. Hence, a batch may
+                  contain more or less rows than the batch_size.
+
+            Parameters
+            ----------
+                path: str or path object
+                    The Parquet file that is to be read.
+                latitude: str
+                    The header of the latitude column.
+                longitude: str
+                    The header of the longitude column.
+                datetime: str
+                    The header of the datetime column.
+                traj_id: str
+                    The header of the Trajectory ID column.
+                batch_size: int
+                    The number of rows that are read from the file at once.
+                columns: Optional[List[Text]]
+                    The columns that are to be read. If None, all the columns are read.
+
+            Yields
+            ------
+                PTRAILDataFrame
+                    The batch containing the points of one or more whole trajectories.
+
+            Raises
+            ------
+                ImportError:
+                    The pyarrow package is not installed.
+                ValueError:
+                    The points of a trajectory are not stored in contiguous rows.
+        """
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet files in batches requires the pyarrow package. "
+                              "Please install it using 'pip install pyarrow' and try again.")
+
+        parquet_file = pq.ParquetFile(path)
+        frames = (batch.to_pandas() for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns))
+        yield from cls._batches_by_trajectory(frames, latitude, longitude, datetime, traj_id)
+
+    @classmethod
+    def _batches_by_trajectory(cls, frames, latitude: Text, longitude: Text, datetime: Text, traj_id: Text):
+        """
+            Regroup the chunks of the raw data into PTRAILDataFrame batches containing
+            whole trajectories only. The points of the last trajectory of each chunk are
+            held in a carry-over buffer and are prepended to the next chunk.
+
+            Parameters
+            ----------
+                frames: Iterable[pandas.core.dataframe.DataFrame]
+                    The chunks of the raw data in the order in which they are stored.
+                latitude: str
+                    The header of the latitude column.
+                longitude: str
+                    The header of the longitude column.
+                datetime: str
+                    The header of the datetime column.
+                traj_id: str
+                    The header of the Trajectory ID column.
+
+            Yields
+            ------
+                PTRAILDataFrame
+                    The batch containing the points of one or more whole trajectories.
+
+            Raises
+            ------
+                ValueError:
+                    The points of a trajectory are not stored in contiguous rows.
+        """
+        carry = None
+        seen_ids = set()
+        for frame in frames:
+            if carry is not None:
+                frame = pd.concat([carry, frame], ignore_index=True)
+            if len(frame) == 0:
+                continue
+
+            # Find the rows of the last contiguous run of trajectory IDs in the chunk and
+            # hold them back, since the trajectory may continue in the next chunk.
+            ids_ = frame[traj_id]
+            runs = ids_.ne(ids_.shift()).cumsum().to_numpy()
+            is_tail = runs == runs[-1]
+            carry = frame.loc[is_tail]
+
+            # If the entire chunk belongs to a single trajectory, keep reading.
+            if is_tail.all():
+                continue
+            yield cls._make_batch(frame.loc[~is_tail], seen_ids, latitude, longitude, datetime, traj_id)
+
+        # Finally, the remaining buffer contains the last trajectory of the data.
+        if carry is not None and len(carry) > 0:
+            yield cls._make_batch(carry, seen_ids, latitude, longitude, datetime, traj_id)
+
+    @classmethod
+    def _make_batch(cls, data: DataFrame, seen_ids: set, latitude: Text, longitude: Text,
+                    datetime: Text, traj_id: Text):
+        """
+            Convert a batch of whole trajectories to a PTRAILDataFrame and make sure that
+            none of its trajectories was present in any of the earlier batches.
+
+            Parameters
+            ----------
+                data: pandas.core.dataframe.DataFrame
+                    The raw data of the batch.
+                seen_ids: set
+                    The trajectory IDs present in the earlier batches. The IDs of
+                    this batch are added to it.
+                latitude: str
+                    The header of the latitude column.
+                longitude: str
+                    The header of the longitude column.
+                datetime: str
+                    The header of the datetime column.
+                traj_id: str
+                    The header of the Trajectory ID column.
+
+            Returns
+            -------
+                PTRAILDataFrame
+                    The batch converted to a PTRAILDataFrame.
+
+            Raises
+            ------
+                ValueError:
+                    The points of a trajectory are not stored in contiguous rows.
+        """
+        batch_ids = set(data[traj_id].unique())
+        if not seen_ids.isdisjoint(batch_ids) or len(batch_ids) != data[traj_id].ne(data[traj_id].shift()).sum():
+            raise ValueError("The points of each trajectory must be stored in contiguous rows. "
+                             "Please sort the data by the trajectory ID and try again.")
+        seen_ids.update(batch_ids)
+
+        return cls(data_set=data.copy(), latitude=latitude, longitude=longitude,
+                   datetime=datetime, traj_id=traj_id)
@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from ptrail.core.OutOfCore import OutOfCore
+from ptrail.core.TrajectoryDF import PTRAILDataFrame
+from ptrail.features.kinematic_features import KinematicFeatures
+
+
+class OutOfCoreTest(unittest.TestCase):
+    _dict_data = {
+        'lat': [39.984198, 39.984224, 39.984094, 40.98, 41.256, 40.1, 40.2, 40.3],
+        'lon': [116.319402, 116.319322, 116.319402, 116.3589, 117, 116.1, 116.2, 116.3],
+        'datetime': ['2008-10-23 05:53:11', '2008-10-23 05:53:06', '2008-10-23 05:53:30', '2008-10-23 05:54:06',
+                     '2008-10-23 05:59:06', '2008-10-23 06:00:00', '2008-10-23 06:01:00', '2008-10-23 06:02:00'],
+        'id': [1, 1, 1, 3, 3, 4, 4, 4],
+    }
+
+    def test_map_partitions(self):
+        raw = pd.DataFrame(OutOfCoreTest._dict_data)
+        full = PTRAILDataFrame(data_set=raw, latitude='lat', longitude='lon', datetime='datetime', traj_id='id')
+        expected = KinematicFeatures.generate_kinematic_features(full)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # Split the raw data in the middle of a trajectory, so that the trajectory
+            # has to be carried over to the next partition.
+            input_dir = os.path.join(tmp_dir, 'input')
+            os.makedirs(input_dir)
+            full.reset_index().iloc[:4].to_parquet(os.path.join(input_dir, 'a.parquet'))
+            full.reset_index().iloc[4:].to_parquet(os.path.join(input_dir, 'b.parquet'))
+
+            partitions = list(OutOfCore.iter_partitions(input_dir))
+            self.assertListEqual([list(p.traj_offsets[0]) for p in partitions], [['1'], ['3'], ['4']])
+
+            output_dir = os.path.join(tmp_dir, 'output')
+            paths = OutOfCore.map_partitions(input_dir, output_dir, KinematicFeatures.generate_kinematic_features)
+            self.assertEqual(len(paths), 3)
+
+            result = pd.concat(OutOfCore.iter_partitions(output_dir))
+            self.assertListEqual(list(result.columns), list(expected.columns))
+            assert np.allclose(result.values.astype(float), expected.values.astype(float), equal_nan=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,8 @@
 import datetime
+import os
+import tempfile
 import unittest
+from unittest import mock
 
 import folium
 import numpy as np
@@ -75,6 +78,81 @@ class TestPTRAILDF(unittest.TestCase):
         with self.assertRaises(AttributeError):
             print(from_pdf.head())
 
+    def test_df_from_validated(self):
+        df = PTRAILDataFrame(data_set=TestPTRAILDF._dict_data,
+                             latitude='lat',
+                             longitude='lon',
+                             datetime='datetime',
+                             traj_id='id')
+
+        # Both an indexed dataframe and a dataframe with the index columns can be wrapped.
+        from_indexed = PTRAILDataFrame._from_validated(df)
+        from_columns = PTRAILDataFrame._from_validated(df.reset_index())
+        for result in [from_indexed, from_columns]:
+            self.assertIsInstance(result, PTRAILDataFrame)
+            self.assertListEqual(list(result.index.names), ['traj_id', 'DateTime'])
+            assert np.all(result.reset_index().values == df.reset_index().values)
+
+        # An already canonical dataframe is wrapped without the regular constructor and
+        # shares the data of the given dataframe.
+        with mock.patch.object(PTRAILDataFrame, '__init__', return_value=None) as init:
+            wrapped = PTRAILDataFrame._from_validated(df)
+            init.assert_not_called()
+        self.assertTrue(np.shares_memory(wrapped['lat'].to_numpy(), df['lat'].to_numpy()))
+
+        # Data with non-default dtypes is passed through the regular constructor.
+        raw = df.reset_index()
+        raw['lat'] = raw['lat'].astype('float32')
+        from_raw = PTRAILDataFrame._from_validated(raw)
+        self.assertEqual(from_raw['lat'].dtype, np.float64)
+
+    def test_traj_offsets(self):
+        df = PTRAILDataFrame(data_set=TestPTRAILDF._dict_data,
+                             latitude='lat',
+                             longitude='lon',
+                             datetime='datetime',
+                             traj_id='id')
+
+        ids_, offsets = df.traj_offsets
+        self.assertListEqual(list(ids_), ['1', '3'])
+        self.assertListEqual(list(offsets), [0, 3, 5])
+        self.assertEqual(len(df.get_trajectory('3')), 2)
+        self.assertListEqual([traj_id for traj_id, _ in df.iter_trajectories()], ['1', '3'])
+
+        # The offset index is rebuilt once the index of the dataframe changes.
+        df.drop(index=df.index[:3], inplace=True)
+        ids_, offsets = df.traj_offsets
+        self.assertListEqual(list(ids_), ['3'])
+        self.assertListEqual(list(offsets), [0, 2])
+
+    def test_read_in_chunks(self):
+        raw = pd.DataFrame(TestPTRAILDF._dict_data)
+        raw = pd.concat([raw, raw.assign(id=raw['id'] + 10)], ignore_index=True)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            csv_path = os.path.join(tmp_dir, 'data.csv')
+            raw.to_csv(csv_path, index=False)
+            batches = [list(PTRAILDataFrame.read_csv_chunks(csv_path, 'lat', 'lon', 'datetime', 'id',
+                                                            chunksize=chunksize))
+                       for chunksize in [1, 2, 4, 100]]
+
+            parquet_path = os.path.join(tmp_dir, 'data.parquet')
+            raw.to_parquet(parquet_path, index=False)
+            batches.append(list(PTRAILDataFrame.read_parquet_batches(parquet_path, 'lat', 'lon', 'datetime', 'id',
+                                                                     batch_size=3)))
+
+            # The unsorted data is rejected instead of splitting a trajectory.
+            raw.sort_values('datetime').to_csv(csv_path, index=False)
+            with self.assertRaises(ValueError):
+                list(PTRAILDataFrame.read_csv_chunks(csv_path, 'lat', 'lon', 'datetime', 'id', chunksize=2))
+
+        full = PTRAILDataFrame(data_set=raw, latitude='lat', longitude='lon', datetime='datetime', traj_id='id')
+        for batch_list in batches:
+            self.assertTrue(all(isinstance(batch, PTRAILDataFrame) for batch in batch_list))
+            # No trajectory is split across the batches.
+            ids_ = [traj_id for batch in batch_list for traj_id in batch.traj_offsets[0]]
+            self.assertEqual(len(ids_), len(set(ids_)))
+            assert np.all(pd.concat(batch_list).sort_index().reset_index().values == full.reset_index().values)
+
     # ---------------------------------- DataFrame Properties Testing ----------------------------------- #
     def test_lat(self):
         df = PTRAILDataFrame(data_set=TestPTRAILDF._pdf_data,
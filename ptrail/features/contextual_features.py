@@ -9,31 +9,32 @@
     | Authors: Yaksh J Haranwala, Salman Haidri
 """
 import itertools
-import multiprocessing
-import os
 from json import JSONDecodeError
-from math import ceil
-from typing import Union, Text
+from typing import List, Optional, Union, Text
 
 import geopandas as gpd
+import numpy as np
 import osmnx as ox
 import pandas as pd
-from shapely.geometry import Polygon
+from shapely.geometry import MultiPolygon, Polygon
 
 from ptrail.core.TrajectoryDF import PTRAILDataFrame
+from ptrail.features.geo_layer_index import GeoLayerIndex
 from ptrail.features.helper_functions import Helpers
+from ptrail.utilities import constants as const
 from ptrail.utilities.DistanceCalculator import FormulaLog
-
-num = os.cpu_count()
-NUM_CPU = ceil((num * 2) / 3)
+from ptrail.utilities.executor import WorkerPool
+from ptrail.utilities.partitioner import Partitioner
+from ptrail.utilities.transport import SharedColumns
 
 
 class ContextualFeatures:
     @staticmethod
     def visited_location(df: PTRAILDataFrame,
-                         geo_layers: Union[pd.DataFrame, gpd.GeoDataFrame],
-                         visited_location_name: Text,
-                         location_column_name: Text):
+                         geo_layers: Union[pd.DataFrame, gpd.GeoDataFrame, GeoLayerIndex],
+                         visited_location_name: Union[Text, List[Text]],
+                         location_column_name: Text,
+                         tolerance: float = 0):
         """
             Create a column called visited_Location for all the pastures present in the
             dataset.
@@ -47,87 +48,73 @@ class ContextualFeatures:
 
             Note
             ----
-                It is to be noted that depending on the size of the dataset and the surrounding
-                data passed in, this function will take longer time to execute if either of the
-                datasets is very large. It has been parallelized to make it faster, however, it
-                can still take a longer time depending on the size of the data being analyzed.
+                | A point has visited a location if it lies within the tolerance of any of
+                  the geo layers (points or polygons) of the location. The points are matched
+                  with the geo layers using the R-tree of the geo layers, hence several
+                  locations can be checked in a single pass.
+                | The geo layers can also be given as a GeoLayerIndex, in which case the R-tree
+                  is built only once and is reused across the calls.
 
             Parameters
             ----------
                 df: PTRAILDataFrame
                     The dataframe containing the dataset.
-                geo_layers: Union[pd.DataFrame, gpd.GeoDataFrame]
-                    The Dataframe containing the geographical layers near the trajectory data.
-                    It is to be noted
-                visited_location_name: Text
-                    The location for which it is to be checked whether the objected visited it
-                    or not.
+                geo_layers: Union[pd.DataFrame, gpd.GeoDataFrame, GeoLayerIndex]
+                    The Dataframe containing the geographical layers near the trajectory data
+                    or the index of the geographical layers.
+                visited_location_name: Union[Text, List[Text]]
+                    The location (or the list of locations) for which it is to be checked
+                    whether the objected visited it or not.
                 location_column_name: Text
                     The name of the column that contains the location to be checked.
+                tolerance: float
+                    The maximum distance (in metres) between a point and the geo layers of a
+                    location within which the location is considered to be visited.
 
             Returns
             -------
                 PTRAILDataFrame:
-                    The Dataframe containing a new column indicating whether the animal
-                    has visited the pasture or not.
+                    The Dataframe containing a new Visited_<location> column for each location
+                    indicating whether the animal has visited the pasture (1) or not (0).
 
             Raises
             ------
                 KeyError:
                     The column or the location name does not exist.
         """
+        geo_layers = GeoLayerIndex.from_layers(geo_layers)
+        names = [visited_location_name] if isinstance(visited_location_name, str) else list(visited_location_name)
+
+        # Give each row of the geo layers the position of its location in the list of
+        # locations, the rows of the other locations being left at -1.
+        location_codes = np.full(len(geo_layers), -1, dtype=np.int64)
+        for code, name in enumerate(names):
+            positions = geo_layers.positions(location_column_name, name)
+            if len(positions) == 0:
+                raise KeyError(f"The {name} or {location_column_name} does not exist in the dataset.")
+            location_codes[positions] = code
+
+        # Join the points of the trajectories with all the geo layers at once and mark the
+        # locations that each point has visited.
         df = df.reset_index()
+        points, rows = geo_layers.join(df[const.LAT], df[const.LONG], tolerance=tolerance)
+        codes = location_codes[rows]
+        visited = np.zeros((len(names), len(df)), dtype=np.int64)
+        visited[codes[codes >= 0], points[codes >= 0]] = 1
+
+        # Set the column of each location to 1 for the points that have visited it and 0
+        # for the other points.
+        for code, name in enumerate(names):
+            df[f'Visited_{name}'] = visited[code]
+
+        return PTRAILDataFrame._from_validated(df)
 
-        # First, filter out the geo_layers dataset to include only the points of the location
-        # specified by the user.
-        geo_layers = geo_layers.loc[geo_layers[location_column_name] == visited_location_name]
-        
-        if len(geo_layers) > 0:
-            # Now for the trajectory dataset and the geo layers dataset both, convert them to a
-            # GeoDataFrame with the geometry of lat-lon for each point.
-            df1 = gpd.GeoDataFrame(df,
-                                   geometry=gpd.points_from_xy(df["lon"],
-                                                               df["lat"]),
-                                   crs={"init": "epsg:4326"})
-    
-            df2 = gpd.GeoDataFrame(geo_layers,
-                                   geometry=gpd.points_from_xy(geo_layers["lon"],
-                                                               geo_layers["lat"]),
-                                   crs={"init": "epsg:4326"})
-    
-            # Now, using GeoPandas, find where the trajectory points and the geo-layers
-            # point intersect.
-            intersection = gpd.overlay(df1, df2, how='intersection')
-    
-            # Now, in the original dataframe, check which points have intersected
-            # with the geo-layers dataset and which ones have not.
-            merged = pd.merge(df, intersection, how='outer', indicator=True)['_merge']
-    
-            # Finally, replace the truth value of the points that have intersected to 1
-            # and set it to 0 for the points that have not intersected.
-            merged = merged.replace('both', 1)
-            merged = merged.replace('left_only', 0)
-            merged = merged.replace('right_only', 0)
-    
-            # Assign the resultant column to the original df and drop the unnecessary column
-            # of geometry.
-            df[f'Visited_{visited_location_name}'] = merged
-            df = df.drop(columns='geometry')
-    
-            # return merged
-            return PTRAILDataFrame(df,
-                                   latitude='lat',
-                                   longitude='lon',
-                                   datetime='DateTime',
-                                   traj_id='traj_id')
-        else:
-            raise KeyError(f"The {visited_location_name} or {location_column_name} does not exist in the dataset.")
-        
     @staticmethod
     def visited_poi(df: PTRAILDataFrame,
-                    surrounding_data: Union[gpd.GeoDataFrame, pd.DataFrame, PTRAILDataFrame],
+                    surrounding_data: Union[gpd.GeoDataFrame, pd.DataFrame, PTRAILDataFrame, GeoLayerIndex],
                     dist_column_label: Text,
-                    nearby_threshold: int):
+                    nearby_threshold: int,
+                    backend: Optional[Text] = None):
         """
             Given a surrounding data with information about the distance to the nearest POI source
             from a given coordinate, check whether the objects in the given trajectory data have
@@ -139,52 +126,67 @@ class ContextualFeatures:
                 column containing distance to the nearest POI. For more info, see the Starkey habitat
                 dataset which has the columns like 'DistCWat' and 'DistEWat'.
 
+            Note
+            ----
+                A spatial index of the surrounding data is built once and shared with all the
+                workers, which then look up the nearby locations of all their points at once
+                instead of calculating the distance from every location for each point. If the
+                surrounding data is given as a GeoLayerIndex, then the spatial index is reused
+                across the calls.
 
             Parameters
             ----------
                 df: PTRAILDataFrame
                     The dataframe containing the trajectory data.
-                surrounding_data: Union[gpd.GeoDataFrame, pd.DataFrame]
+                surrounding_data: Union[gpd.GeoDataFrame, pd.DataFrame, GeoLayerIndex]
                     The surrounding data that needs to contain the information of distance
-                    to the nearest water body.
+                    to the nearest water body or the index of the surrounding data.
                 dist_column_label: Text
                     The name of the column containing the distance information.
                 nearby_threshold: int
                     The maximum distance between the POI and the current location of the object
                     within which the object is considered to be crossing/visiting the POI.
+                backend: Optional[Text]
+                    The backend on which the work is run, one of serial, threads or processes.
+                    If None, then the default backend of the WorkerPool is used.
 
             Returns
             -------
-                PTRAILDataFrame:
+                pandas.core.dataframe.DataFrame:
                     The dataframe containing the new column indicating whether the object
-                    at that point is near.
+                    at that point is near, with traj_id and DateTime as its columns.
 
+            Raises
+            ------
+                KeyError:
+                    The distance column does not exist in the surrounding data.
         """
-        df_chunks = Helpers._df_split_helper(df)
-        print(len(df_chunks))
-
-        # Here, create 2/3rds number of processes as there are CPUs in the system. Some CPUs are
-        # kept free at all times in order to not block up the system.
-        # (Note: The blocking of system is mostly prevalent in Windows and does not happen very often
-        # in Linux. However, out of caution some CPUs are kept free regardless of the system.)
-        mp_pool = multiprocessing.Pool(NUM_CPU)
-        results = mp_pool.starmap(Helpers.visited_poi_helper,
-                                  zip(df_chunks,
-                                      itertools.repeat(surrounding_data),
-                                      itertools.repeat(dist_column_label),
-                                      itertools.repeat(nearby_threshold)
-                                      )
-                                  )
-
-        mp_pool.close()
-        mp_pool.join()
-
-        # Concatenate all the smaller dataframes and return the answer.
-        results = pd.concat(results)
+        poi_index = GeoLayerIndex.from_layers(surrounding_data).poi_index(dist_column_label, nearby_threshold)
+
+        # Place the columns in shared memory and run the helper function in parallel on the
+        # shared pool of workers. Each point is looked up on its own, hence the long trajectories
+        # can be split across the partitions.
+        nearby = np.zeros(len(df), dtype=bool)
+        with SharedColumns(df) as columns:
+            partitions = Partitioner.partition_ranges(columns.offsets, split_long=True)
+            results = WorkerPool.starmap(Helpers.visited_poi_helper,
+                                         zip(itertools.repeat(columns.handle),
+                                             partitions,
+                                             itertools.repeat(poi_index),
+                                             itertools.repeat(nearby_threshold)),
+                                         backend=backend)
+
+        # Put the results of the partitions back at the rows that they were calculated for.
+        for ranges, result in zip(partitions, results):
+            nearby[Partitioner._range_rows(ranges)] = result
+
+        results = df.reset_index()
+        results['Nearby_POI'] = nearby
         return results
 
     @staticmethod
-    def trajectories_inside_polygon(df: PTRAILDataFrame, polygon: Polygon):
+    def trajectories_inside_polygon(df: PTRAILDataFrame, polygon: Union[Polygon, MultiPolygon, dict],
+                                    return_mask: bool = False):
         """
             Given a trajectory dataframe and a Polygon, find out all the trajectories
             that are inside the given polygon.
@@ -195,37 +197,47 @@ class ContextualFeatures:
                 instead of (latitude, longitude). Beware of that, otherwise the results will be
                 incorrect.
 
+            Note
+            ----
+                | The points are first checked against the bounding box of the polygon and only
+                  the points inside it are tested against the prepared polygon, all at once.
+                | Several polygons can be given as a dictionary of zone IDs and polygons. The
+                  points inside any of the polygons are then kept and each point is labelled with
+                  the ID of the zone inside which it lies in the Zone column. If a point lies
+                  inside more than one polygon, then it is labelled with the first one.
+
             Parameters
             ----------
                 df: PTRAILDataFrame
                     The dataframe containing the trajectory data.
-                polygon: Polygon
-                    The polygon inside which the points are to be found.
+                polygon: Union[Polygon, MultiPolygon, dict]
+                    The polygon inside which the points are to be found or the dictionary
+                    mapping the zone IDs to their polygons.
+                return_mask: bool
+                    Whether to return the boolean mask indicating the points inside the
+                    polygon instead of the filtered dataframe.
 
             Returns
             -------
                 PTRAILDataFrame:
                     A dataframe containing trajectories that are inside the polygon.
+                pandas.core.series.Series:
+                    The boolean mask aligned with the dataframe if return_mask is True.
         """
-        # Convert the original dataframe and the polygon to a GeoPandasDataframe.
-        df1 = gpd.GeoDataFrame(df.reset_index(),
-                               geometry=gpd.points_from_xy(df["lon"],
-                                                           df["lat"]),
-                               crs={"init": "epsg:4326"})
-
-        df2 = gpd.GeoDataFrame(geometry=gpd.GeoSeries(polygon),
-                               crs={"init": "epsg:4326"})
-
-        # Find the points on intersections between the 2 DataFrames.
-        intersection = gpd.overlay(df1=df1, df2=df2, how='intersection')
-        intersection = intersection.drop(columns=['geometry'])
-
-        # Convert the filtered DF back to PTRAILDataFrame and return it.
-        return PTRAILDataFrame(data_set=intersection,
-                               datetime='DateTime',
-                               traj_id='traj_id',
-                               latitude='lat',
-                               longitude='lon')
+        zones = polygon if isinstance(polygon, dict) else {None: polygon}
+        codes = Helpers._polygon_codes(df[const.LAT].to_numpy(dtype=np.float64),
+                                       df[const.LONG].to_numpy(dtype=np.float64),
+                                       list(zones.values()))
+        inside = codes >= 0
+        if return_mask:
+            return pd.Series(inside, index=df.index)
+
+        # Keep the points inside the polygons and label them with their zones if several
+        # zones were given.
+        filtered = df.reset_index().loc[inside]
+        if isinstance(polygon, dict):
+            filtered['Zone'] = np.asarray(list(zones.keys()), dtype=object)[codes[inside]]
+        return PTRAILDataFrame._from_validated(filtered)
 
     @staticmethod
     def traj_intersect_inside_polygon(df1: PTRAILDataFrame,
@@ -378,56 +390,99 @@ class ContextualFeatures:
         except JSONDecodeError:
             raise ValueError("The tags provided are invalid. Please check your tags and try again.")
 
-    # @staticmethod
-    # def detect_herd(df: PTRAILDataFrame,
-    #                 surroundings: Union[pd.DataFrame, gpd.GeoDataFrame],
-    #                 time_threshold: int):
-    #     """
-    #         Given a Trajectory Dataframe and another dataframe containing surrounding data,
-    #         detect a herd behaviour in a particular region of the surroundings.
-    #
-    #         Note
-    #         ----
-    #             The time_threshold is given in seconds.
-    #
-    #         Parameters
-    #         ----------
-    #             df: PTRAILDataFrame
-    #                 The dataframe containing Trajectory Data.
-    #             surroundings: Union[pd.DataFrame, gpd.GeoDataFrame]
-    #                 The dataframe containing surrounding data.
-    #             time_threshold: int
-    #                 The maximum time between 2 points of intersection lesser than which
-    #                 the objects are considered to be in herd.
-    #     """
-    #     # coords = list(zip(surroundings['lon'], (surroundings['lat'])))
-    #     # poly = Polygon(coords)
-    #     #
-    #     # # First, check which of the trajectories are inside the polygon.
-    #     # inside_polygon = SemanticFeatures.trajectories_inside_polygon(df, poly)
-    #     #
-    #     # return inside_polygon
-    #
-    #     # First split the dataframes based on set of Trajectory ids.
-    #     # As of now, each smaller chunk is supposed to have data of 100
-    #     # trajectory IDs max
-    #     ids_ = list(df.traj_id.value_counts().keys())
-    #
-    #     df_chunks = [df.loc[df.index.get_level_values(const.TRAJECTORY_ID) == ids_[i]]
-    #                  for i in range(len(ids_))]
-    #
-    #     main = []
-    #     for i in range(len(df_chunks) - 1):
-    #         df1 = df_chunks[i]
-    #         df2 = df_chunks[i + 1]
-    #         intersect = SemanticFeatures.traj_intersect_inside_polygon(df1, df2, poly)
-    #
-    #         time_del = (np.abs((intersect['DateTime_2'] - intersect['DateTime_1'])).dt.total_seconds()).to_numpy()
-    #
-    #         indices = np.argwhere(time_del <= time_threshold).flatten()
-    #         print(indices)
-    #
-    #         filt_df = intersect.iloc[indices]
-    #         main.append(filt_df)
-    #
-    #     return main
+    @staticmethod
+    def detect_encounters(df: PTRAILDataFrame, distance: float, time_window: float,
+                          backend: Optional[Text] = None):
+        """
+            Find the encounters between all the trajectories of the dataframe, i.e. the
+            periods during which the objects of 2 trajectories were within the given
+            distance of each other at points recorded within the given time window.
+
+            Note
+            ----
+                | The points are placed in a spatio-temporal grid whose cells are as large as
+                  the distance and the time window, hence only the points of the same and the
+                  neighbouring cells are compared with each other instead of all the pairs of
+                  trajectories. The grid is split into slabs of cells with balanced numbers of
+                  points which are joined in parallel.
+                | The pairs of points of 2 trajectories are merged into a single encounter as
+                  long as the gap between them is not more than the time window.
+                | The points on either side of the antimeridian are not compared with each other.
+
+            Parameters
+            ----------
+                df: PTRAILDataFrame
+                    The dataframe containing the trajectory data.
+                distance: float
+                    The maximum distance (in metres) between the points of an encounter.
+                time_window: float
+                    The maximum time (in seconds) between the points of an encounter.
+                backend: Optional[Text]
+                    The backend on which the work is run, one of serial, threads or processes.
+                    If None, then the default backend of the WorkerPool is used.
+
+            Returns
+            -------
+                pandas.core.dataframe.DataFrame:
+                    The dataframe containing the traj_id_1, traj_id_2, Start, End and
+                    Min_Distance of each encounter.
+
+            Raises
+            ------
+                ValueError:
+                    The distance or the time window is not positive.
+        """
+        if distance <= 0 or time_window <= 0:
+            raise ValueError("The distance and the time window must be positive.")
+
+        traj_ids, offsets = df.traj_offsets
+        lat = df[const.LAT].to_numpy(dtype=np.float64)
+        lon = df[const.LONG].to_numpy(dtype=np.float64)
+        times = df.index.get_level_values(const.DateTime).to_numpy(dtype='datetime64[ns]').view(np.int64)
+        codes = np.repeat(np.arange(len(traj_ids), dtype=np.int64), np.diff(offsets))
+        window = int(time_window * 1e9)
+
+        # Place the points in the grid. The cells are as wide as the distance even at the
+        # highest latitude of the data, where the degrees of longitude are the shortest.
+        cell_lat = np.degrees(distance / (const.RADIUS_OF_EARTH * 1000))
+        max_lat = np.abs(lat).max() + cell_lat if len(lat) > 0 else 0
+        cell_lon = cell_lat / max(np.cos(np.radians(min(max_lat, 90))), 1e-6)
+        points = {'lat': lat, 'lon': lon, 'time': times, 'code': codes,
+                  'ix': np.floor(lon / cell_lon).astype(np.int64),
+                  'iy': np.floor(lat / cell_lat).astype(np.int64),
+                  'it': (times - times.min()) // window if len(times) > 0 else times}
+
+        order = np.lexsort((points['it'], points['iy'], points['ix']))
+        points = {name: values[order] for name, values in points.items()}
+
+        # Split the grid into slabs of whole columns of cells containing balanced numbers
+        # of points. Each worker also gets the columns on either side of its slab so that
+        # the points can be compared with the neighbouring cells.
+        columns, column_starts = np.unique(points['ix'], return_index=True)
+        num_slabs = max(1, min(len(columns), Partitioner.get_num_partitions()))
+        cuts = np.unique(np.searchsorted(column_starts, np.linspace(0, len(order), num_slabs + 1)[1:-1]))
+        slabs = np.split(np.arange(len(columns)), cuts)
+
+        args = []
+        for slab in slabs:
+            if len(slab) == 0:
+                continue
+            home = (np.searchsorted(points['ix'], columns[slab[0]]),
+                    np.searchsorted(points['ix'], columns[slab[-1]], side='right'))
+            rows = (np.searchsorted(points['ix'], columns[slab[0]] - 1),
+                    np.searchsorted(points['ix'], columns[slab[-1]] + 1, side='right'))
+            args.append(({name: values[rows[0]:rows[1]] for name, values in points.items()},
+                         (home[0] - rows[0], home[1] - rows[0]), distance, window))
+
+        results = WorkerPool.starmap(Helpers.encounters_helper, args, backend=backend)
+        matches = {name: np.concatenate([result[name] for result in results] +
+                                        [np.array([], dtype=np.float64 if name == 'distance' else np.int64)])
+                   for name in ['code_1', 'code_2', 'start', 'end', 'distance']}
+        events = Helpers._merge_encounters(matches, window)
+
+        traj_ids = np.asarray(traj_ids)
+        return pd.DataFrame({'traj_id_1': traj_ids[events['code_1']],
+                             'traj_id_2': traj_ids[events['code_2']],
+                             'Start': events['start'].astype('datetime64[ns]'),
+                             'End': events['end'].astype('datetime64[ns]'),
+                             'Min_Distance': events['distance']})
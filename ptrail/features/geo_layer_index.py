@@ -0,0 +1,351 @@
+"""
+    The geo_layer_index module contains the GeoLayerIndex, which is a spatial
+    index of the geographical layers (such as the Starkey habitat data) near
+    the trajectory data. The index is built once and can then be passed to the
+    contextual features and the visualizations in place of the raw dataframe,
+    so that the geometries, the R-trees and the bounding boxes of the layers
+    are not rebuilt on every call. For example:
+
+    ``habitat = GeoLayerIndex(pd.read_csv('starkey_habitat.csv'))``
+
+    ``ContextualFeatures.visited_location(df, habitat, 'BEAR', 'CowPast')``
+
+    Note
+    ----
+        | The geometries of a GeoDataFrame (points or polygons) are indexed as
+          they are. For any other dataframe, the points are created from its
+          'lat' and 'lon' columns.
+        | The index is built lazily and is picklable, hence it can be sent to the
+          worker processes as it is. The R-trees are rebuilt from the geometries
+          when the index is unpickled.
+
+    | Authors: Yaksh J Haranwala, Salman Haidri
+"""
+from typing import Optional, Text, Union
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from shapely.geometry import Polygon
+
+from ptrail.features.helper_functions import Helpers
+from ptrail.utilities import constants as const
+from ptrail.utilities.DistanceCalculator import FormulaLog as calc
+
+
+class GeoLayerIndex:
+    def __init__(self, geo_layers: Union[pd.DataFrame, gpd.GeoDataFrame]):
+        """
+            Create the index of the geographical layers.
+
+            Parameters
+            ----------
+                geo_layers: Union[pd.DataFrame, gpd.GeoDataFrame]
+                    The dataframe containing the geographical layers. If it is not a
+                    GeoDataFrame, then it needs to have the 'lat' and 'lon' columns.
+
+            Raises
+            ------
+                KeyError:
+                    The dataframe is not a GeoDataFrame and the lat or lon column is missing.
+        """
+        if not isinstance(geo_layers, gpd.GeoDataFrame) and \
+                (const.LAT not in geo_layers.columns or const.LONG not in geo_layers.columns):
+            raise KeyError(f"The geo layers need to have the '{const.LAT}' and '{const.LONG}' columns.")
+
+        self.data = geo_layers
+        self._geometries = None
+        self._groups = {}
+        self._trees = {}
+        self._bounds = {}
+        self._polygons = {}
+        self._poi_indexes = {}
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getstate__(self):
+        # The R-trees are rebuilt from the geometries when the index is unpickled.
+        state = self.__dict__.copy()
+        state['_trees'] = {}
+        return state
+
+    @staticmethod
+    def from_layers(geo_layers):
+        """
+            Get the index of the geographical layers. The index is created if a
+            dataframe is given, otherwise the given index is returned as it is.
+
+            Parameters
+            ----------
+                geo_layers: Union[pd.DataFrame, gpd.GeoDataFrame, GeoLayerIndex]
+                    The geographical layers or their index.
+
+            Returns
+            -------
+                GeoLayerIndex:
+                    The index of the geographical layers.
+        """
+        if isinstance(geo_layers, GeoLayerIndex):
+            return geo_layers
+        return GeoLayerIndex(geo_layers)
+
+    @property
+    def geometries(self):
+        """
+            The array of the shapely geometries of the layers.
+        """
+        if self._geometries is None:
+            if isinstance(self.data, gpd.GeoDataFrame):
+                self._geometries = np.asarray(self.data.geometry.values, dtype=object)
+            else:
+                self._geometries = shapely.points(self.data[const.LONG].to_numpy(dtype=np.float64),
+                                                  self.data[const.LAT].to_numpy(dtype=np.float64))
+        return self._geometries
+
+    def positions(self, column: Optional[Text] = None, value=None):
+        """
+            Get the positions of the rows of the layers whose column has the given value.
+
+            Parameters
+            ----------
+                column: Optional[Text]
+                    The name of the column. If None, then the positions of all the rows
+                    are returned.
+                value:
+                    The value of the column.
+
+            Returns
+            -------
+                numpy.ndarray:
+                    The positions of the rows.
+
+            Raises
+            ------
+                KeyError:
+                    The column does not exist in the layers.
+        """
+        if column is None:
+            return np.arange(len(self.data))
+
+        if column not in self._groups:
+            if column not in self.data.columns:
+                raise KeyError(f"The column {column} does not exist in the dataset.")
+            values = pd.Series(self.data[column].to_numpy())
+            self._groups[column] = values.groupby(values).indices
+        return self._groups[column].get(value, np.array([], dtype=np.int64))
+
+    def select(self, column: Optional[Text] = None, value=None):
+        """
+            Get the rows of the layers whose column has the given value.
+
+            Parameters
+            ----------
+                column: Optional[Text]
+                    The name of the column. If None, then all the rows are returned.
+                value:
+                    The value of the column.
+
+            Returns
+            -------
+                Union[pd.DataFrame, gpd.GeoDataFrame]:
+                    The rows of the layers.
+        """
+        return self.data.iloc[self.positions(column, value)]
+
+    def tree(self, column: Optional[Text] = None, value=None):
+        """
+            Get the STR-packed R-tree of the geometries of the layers whose column
+            has the given value.
+
+            Parameters
+            ----------
+                column: Optional[Text]
+                    The name of the column. If None, then all the geometries are indexed.
+                value:
+                    The value of the column.
+
+            Returns
+            -------
+                shapely.STRtree:
+                    The R-tree of the geometries. The indices returned by its queries
+                    are the positions in the array returned by the positions() function.
+        """
+        key = (column, value)
+        if key not in self._trees:
+            self._trees[key] = shapely.STRtree(self.geometries[self.positions(column, value)])
+        return self._trees[key]
+
+    def bounds(self, column: Optional[Text] = None, value=None):
+        """
+            Get the bounding box of the layers whose column has the given value.
+
+            Parameters
+            ----------
+                column: Optional[Text]
+                    The name of the column. If None, then the bounding box of all the
+                    layers is returned.
+                value:
+                    The value of the column.
+
+            Returns
+            -------
+                tuple:
+                    The (lat_min, lon_min, lat_max, lon_max) bounding box.
+        """
+        key = (column, value)
+        if key not in self._bounds:
+            lon_min, lat_min, lon_max, lat_max = shapely.total_bounds(self.geometries[self.positions(column, value)])
+            self._bounds[key] = (lat_min, lon_min, lat_max, lon_max)
+        return self._bounds[key]
+
+    def polygon(self, column: Text, value, crs: Optional[Text] = None):
+        """
+            Get the polygon whose vertices are the points of the layers whose column
+            has the given value, in the order of the rows.
+
+            Parameters
+            ----------
+                column: Text
+                    The name of the column.
+                value:
+                    The value of the column.
+                crs: Optional[Text]
+                    The coordinate reference system to which the points are projected
+                    before the polygon is created. If None, then the (lon, lat)
+                    coordinates are used.
+
+            Returns
+            -------
+                shapely.geometry.Polygon:
+                    The polygon of the points.
+
+            Raises
+            ------
+                ValueError:
+                    There are fewer than 3 points.
+        """
+        key = (column, value, crs)
+        if key not in self._polygons:
+            points = self.geometries[self.positions(column, value)]
+            if crs is not None:
+                points = gpd.GeoSeries(points, crs=const.WGS84).to_crs(crs).values
+            self._polygons[key] = Polygon(list(points))
+        return self._polygons[key]
+
+    def join(self, lat, lon, column: Optional[Text] = None, value=None, tolerance: float = 0):
+        """
+            Find the pairs of points and geometries of the layers whose column has the
+            given value such that the point lies within the tolerance of the geometry.
+
+            Note
+            ----
+                | With a tolerance of 0, the points that intersect with a geometry (i.e. lie
+                  on a point or inside a polygon of the layers) are matched.
+                | Otherwise, the candidates are first found using the R-tree with a box around
+                  each point that is large enough to contain the tolerance in degrees. The
+                  Haversine distance from each point to the nearest point of the candidate
+                  geometries is then checked against the tolerance.
+
+            Parameters
+            ----------
+                lat: array-like
+                    The latitudes of the points.
+                lon: array-like
+                    The longitudes of the points.
+                column: Optional[Text]
+                    The name of the column. If None, then all the layers are joined.
+                value:
+                    The value of the column.
+                tolerance: float
+                    The maximum distance (in metres) between a point and a geometry.
+
+            Returns
+            -------
+                numpy.ndarray:
+                    The 2 x k array containing the positions of the points in the first row
+                    and the positions of the rows of the layers in the second row.
+        """
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        positions = self.positions(column, value)
+        if len(lat) == 0 or len(positions) == 0:
+            return np.empty((2, 0), dtype=np.int64)
+
+        points = shapely.points(lon, lat)
+        if tolerance <= 0:
+            pairs = self.tree(column, value).query(points, predicate='intersects')
+        else:
+            # The tolerance in degrees of latitude. The degrees of longitude get shorter
+            # away from the equator, hence the box is widened by the latitude of the point.
+            d_lat = np.degrees(tolerance / (const.RADIUS_OF_EARTH * 1000))
+            d_lon = d_lat / np.maximum(np.cos(np.radians(np.minimum(np.abs(lat) + d_lat, 90))), 1e-6)
+            boxes = shapely.box(lon - d_lon, lat - d_lat, lon + d_lon, lat + d_lat)
+            pairs = self.tree(column, value).query(boxes, predicate='intersects')
+
+            # Check the distance from each point to the nearest point of the geometry.
+            lines = shapely.shortest_line(points[pairs[0]], self.geometries[positions[pairs[1]]])
+            coords = shapely.get_coordinates(lines).reshape(-1, 4)
+            distances = calc.haversine_distance(coords[:, 1], coords[:, 0], coords[:, 3], coords[:, 2])
+            pairs = pairs[:, distances <= tolerance]
+
+        return np.vstack([pairs[0], positions[pairs[1]]])
+
+    def intersects(self, lat, lon, column: Optional[Text] = None, value=None, tolerance: float = 0):
+        """
+            Check whether the points lie within the tolerance of any of the geometries
+            of the layers whose column has the given value. For more info, see the
+            join() function.
+
+            Parameters
+            ----------
+                lat: array-like
+                    The latitudes of the points.
+                lon: array-like
+                    The longitudes of the points.
+                column: Optional[Text]
+                    The name of the column. If None, then all the layers are checked.
+                value:
+                    The value of the column.
+                tolerance: float
+                    The maximum distance (in metres) between a point and a geometry.
+
+            Returns
+            -------
+                numpy.ndarray:
+                    The boolean array which is True at the points that are matched with
+                    a geometry.
+        """
+        found = np.zeros(len(lat), dtype=bool)
+        found[self.join(lat, lon, column, value, tolerance)[0]] = True
+        return found
+
+    def poi_index(self, dist_column_label: Text, nearby_threshold):
+        """
+            Get the index used to find whether the points are nearby a POI. For more
+            info, see the ContextualFeatures.visited_poi() function.
+
+            Parameters
+            ----------
+                dist_column_label: Text
+                    The label of the column containing the distance of the coords from
+                    the nearest POI.
+                nearby_threshold: int
+                    The maximum distance between the POI and the current location of the object
+                    within which the object is considered to be crossing/visiting the POI.
+
+            Returns
+            -------
+                list:
+                    The index built by the Helpers.build_poi_index() function.
+
+            Raises
+            ------
+                KeyError:
+                    The distance column does not exist in the layers.
+        """
+        key = (dist_column_label, nearby_threshold)
+        if key not in self._poi_indexes:
+            self._poi_indexes[key] = Helpers.build_poi_index(self.data, dist_column_label, nearby_threshold)
+        return self._poi_indexes[key]
@@ -12,134 +12,23 @@
 
     | Authors: Yaksh J Haranwala, Salman Haidri
 """
-import os
-from math import ceil
+import copy
+import itertools
 
 import numpy as np
 import pandas as pd
+import shapely
+from sklearn.neighbors import BallTree
 
 from ptrail.utilities import constants as const
 from ptrail.utilities.DistanceCalculator import FormulaLog as calc
+from ptrail.utilities.partitioner import Partitioner
+from ptrail.utilities.transport import SharedColumns
 
 pd.options.mode.chained_assignment = None
 
 
 class Helpers:
-    # ------------------------------------ Temporal Helpers --------------------------------------#
-    @staticmethod
-    def traj_duration_helper(dataframe, ids_):
-        """
-            Calculate the duration of the trajectory i.e. subtract the max time of
-            the trajectory by the min time of the trajectory.
-
-            Parameters
-            ----------
-                dataframe: PTRAILDataFrame
-                    The dataframe containing all the original data.
-                ids_: list
-                    A list containing all the Trajectory IDs present in the dataset.
-
-            Returns
-            -------
-                pandas.core.dataframe.DataFrame
-                    The resultant dataframe containing all the trajectory durations.
-        """
-        durations = []  # A list for storing results.
-
-        # Iterate over each ID and calculate the time duration of each unique ID.
-        for i in range(len(ids_)):
-            # Filter out only the points of the ID in question.
-            small = dataframe.loc[dataframe[const.TRAJECTORY_ID] == ids_[i], [const.DateTime]]
-
-            # Calculate the duration of the trajectory in question nd append
-            # a row containing [traj_duration, traj_id] to the results list.
-            durations.append([(small.max() - small.min())[0], ids_[i]])
-
-        # Convert the list containing results to a pandas dataframe, reset the index
-        # and then rename the columns.
-        result = pd.DataFrame(durations).reset_index(drop=True).rename(columns={0: "Traj_Duration",
-                                                                                1: const.TRAJECTORY_ID})
-        # Set the index to traj_id and return it.
-        return result.set_index(const.TRAJECTORY_ID)
-
-    @staticmethod
-    def start_time_helper(dataframe, ids_):
-        """
-            This function is the helper function of the get_start_time(). The get_start_time() function
-            delegates the task of calculating the start_time of the trajectories in the dataframe because the
-            original functions runs multiple instances of this function in parallel. This function finds the start
-            time of the specified trajectory IDs the DF and then another returns dataframe containing
-            start latitude, start longitude, DateTime and trajectory ID for each trajectory
-
-            Parameter
-            ---------
-                dataframe: PTRAILDataFrame
-                    The dataframe containing the original data.
-                ids_: list
-                    List of trajectory ids for which the start times are to be calculated
-
-            Returns
-            -------
-                pandas.core.dataframe.Dataframe
-                    New dataframe containing Trajectory ID as index and start time of all
-                    trajectories.
-        """
-        results = []
-
-        # Loops over the length of trajectory ids. Filter the dataframe according to each of the ids
-        # and then further filter that dataframe according to the earliest(minimum) time.
-        # And then append the data of that earliest time into a list.
-        for i in range(len(ids_)):
-            filt = (dataframe.loc[dataframe[const.TRAJECTORY_ID] == ids_[i],
-                                  [const.DateTime, const.LAT, const.LONG]])
-            start_time = (filt.loc[filt[const.DateTime] == filt[const.DateTime].min()]).reset_index()
-            results.append([start_time[const.DateTime][0], ids_[i]])
-
-        # Make a new dataframe containing Latitude Longitude and Trajectory id
-        df = pd.DataFrame(results).reset_index(drop=True).rename(columns={0: const.DateTime,
-                                                                          1: const.TRAJECTORY_ID})
-        # Return the dataframe by setting Trajectory id as index
-        return df.set_index(const.TRAJECTORY_ID)
-
-    @staticmethod
-    def end_time_helper(dataframe, ids_):
-        """
-            This function is the helper function of the get_end_time(). The get_end_time() function
-            delegates the task of calculating the end_time of the trajectories in the dataframe because the
-            original functions runs multiple instances of this function in parallel. This function finds the end
-            time of the specified trajectory IDs the DF and then another returns dataframe containing
-            end latitude, end longitude, DateTime and trajectory ID for each trajectory
-
-            Parameters
-            ----------
-                dataframe: PTRAILDataFrame
-                    The dataframe containing the original data.
-                ids_: list
-                    List of trajectory ids for which the end times are to be calculated
-
-            Returns
-            -------
-                pandas.core.dataframe.Dataframe
-                    New dataframe containing Trajectory ID as index end time of all trajectories.
-        """
-        results = []
-
-        # Loops over the length of trajectory ids. Filter the dataframe according to each of the ids
-        # and then further filter that dataframe according to the latest(maximum) time.
-        # And then append the data of that latest time into a list.
-        for i in range(len(ids_)):
-            filt = (dataframe.loc[dataframe[const.TRAJECTORY_ID] == ids_[i],
-                                  [const.DateTime, const.LAT, const.LONG]])
-            start_time = (filt.loc[filt[const.DateTime] == filt[const.DateTime].max()]).reset_index()
-            results.append([start_time[const.DateTime][0], ids_[i]])
-
-        # Make a new dataframe containing Latitude Longitude and Trajectory id
-        df = pd.DataFrame(results).reset_index(drop=True).rename(columns={0: const.DateTime,
-                                                                          1: const.TRAJECTORY_ID})
-        # Return the dataframe by setting Trajectory id as index
-        return df.set_index(const.TRAJECTORY_ID)
-
-
     # -------------------------------------- Spatial Helpers ----------------------------------------------- #
     @staticmethod
     def distance_between_consecutive_helper(dataframe):
@@ -165,29 +54,17 @@ class Helpers:
                 Do M ́odulo De Pr ́e-processamento Para Biblioteca Pymove'.Bachelor’s thesis.
                 Universidade Federal Do Cear ́a, 2019.
         """
-        # Reset the index and set it to trajectory ID in order to iterate
-        # over the dataframe based on trajectory ID.
-        dataframe = dataframe.reset_index().set_index(const.TRAJECTORY_ID)
-        ids_ = dataframe.index.unique()  # Find out all the unique IDs in the dataframe.
+        # Reset the index so that the trajectory ID is a regular column and the rows
+        # stay in their sorted (traj_id, DateTime) order.
+        dataframe = dataframe.reset_index()
 
-        # For each unique ID, calculate the haversine distance and then assign it to
-        # a new column and add that column to the dataframe.
-        for val in ids_:
-            curr_lat = dataframe.at[val, 'lat']
-            curr_lon = dataframe.at[val, 'lon']
-            size_id = curr_lat.size
+        # Calculate the haversine distance for all the points at once using the
+        # consecutive-point kernel.
+        dataframe['Distance'] = Helpers._consecutive_distances(dataframe[const.TRAJECTORY_ID].to_numpy(),
+                                                               dataframe[const.LAT].to_numpy(dtype=np.float64),
+                                                               dataframe[const.LONG].to_numpy(dtype=np.float64))
 
-            # Check whether the IDs are changing in the dataset and if they are, then assign
-            # Nan as the value to the first point of the new Trajectory ID.
-            if size_id <= 1:
-                dataframe.at[val, 'Distance'] = np.nan
-            else:
-                prev_lat = curr_lat.shift(1)
-                prev_lon = curr_lon.shift(1)
-                dataframe.at[val, 'Distance'] = \
-                    calc.haversine_distance(prev_lat, prev_lon, curr_lat, curr_lon)
-
-        return dataframe.reset_index()  # Reset the index and return the dataframe.
+        return dataframe
 
     @staticmethod
     def distance_from_start_helper(dataframe):
@@ -358,141 +235,133 @@ class Helpers:
         return dataframe.reset_index()
 
     @staticmethod
-    def start_location_helper(dataframe, ids_):
+    def start_location_helper(columns: dict, ranges):
         """
             This function is the helper function of the get_start_location(). The get_start_location() function
             delegates the task of calculating the start location of the trajectories in the dataframe because the
             original functions runs multiple instances of this function in parallel. This function finds the start
-            location of the specified trajectory IDs the DF and then another returns dataframe containing start
-            latitude, start longitude and trajectory ID for each trajectory
+            location of the trajectories present in the given ranges of rows of the shared columns and returns a
+            dataframe containing start latitude, start longitude and trajectory code for each trajectory.
 
-
-            Parameter
-            ---------
-                dataframe: PTRAILDataFrame
-                    The dataframe of which the locations are to be found.dataframe
-                ids_: list
-                    List of trajectory ids for which the start locations are to be calculated
+            Parameters
+            ----------
+                columns: dict
+                    The handle of the shared columns of the dataframe.
+                ranges: numpy.ndarray
+                    The (start_row, stop_row) pairs of the ranges of rows to work on.
 
             Returns
             -------
                 pandas.core.dataframe.Dataframe
-                    New dataframe containing Trajectory as index and latitude and longitude
+                    New dataframe containing Trajectory code as index and latitude and longitude
+                    as other 2 columns.
         """
-        results = []
-
-        # Loops over the length of trajectory ids. Filter the dataframe according to each of the ids
-        # and then further filter that dataframe according to the earliest(minimum) time.
-        # And then append the start location of that earliest time into a list
-        for i in range(len(ids_)):
-            filt = (dataframe.loc[dataframe[const.TRAJECTORY_ID] == ids_[i],
-                                  [const.DateTime, const.LAT, const.LONG]])
-            start_loc = (filt.loc[filt[const.DateTime] == filt[const.DateTime].min(),
-                                  [const.LAT, const.LONG]]).reset_index()
-            results.append([start_loc[const.LAT][0], start_loc[const.LONG][0], ids_[i]])
-
-        # Make a new dataframe containing Latitude Longitude and Trajectory id
-        df = pd.DataFrame(results).reset_index(drop=True).rename(columns={0: const.LAT,
-                                                                          1: const.LONG,
-                                                                          2: const.TRAJECTORY_ID})
+        data = SharedColumns.read(columns, ranges)
 
-        # Return the dataframe by setting Trajectory id as index
-        return df.set_index(const.TRAJECTORY_ID)
+        # The points are sorted by DateTime, hence the first point of each trajectory
+        # is the point recorded at the earliest time.
+        first = Helpers._traj_start_mask(data[const.TRAJECTORY_ID])
+        return pd.DataFrame({const.LAT: data[const.LAT][first],
+                             const.LONG: data[const.LONG][first]},
+                            index=data[const.TRAJECTORY_ID][first])
 
     @staticmethod
-    def end_location_helper(dataframe, ids_):
+    def end_location_helper(columns: dict, ranges):
         """
             This function is the helper function of the get_end_location(). The get_end_location() function
             delegates the task of calculating the end location of the trajectories in the dataframe because the
             original functions runs multiple instances of this function in parallel. This function finds the end
-            location of the specified trajectory IDs the DF and then another returns dataframe containing
-            end latitude, end longitude and trajectory ID for each trajectory
+            location of the trajectories present in the given ranges of rows of the shared columns and returns a
+            dataframe containing end latitude, end longitude and trajectory code for each trajectory.
 
-            Parameter
-            ---------
-                dataframe: PTRAILDataFrame
-                    The dataframe of which the locations are to be found.dataframe
-                ids_: list
-                    List of trajectory ids for which the end locations are to be calculated
+            Parameters
+            ----------
+                columns: dict
+                    The handle of the shared columns of the dataframe.
+                ranges: numpy.ndarray
+                    The (start_row, stop_row) pairs of the ranges of rows to work on.
 
             Returns
             -------
                 pandas.core.dataframe.Dataframe
-                    New dataframe containing Trajectory ID as index and latitude and longitude
+                    New dataframe containing Trajectory code as index and latitude and longitude
                     as other 2 columns.
         """
-        results = []
-
-        # Loops over the length of trajectory ids. Filter the dataframe according to each of the ids
-        # and then further filter that dataframe according to the latest(maximum) time.
-        # And then append the end location of that latest time into a list.
-        for i in range(len(ids_)):
-            filt = (dataframe.loc[dataframe[const.TRAJECTORY_ID] == ids_[i],
-                                  [const.DateTime, const.LAT, const.LONG]])
-            start_loc = (filt.loc[filt[const.DateTime] == filt[const.DateTime].max(),
-                                  [const.LAT, const.LONG]]).reset_index()
-            results.append([start_loc[const.LAT][0], start_loc[const.LONG][0], ids_[i]])
-
-        # Make a new dataframe containing Latitude Longitude and Trajectory id
-        df = pd.DataFrame(results).reset_index(drop=True).rename(columns={0: const.LAT,
-                                                                          1: const.LONG,
-                                                                          2: const.TRAJECTORY_ID})
-        # Return the dataframe by setting Trajectory id as index
-        return df.set_index(const.TRAJECTORY_ID)
+        data = SharedColumns.read(columns, ranges)
+        traj_ids, times = data[const.TRAJECTORY_ID], data[const.DateTime]
+
+        # Find the first point recorded at each timestamp of the trajectory. Since the points
+        # are sorted by DateTime, the last of these points is the first point recorded at the
+        # latest time of the trajectory.
+        first_of_time = Helpers._traj_start_mask(traj_ids)
+        first_of_time[1:] |= times[1:] != times[:-1]
+        candidates = np.flatnonzero(first_of_time)
+        end = candidates[np.append(traj_ids[candidates][1:] != traj_ids[candidates][:-1], True)] \
+            if len(candidates) > 0 else candidates
+
+        return pd.DataFrame({const.LAT: data[const.LAT][end],
+                             const.LONG: data[const.LONG][end]},
+                            index=traj_ids[end])
 
     @staticmethod
-    def number_of_location_helper(dataframe, ids_):
+    def number_of_location_helper(columns: dict, ranges):
         """
             This is the helper function for the get_number_of_locations() function. The
             get_number_of_locations() delegates the actual task of calculating the number of
             unique locations visited by a particular object to this function. This function
-            calculates the number of unique locations by each of the unique object and returns
-            a dataframe containing the results.
+            calculates the number of unique locations by each of the trajectories present in
+            the given ranges of rows of the shared columns and returns a dataframe containing
+            the results.
 
             Parameters
             ----------
-                dataframe: PTRAILDataFrame
-                    The dataframe containing all the original data.
-                ids_: list
-                    The list of ids for which the number of unique locations visited
-                    is to be calculated.
+                columns: dict
+                    The handle of the shared columns of the dataframe.
+                ranges: numpy.ndarray
+                    The (start_row, stop_row) pairs of the ranges of rows to work on.
 
             Returns
             -------
                 pandas.core.dataframe.DataFrame
-                    dataframe containing the results.
+                    dataframe containing the results indexed by the trajectory code.
         """
-        results = []  # A list for storing results.
+        data = SharedColumns.read(columns, ranges)
+        traj_ids, lat, lon = data[const.TRAJECTORY_ID], data[const.LAT], data[const.LONG]
+        codes = np.unique(traj_ids)
 
-        # Iterate over each ID and calculate the number of locations visited by each ID.
-        for i in range(len(ids_)):
-            # Filter out only the points of the ID in question.
-            filt = (dataframe.loc[dataframe[const.TRAJECTORY_ID] == ids_[i],
-                                  [const.DateTime, const.LAT, const.LONG]])
+        # Points with missing coordinates are not counted as locations.
+        valid = ~(np.isnan(lat) | np.isnan(lon))
+        traj_ids, lat, lon = traj_ids[valid], lat[valid], lon[valid]
 
-            # Calculate the total number of unique (lat, lon) points visited
-            # by the ID and append a row containing [# of unique locations, traj_id]
-            # to the results list.
-            results.append([filt.groupby([const.LAT, const.LONG]).ngroups, ids_[i]])
+        # Sort the points by (traj_id, lat, lon) and count the points which differ
+        # from their previous point, which gives the number of unique locations.
+        order = np.lexsort((lon, lat, traj_ids))
+        traj_ids, lat, lon = traj_ids[order], lat[order], lon[order]
+        distinct = Helpers._traj_start_mask(traj_ids)
+        distinct[1:] |= (lat[1:] != lat[:-1]) | (lon[1:] != lon[:-1])
 
-        # Convert the list containing results to a pandas dataframe, reset the index
-        # and then rename the columns.
-        df = pd.DataFrame(results).reset_index(drop=True).rename(columns={0: "Number of Unique Coordinates",
-                                                                          1: const.TRAJECTORY_ID})
-        # Set the index to traj_id and return it.
-        return df.set_index(const.TRAJECTORY_ID)
+        counts = np.zeros(len(codes), dtype=np.int64)
+        np.add.at(counts, np.searchsorted(codes, traj_ids[distinct]), 1)
+        return pd.DataFrame({"Number of Unique Coordinates": counts}, index=codes)
 
-    # ------------------------------------ Semantic Helpers ------------------------------------- #
     @staticmethod
-    def visited_poi_helper(df, surrounding_data, dist_column_label, nearby_threshold):
+    def build_poi_index(surrounding_data, dist_column_label, nearby_threshold):
         """
-            Given a Trajectory dataframe and another dataset with the surrounding data,
-            find whether the given object is nearby a point of interest or not.
+            Build the spatial index of the surrounding data which is used by the
+            visited_poi_helper() function. The index is built only once and is then
+            shared with all the workers.
+
+            Note
+            ----
+                | A point is near a POI if its distance from a location of the surrounding
+                  data differs by at most nearby_threshold from the distance of that location
+                  to its nearest POI, i.e. the point lies within a ring around the location.
+                | The locations are grouped by the outer radius of their rings, which doubles
+                  from one group to the next, and a BallTree is built for each group. Hence,
+                  the radius query of a group returns only a few locations that do not match.
 
             Parameters
             ----------
-                df:
-                    The dataframe containing the trajectory data.
                 surrounding_data:
                     The dataframe containing the data of the surroundings.
                 dist_column_label: Text
@@ -504,133 +373,427 @@ class Helpers:
 
             Returns
             -------
-                The original dataframe with another column added to it indicating whether
-                each point is within
-        """
-        # A boolean list to store if that point in trajectory lies around a POI.
-        POI = []
-        df2 = surrounding_data.copy()
-
-        try:
-            # Loop for every point in the dataframe and create a distance column with distance from every point in the
-            # surrounding data. Then use this distance column and the distance of POI column and compare each value.
-            # Store the comparison in an array True if they lie within the threshold else false. And if any of the
-            # value in it is true then that point in the dataframe was near a POI.
-            for i in range(len(df)):
-                dist_array = Helpers.distance_from_given_point_helper(df2, (df['lat'][i], df['lon'][i]))[
-                    f'Distance_from_{df["lat"][i], df["lon"][i]}'].to_numpy()
-                poi_array = df2[dist_column_label].to_numpy()
-
-                dist_comp = np.abs(poi_array - dist_array) <= nearby_threshold
-                POI.append(np.any(dist_comp))
-
-            # Append the boolean list containing whether each point was near the POI of interest or not
-            df['Nearby_POI'] = POI
-            print("Done")
-            return df
-        except KeyError:
+                list:
+                    The list containing the (tree, latitudes, longitudes, distances, radius)
+                    tuple of each group, the groups being in the increasing order of radius.
+
+            Raises
+            ------
+                KeyError:
+                    The distance column does not exist in the surrounding data.
+        """
+        if dist_column_label not in surrounding_data.columns:
             raise KeyError(f"The column {dist_column_label} does not exist in the dataset.")
 
-    # ------------------------------------ General Utilities ------------------------------------ #
+        lat = surrounding_data[const.LAT].to_numpy(dtype=np.float64)
+        lon = surrounding_data[const.LONG].to_numpy(dtype=np.float64)
+        dist = surrounding_data[dist_column_label].to_numpy(dtype=np.float64)
+
+        # The locations without a distance can never be matched, hence they are
+        # left out of the index.
+        outer = dist + nearby_threshold
+        valid = np.flatnonzero(np.isfinite(lat) & np.isfinite(lon) & np.isfinite(dist) & (outer >= 0))
+        groups = np.floor(np.log2(np.maximum(outer[valid], 1))).astype(np.int64)
+
+        poi_index = []
+        for group in np.unique(groups):
+            rows = valid[groups == group]
+            tree = BallTree(np.radians(np.column_stack([lat[rows], lon[rows]])), metric='haversine')
+            poi_index.append((tree, lat[rows], lon[rows], dist[rows], outer[rows].max()))
+        return poi_index
+
+    @staticmethod
+    def visited_poi_helper(columns: dict, ranges, poi_index, nearby_threshold):
+        """
+            This function is the helper function of the visited_poi() function. It finds
+            whether the points present in the given ranges of rows of the shared columns
+            are nearby a point of interest or not.
+
+            Parameters
+            ----------
+                columns: dict
+                    The handle of the shared columns of the dataframe.
+                ranges: numpy.ndarray
+                    The (start_row, stop_row) pairs of the ranges of rows to work on.
+                poi_index: list
+                    The spatial index of the surrounding data built by the build_poi_index()
+                    function.
+                nearby_threshold: int
+                    The maximum distance between the POI and the current location of the object
+                    within which the object is considered to be crossing/visiting the POI.
+
+            Returns
+            -------
+                numpy.ndarray:
+                    The boolean array indicating whether each point in the ranges is nearby
+                    a POI.
+        """
+        data = SharedColumns.read(columns, ranges)
+        lat, lon = data[const.LAT], data[const.LONG]
+        nearby = np.zeros(len(lat), dtype=bool)
+
+        for tree, poi_lat, poi_lon, poi_dist, radius in poi_index:
+            # The points which are already known to be nearby a POI are not queried again.
+            pending = np.flatnonzero(~nearby)
+            if len(pending) == 0:
+                break
+
+            # The radius query is padded slightly since the exact distances are checked
+            # below using the same formula as the rest of the library.
+            query_radius = radius / (const.RADIUS_OF_EARTH * 1000) * (1 + 1e-6)
+            coords = np.radians(np.column_stack([lat[pending], lon[pending]]))
+            counts = tree.query_radius(coords, query_radius, count_only=True)
+
+            # The candidates are listed in blocks of points such that each block has about
+            # the same number of candidates, so that the memory used stays bounded even when
+            # the radius of the group covers a large part of the surrounding data.
+            blocks = np.cumsum(counts) // 2 ** 22
+            bounds = np.searchsorted(blocks, np.arange(blocks[-1] + 2))
+            for start, stop in zip(bounds[:-1], bounds[1:]):
+                if counts[start:stop].sum() == 0:
+                    continue
+                candidates = tree.query_radius(coords[start:stop], query_radius)
+                points = np.repeat(pending[start:stop], counts[start:stop])
+                found = np.concatenate(candidates)
+
+                distances = calc.haversine_distance(lat[points], lon[points], poi_lat[found], poi_lon[found])
+                matched = points[np.abs(poi_dist[found] - distances) <= nearby_threshold]
+                nearby[matched] = True
+
+        return nearby
+
+    @staticmethod
+    def encounters_helper(points: dict, home, distance, time_window):
+        """
+            This function is the helper function of the detect_encounters() function. It
+            finds the pairs of points of different trajectories that are within the given
+            distance and time window of each other, where the first point of each pair lies
+            in one of the home cells of the worker.
+
+            Note
+            ----
+                The points are joined with the points of the same and the 26 neighbouring cells
+                of the spatio-temporal grid. Each pair is kept only from the side of the point
+                with the smaller trajectory code, hence each pair is found exactly once across
+                all the workers.
+
+            Parameters
+            ----------
+                points: dict
+                    The dictionary containing the lat, lon, time (in nanoseconds), code
+                    (trajectory code) and the ix, iy and it (grid cell) arrays of the points
+                    in the home cells and their neighbouring cells.
+                home: tuple
+                    The (start_row, stop_row) range of the points in the home cells.
+                distance: float
+                    The maximum distance (in metres) between the points of an encounter.
+                time_window: int
+                    The maximum time (in nanoseconds) between the points of an encounter.
+
+            Returns
+            -------
+                dict:
+                    The dictionary containing the code_1, code_2, start, end and distance
+                    arrays of the pairs of points that were found.
+        """
+        cells = pd.DataFrame({'ix': points['ix'], 'iy': points['iy'], 'it': points['it'],
+                              'row': np.arange(len(points['ix']))})
+        home_cells = cells.iloc[home[0]:home[1]]
+        codes, times = points['code'], points['time']
+
+        firsts, seconds = [], []
+        for dx, dy, dt in itertools.product((-1, 0, 1), repeat=3):
+            # Hash join the home points with the points of the neighbouring cell in the
+            # direction of the offset.
+            shifted = home_cells.assign(ix=home_cells['ix'] + dx, iy=home_cells['iy'] + dy,
+                                        it=home_cells['it'] + dt)
+            joined = shifted.merge(cells, on=['ix', 'iy', 'it'], suffixes=('_1', '_2'))
+            first, second = joined['row_1'].to_numpy(), joined['row_2'].to_numpy()
+
+            keep = codes[first] < codes[second]
+            first, second = first[keep], second[keep]
+            keep = np.abs(times[first] - times[second]) <= time_window
+            firsts.append(first[keep])
+            seconds.append(second[keep])
+
+        first, second = np.concatenate(firsts), np.concatenate(seconds)
+        distances = calc.haversine_distance(points['lat'][first], points['lon'][first],
+                                            points['lat'][second], points['lon'][second])
+        keep = distances <= distance
+        first, second = first[keep], second[keep]
+
+        return {'code_1': codes[first], 'code_2': codes[second],
+                'start': np.minimum(times[first], times[second]),
+                'end': np.maximum(times[first], times[second]),
+                'distance': distances[keep]}
+
+    # ------------------------------------ Vectorized Kernels ------------------------------------ #
+    @staticmethod
+    def _traj_start_mask(traj_ids: np.ndarray):
+        """
+            Given the trajectory IDs of a dataframe sorted by (traj_id, DateTime), create
+            a boolean mask which is True at the first point of every trajectory.
+
+            Parameters
+            ----------
+                traj_ids: np.ndarray
+                    The array containing the trajectory ID of each point.
+
+            Returns
+            -------
+                np.ndarray
+                    The boolean mask marking the first point of each trajectory.
+        """
+        mask = np.empty(len(traj_ids), dtype=bool)
+        if len(traj_ids) > 0:
+            # A new trajectory starts at the first row and wherever the ID differs
+            # from the ID of the previous row.
+            mask[0] = True
+            np.not_equal(traj_ids[1:], traj_ids[:-1], out=mask[1:])
+        return mask
+
+    @staticmethod
+    def _consecutive_distances(traj_ids: np.ndarray, lat: np.ndarray, lon: np.ndarray):
+        """
+            Calculate the haversine distance between every point and its previous point in a
+            single pass over the entire dataset. The first point of each trajectory has no
+            previous point and hence its distance is set to NaN.
+
+            Note
+            ----
+                The arrays are expected to be in the (traj_id, DateTime) order in which the
+                PTRAILDataFrame stores its points.
+
+            Parameters
+            ----------
+                traj_ids: np.ndarray
+                    The trajectory ID of each point.
+                lat: np.ndarray
+                    The latitude of each point.
+                lon: np.ndarray
+                    The longitude of each point.
+
+            Returns
+            -------
+                np.ndarray
+                    The distance (in metres) from the previous point to the current point.
+        """
+        # Shift the coordinates by 1 to get the previous point of every point. The first
+        # row has no previous point, but it is masked out below anyway.
+        prev_lat = np.roll(lat, 1)
+        prev_lon = np.roll(lon, 1)
+
+        distances = calc.haversine_distance(prev_lat, prev_lon, lat, lon)
+        distances[Helpers._traj_start_mask(traj_ids)] = np.nan
+        return distances
+
     @staticmethod
-    def _get_partition_size(size):
+    def _rate_of_change(values: np.ndarray, time_deltas: np.ndarray):
         """
-            Takes number of ids and makes use of a formula that gives a factor to makes set of ids
-            according to the number of processors available to work with.
+            Calculate the rate of change of the given values between every point and its
+            previous point. Division by a zero time delta yields NaN instead of infinity.
 
             Parameters
             ----------
-                size: int
-                    The total number of trajectory IDs in the dataset.
+                values: np.ndarray
+                    The values whose rate of change is to be calculated.
+                time_deltas: np.ndarray
+                    The time (in seconds) elapsed since the previous point.
 
             Returns
             -------
-                int
-                   The factor by which the datasets are to be split.
+                np.ndarray
+                    The rate of change of the values per second.
         """
-        # Based on the Operating system, get the number of CPUs available for
-        # multiprocessing.
-        num = os.cpu_count()
-        num = int(num)
-        NUM_CPU = ceil((num * 2) / 3)
+        deltas = np.empty(len(values), dtype=np.float64)
+        deltas[:1] = np.nan
+        np.subtract(values[1:], values[:-1], out=deltas[1:])
 
-        # Integer divide the total number of Trajectory IDs by the number of available CPUs
-        # and square the number because if too many partitions are made, then it does more
-        # harm than good for the execution speed. The factor of 1 is added to avoid errors
-        # when the integer division yields a 0.
-        factor = ((size // NUM_CPU) ** 2) + 1
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rates = deltas / time_deltas
+        rates[np.isinf(rates)] = np.nan
+        return rates
 
-        # Return the factor if it is less than 100 otherwise return 100.
-        # This factor hence is capped at 100.
-        return factor if factor < 100 else 100
+    @staticmethod
+    def _kinematic_features_kernel(traj_ids: np.ndarray, lat: np.ndarray, lon: np.ndarray,
+                                   timestamps: np.ndarray):
+        """
+            Calculate all the kinematic features of the dataset from a single set of
+            arrays. The features are calculated for all the trajectories together and
+            the NaN values present at the start of each trajectory propagate to the
+            derived features, so no value is ever calculated across 2 trajectories.
+
+            Parameters
+            ----------
+                traj_ids: np.ndarray
+                    The trajectory ID of each point.
+                lat: np.ndarray
+                    The latitude of each point.
+                lon: np.ndarray
+                    The longitude of each point.
+                timestamps: np.ndarray
+                    The datetime64[ns] timestamp of each point.
+
+            Returns
+            -------
+                dict:
+                    The dictionary mapping the name of each kinematic feature to its values.
+        """
+        n = len(traj_ids)
+        first = Helpers._traj_start_mask(traj_ids)
+
+        # Time elapsed (in seconds) between each point and its previous point.
+        time_deltas = np.empty(n, dtype=np.float64)
+        time_deltas[:1] = np.nan
+        times = timestamps.astype('datetime64[ns]').astype(np.int64)
+        time_deltas[1:] = np.diff(times) / 1e9
+
+        # Distance between consecutive points.
+        distance = Helpers._consecutive_distances(traj_ids, lat, lon)
+
+        # Distance from the first point of the trajectory to each point. The position
+        # of the first point of the trajectory is carried forward for every row.
+        starts = np.maximum.accumulate(np.where(first, np.arange(n), 0)) if n > 0 else np.arange(0)
+        distance_from_start = calc.haversine_distance(lat[starts], lon[starts], lat, lon)
+        distance_from_start[first] = np.nan
+
+        # Bearing between consecutive points.
+        bearing = calc.bearing_calculation(np.roll(lat, 1), np.roll(lon, 1), lat, lon)
+        bearing[first] = np.nan
+
+        # Speed and the subsequent derivatives.
+        with np.errstate(divide='ignore', invalid='ignore'):
+            speed = distance / time_deltas
+        speed[np.isinf(speed)] = np.nan
+        acceleration = Helpers._rate_of_change(speed, time_deltas)
+        jerk = Helpers._rate_of_change(acceleration, time_deltas)
+        bearing_rate = Helpers._rate_of_change(bearing, time_deltas)
+        rate_of_bearing_rate = Helpers._rate_of_change(bearing_rate, time_deltas)
+
+        return {
+            'Distance': distance,
+            'Distance_from_start': distance_from_start,
+            'Speed': speed,
+            'Acceleration': acceleration,
+            'Jerk': jerk,
+            'Bearing': bearing,
+            'Bearing_Rate': bearing_rate,
+            'Rate_of_bearing_rate': rate_of_bearing_rate,
+        }
 
     @staticmethod
-    def _df_split_helper(dataframe):
+    def _polygon_codes(lat: np.ndarray, lon: np.ndarray, polygons):
+        """
+            Find the polygon inside which each point lies. The points are first checked
+            against the bounding box of each polygon using the raw coordinates and only
+            the points inside the bounding box are tested against the prepared polygon.
+
+            Note
+            ----
+                The points on the boundary of a polygon are considered to be inside it. If
+                a point lies inside more than one polygon, then it is given the first one.
+
+            Parameters
+            ----------
+                lat: np.ndarray
+                    The latitude of each point.
+                lon: np.ndarray
+                    The longitude of each point.
+                polygons: list
+                    The list of the shapely polygons with (longitude, latitude) coordinates.
+
+            Returns
+            -------
+                np.ndarray
+                    The position of the polygon in the list for each point and -1 for the
+                    points that are not inside any of the polygons.
+        """
+        codes = np.full(len(lat), -1, dtype=np.int64)
+        for code, polygon in enumerate(polygons):
+            lon_min, lat_min, lon_max, lat_max = polygon.bounds
+            candidates = np.flatnonzero((codes == -1) & (lat >= lat_min) & (lat <= lat_max)
+                                        & (lon >= lon_min) & (lon <= lon_max))
+            if len(candidates) == 0:
+                continue
+
+            # Prepare a copy of the polygon so that the polygon of the caller is not
+            # modified, unless the caller has already prepared it.
+            if not shapely.is_prepared(polygon):
+                polygon = copy.copy(polygon)
+                shapely.prepare(polygon)
+            codes[candidates[shapely.intersects_xy(polygon, lon[candidates], lat[candidates])]] = code
+        return codes
+
+    @staticmethod
+    def _merge_encounters(matches: dict, time_window):
+        """
+            Merge the pairs of points of each pair of trajectories into encounter events.
+            The pairs of points are taken in the order of time and a new event is started
+            whenever the gap from the end of the previous event is more than the time window.
+
+            Parameters
+            ----------
+                matches: dict
+                    The dictionary containing the code_1, code_2, start, end and distance
+                    arrays of the pairs of points.
+                time_window: int
+                    The maximum time (in nanoseconds) between 2 pairs of points of an event.
+
+            Returns
+            -------
+                dict
+                    The dictionary containing the code_1, code_2, start, end and distance
+                    (minimum distance) arrays of the events.
+        """
+        code_1, code_2, start, end = matches['code_1'], matches['code_2'], matches['start'], matches['end']
+        order = np.lexsort((start, code_2, code_1))
+        code_1, code_2, start, end = code_1[order], code_2[order], start[order], end[order]
+        distance = matches['distance'][order]
+        if len(order) == 0:
+            return {'code_1': code_1, 'code_2': code_2, 'start': start, 'end': end, 'distance': distance}
+
+        new_pair = np.ones(len(order), dtype=bool)
+        new_pair[1:] = (code_1[1:] != code_1[:-1]) | (code_2[1:] != code_2[:-1])
+
+        # The latest end seen so far within each pair of trajectories.
+        latest_end = pd.Series(end).groupby(np.cumsum(new_pair)).cummax().to_numpy()
+        new_event = new_pair.copy()
+        new_event[1:] |= start[1:] - latest_end[:-1] > time_window
+
+        bounds = np.flatnonzero(new_event)
+        return {'code_1': code_1[bounds], 'code_2': code_2[bounds],
+                'start': np.minimum.reduceat(start, bounds),
+                'end': np.maximum.reduceat(end, bounds),
+                'distance': np.minimum.reduceat(distance, bounds)}
+
+    # ------------------------------------ General Utilities ------------------------------------ #
+    @staticmethod
+    def _df_split_helper(dataframe, split_long: bool = False):
         """
             This is the helper function for splitting up dataframes into smaller chunks.
             This function is widely used for main functions to help split the original
-            dataframe into smaller chunks based on a fixed range of IDs. This function
-            splits the dataframes based on a predetermined number, stores them in a list
-            and returns it.
+            dataframe into smaller chunks which are then processed in parallel. The
+            chunks are balanced by the number of points in them instead of the number
+            of trajectory IDs.
 
             Note
             ----
-                The dataframe is split based on the number of CPU cores available for.
-                For more info, take a look at the documentation of the get_partition_size()
-                function.
+                The chunks are made by the Partitioner based on the number of worker
+                processes of the shared pool. For more info, take a look at the
+                documentation of the Partitioner.partition_ranges() function.
 
             Parameters
             ----------
                 dataframe: PTRAILDataFrame
-                The dataframe that is to be split.
+                    The dataframe that is to be split.
+                split_long: bool
+                    Whether the trajectories that are too long for a single chunk can be
+                    split across the chunks. Only to be used by the operations which
+                    compute each point on its own.
 
             Returns
             -------
                 list:
                     The list containing smaller dataframe chunks.
         """
-        # First, create a list containing all the ids of the data and then further divide that
-        # list items and split it into sub-lists of ids equal to split_factor.
-        ids_ = list(dataframe.reset_index().traj_id.value_counts().keys())
-
-        # Get the ideal number of IDs by which the dataframe is to be split.
-        split_factor = Helpers._get_partition_size(len(ids_))
-        ids_ = [ids_[i: i + split_factor] for i in range(0, len(ids_), split_factor)]
-
-        # Now split the dataframes based on set of Trajectory ids.
-        # As of now, each smaller chunk is supposed to have data of 100
-        # trajectory IDs max
-        df_chunks = [dataframe.reset_index().loc[dataframe.reset_index()[const.TRAJECTORY_ID].isin(ids_[i])]
-                     for i in range(len(ids_))]
-        return df_chunks
-
-    # @staticmethod
-    # def _partition_size(size, cpu_count):
-    #     """
-    #         Takes number of ids and makes use of a formula that gives a factor to makes set of ids
-    #         according to the number of processors available to work with.
-    #
-    #         Parameters
-    #         ----------
-    #             size: int
-    #                 The total number of trajectory IDs in the dataset.
-    #
-    #         Returns
-    #         -------
-    #             int
-    #                The factor by which the datasets are to be split.
-    #     """
-    #     # Based on the Operating system, get the number of CPUs available for
-    #     # multiprocessing.
-    #     available_cpus = len(os.sched_getaffinity(0)) if os.name == 'posix' \
-    #         else psutil.cpu_count()  # Number of available CPUs.
-    #
-    #     # Integer divide the total number of Trajectory IDs by the number of available CPUs
-    #     # and square the number because if too many partitions are made, then it does more
-    #     # harm than good for the execution speed. The factor of 1 is added to avoid errors
-    #     # when the integer division yields a 0.
-    #     factor = ((size // cpu_count)) + 1
-    #
-    #     # Return the factor if it is less than 100 otherwise return 100.
-    #     # This factor hence is capped at 100.
-    #     return factor if factor < 100 else 100
+        return Partitioner.split(dataframe, split_long)
@@ -15,9 +15,6 @@
             Pr ́e-processamento Para Biblioteca Pymove”.Bachelor’s thesis. Universidade Federal Do Cear ́a, 2019
 """
 import itertools
-import multiprocessing
-import os
-from math import ceil
 from typing import Optional, Text
 
 import numpy as np
@@ -28,9 +25,8 @@ from ptrail.features.helper_functions import Helpers as helpers
 from ptrail.utilities import constants as const
 from ptrail.utilities.DistanceCalculator import FormulaLog as calc
 from ptrail.utilities.exceptions import *
-
-num = os.cpu_count()
-NUM_CPU = ceil((num * 2) / 3)
+from ptrail.utilities.executor import WorkerPool
+from ptrail.utilities.transport import SharedColumns
 
 
 class KinematicFeatures:
@@ -59,7 +55,7 @@ class KinematicFeatures:
         )
 
     @staticmethod
-    def get_start_location(dataframe: PTRAILDataFrame, traj_id=None):
+    def get_start_location(dataframe: PTRAILDataFrame, traj_id=None, backend: Optional[Text] = None):
         """
             Get the starting location of an object's trajectory in the data.
 
@@ -75,6 +71,9 @@ class KinematicFeatures:
                     The PTRAILDataFrame storing the trajectory data.
                 traj_id:
                     The ID of the object whose start location is to be found.
+                backend: Optional[Text]
+                    The backend on which the work is run, one of serial, threads or
+                    processes. If None, then the default backend of the WorkerPool is used.
 
             Returns
             -------
@@ -86,27 +85,20 @@ class KinematicFeatures:
         # If traj_id is None, find the start times of all the unique trajectories present in the data.
         # Else first filter out a dataframe containing the given traj_id and then return the start
         # location of that point.
-        dataframe = dataframe.copy().reset_index()
         if traj_id is None:
-            ids_ = dataframe[const.TRAJECTORY_ID].value_counts(ascending=True).keys().to_list()
-            # Get the ideal number of IDs by which the dataframe is to be split.
-            split_factor = helpers._get_partition_size(len(ids_))
-            ids_ = [ids_[i: i + split_factor] for i in range(0, len(ids_), split_factor)]
-
-            # Here, create 2/3rds number of processes as there are in the system. Some CPUs are
-            # kept free at all times in order to not block up the system.
-            # (Note: The blocking of system is mostly prevalent in Windows and does not happen very often
-            # in Linux. However, out of caution some CPUs are kept free regardless of the system.)
-            mp_pool = multiprocessing.Pool(NUM_CPU)
-            results = mp_pool.starmap(helpers.start_location_helper, zip(itertools.repeat(dataframe), ids_))
-            mp_pool.close()
-            mp_pool.join()
-
-            # Concatenate all the smaller dataframes and return the answer.
-            results = pd.concat(results)
+            # Place the columns in shared memory and run the helper function in parallel on the shared
+            # pool of worker processes, where each worker only receives the ranges of rows.
+            with SharedColumns(dataframe) as columns:
+                # Split the rows into partitions of balanced numbers of points.
+                args = [(columns.handle, ranges) for ranges in columns.partitions()]
+                results = pd.concat(WorkerPool.starmap(helpers.start_location_helper, args, backend=backend))
+                results = results.sort_index()
+                results.index = columns.to_traj_ids(results.index)
+
             return results
 
         else:
+            dataframe = dataframe.reset_index()
             filt = (dataframe.loc[dataframe[const.TRAJECTORY_ID] == traj_id, [const.DateTime, const.LAT, const.LONG]])
             start_loc = (filt.loc[filt[const.DateTime] == filt[const.DateTime].min(),
                                   [const.LAT, const.LONG]]).reset_index()
@@ -116,7 +108,8 @@ class KinematicFeatures:
                 return start_loc[const.LAT][0], start_loc[const.LONG][0]
 
     @staticmethod
-    def get_end_location(dataframe: PTRAILDataFrame, traj_id: Optional[Text] = None):
+    def get_end_location(dataframe: PTRAILDataFrame, traj_id: Optional[Text] = None,
+                         backend: Optional[Text] = None):
         """
             Get the ending location of an object's trajectory in the data.
 
@@ -132,6 +125,9 @@ class KinematicFeatures:
                     The PTRAILDataFrame storing the trajectory data.
                 traj_id
                     The ID of the trajectory whose end location is to be found.
+                backend: Optional[Text]
+                    The backend on which the work is run, one of serial, threads or
+                    processes. If None, then the default backend of the WorkerPool is used.
 
             Returns
             -------
@@ -143,26 +139,19 @@ class KinematicFeatures:
         # If traj_id is None, find the end times of all the unique trajectories present in the data.
         # Else first filter out a dataframe containing the given traj_id and then return the end
         # location of that point.
-        dataframe = dataframe.copy().reset_index()
         if traj_id is None:
-            ids_ = dataframe[const.TRAJECTORY_ID].value_counts(ascending=True).keys().to_list()
-            # Get the ideal number of IDs by which the dataframe is to be split.
-            split_factor = helpers._get_partition_size(len(ids_))
-            ids_ = [ids_[i: i + split_factor] for i in range(0, len(ids_), split_factor)]
-
-            # Here, create 2/3rds number of processes as there are in the system. Some CPUs are
-            # kept free at all times in order to not block up the system.
-            # (Note: The blocking of system is mostly prevalent in Windows and does not happen very often
-            # in Linux. However, out of caution some CPUs are kept free regardless of the system.)
-            mp_pool = multiprocessing.Pool(NUM_CPU)
-            results = mp_pool.starmap(helpers.end_location_helper, zip(itertools.repeat(dataframe), ids_))
-            mp_pool.close()
-            mp_pool.join()
-
-            # Concatenate all the smaller dataframes and return the answer.
-            results = pd.concat(results)
+            # Place the columns in shared memory and run the helper function in parallel on the shared
+            # pool of worker processes, where each worker only receives the ranges of rows.
+            with SharedColumns(dataframe) as columns:
+                # Split the rows into partitions of balanced numbers of points.
+                args = [(columns.handle, ranges) for ranges in columns.partitions()]
+                results = pd.concat(WorkerPool.starmap(helpers.end_location_helper, args, backend=backend))
+                results = results.sort_index()
+                results.index = columns.to_traj_ids(results.index)
+
             return results
         else:
+            dataframe = dataframe.reset_index()
             filt = (dataframe.loc[dataframe[const.TRAJECTORY_ID] == traj_id, [const.DateTime, const.LAT, const.LONG]])
             start_loc = (filt.loc[filt[const.DateTime] == filt[const.DateTime].max(),
                                   [const.LAT, const.LONG]]).reset_index()
@@ -181,13 +170,18 @@ class KinematicFeatures:
             ----
                 When the trajectory ID changes in the data, then the distance calculation again starts
                 from the first point of the new trajectory ID and the distance-value of the first point
-                of the new Trajectory ID will be set to 0.
+                of the new Trajectory ID will be set to NaN.
 
             Note
             ----
                 The Distance calculated here is the distance between 2 consecutive points of the same
                 trajectory. Furthermore, the distance yielded is in metres (m).
 
+            Note
+            ----
+                The distances of all the trajectories are calculated together in a single vectorized
+                pass over the dataframe, hence no multiprocessing is required for this function.
+
             Parameters
             ----------
                 dataframe: PTRAILDataFrame
@@ -198,31 +192,11 @@ class KinematicFeatures:
                 PTRAILDataFrame:
                     The dataframe containing the resultant Distance_prev_to_curr column.
         """
-        # Case-1: The number of unique Trajectory IDs is less than 100.
-        if dataframe.reset_index().traj_id.nunique() < const.MIN_IDS:
-            result = helpers.distance_between_consecutive_helper(dataframe)
-            return PTRAILDataFrame(result, const.LAT, const.LONG,
-                                   const.DateTime, const.TRAJECTORY_ID)
-        # Case-2: The number of unique Trajectory IDs is significant.
-        else:
-            # splitting the dataframe according to trajectory ids.
-            df_chunks = helpers._df_split_helper(dataframe)
-
-            # Here, create 2/3rds number of processes as there are in the system. Some CPUs are
-            # kept free at all times in order to not block up the system.
-            # (Note: The blocking of system is mostly prevalent in Windows and does not happen very often
-            # in Linux. However, out of caution some CPUs are kept free regardless of the system.)
-            multi_pool = multiprocessing.Pool(NUM_CPU)
-            result = multi_pool.map(helpers.distance_between_consecutive_helper, df_chunks)
-            multi_pool.close()
-            multi_pool.join()
-
-            # merge the smaller pieces and then return the dataframe converted to PTRAILDataFrame.
-            return PTRAILDataFrame(pd.concat(result).drop(columns=['index']), const.LAT, const.LONG,
-                                   const.DateTime, const.TRAJECTORY_ID)
+        result = helpers.distance_between_consecutive_helper(dataframe)
+        return PTRAILDataFrame._from_validated(result)
 
     @staticmethod
-    def create_distance_from_start_column(dataframe: PTRAILDataFrame):
+    def create_distance_from_start_column(dataframe: PTRAILDataFrame, backend: Optional[Text] = None):
         """
             Create a column containing distance between the start location and the rest of the
             points using Haversine formula. The distance calculated is the Great-Circle distance.
@@ -242,6 +216,9 @@ class KinematicFeatures:
             ----------
                 dataframe: PTRAILDataFrame
                     The data where distance is to be calculated.
+                backend: Optional[Text]
+                    The backend on which the work is run, one of serial, threads or
+                    processes. If None, then the default backend of the WorkerPool is used.
 
             Returns
             -------
@@ -251,22 +228,15 @@ class KinematicFeatures:
         # Case-1: The number of unique Trajectory IDs is less than 100.
         if dataframe.reset_index().traj_id.nunique() < const.MIN_IDS:
             result = helpers.distance_from_start_helper(dataframe)
-            return PTRAILDataFrame(result, const.LAT, const.LONG,
-                                   const.DateTime, const.TRAJECTORY_ID)
+            return PTRAILDataFrame._from_validated(result)
 
         # Case-2: The number of unique Trajectory IDs is significant.
         else:
             # splitting the dataframe according to trajectory ids.
             df_chunks = helpers._df_split_helper(dataframe)
 
-            # Here, create 2/3rds number of processes as there are in the system. Some CPUs are
-            # kept free at all times in order to not block up the system.
-            # (Note: The blocking of system is mostly prevalent in Windows and does not happen very often
-            # in Linux. However, out of caution some CPUs are kept free regardless of the system.)
-            multi_pool = multiprocessing.Pool(NUM_CPU)
-            result = multi_pool.map(helpers.distance_from_start_helper, df_chunks)
-            multi_pool.close()
-            multi_pool.join()
+            # Run the helper function in parallel on the shared pool of workers.
+            result = WorkerPool.map(helpers.distance_from_start_helper, df_chunks, backend=backend)
 
             # merge the smaller pieces and then return the dataframe converted to PTRAILDataFrame.
             return PTRAILDataFrame(pd.concat(result).drop(columns=['index']), const.LAT, const.LONG,
@@ -327,7 +297,7 @@ class KinematicFeatures:
 
     @staticmethod
     def create_point_within_range_column(dataframe: PTRAILDataFrame, coordinates: tuple,
-                                         dist_range: float):
+                                         dist_range: float, backend: Optional[Text] = None):
         """
             Check how many points are within the range of the given coordinate by first making a column
             containing the distance between the given coordinate and rest of the points in dataframe by calling
@@ -346,32 +316,32 @@ class KinematicFeatures:
                     The coordinates from which the distance is to be calculated.
                 dist_range: float
                     The range within which the resultant distance from the coordinates should lie.
+                backend: Optional[Text]
+                    The backend on which the work is run, one of serial, threads or
+                    processes. If None, then the default backend of the WorkerPool is used.
 
             Returns
             -------
                 PTRAILDataFrame:
                     The dataframe containing the resultant Within_x_m_from_(x,y) column.
         """
-        # splitting the dataframe according to trajectory ids
-        df_chunks = helpers._df_split_helper(dataframe)
+        # splitting the dataframe into chunks of balanced sizes. Each point is checked on
+        # its own, hence the long trajectories can be split across the chunks as well.
+        df_chunks = helpers._df_split_helper(dataframe, split_long=True)
 
-        # Here, create 2/3rds number of processes as there are in the system. Some CPUs are
-        # kept free at all times in order to not block up the system.
-        # (Note: The blocking of system is mostly prevalent in Windows and does not happen very often
-        # in Linux. However, out of caution some CPUs are kept free regardless of the system.)
-        pool = multiprocessing.Pool(NUM_CPU)
+        # Run the helper function in parallel on the shared pool of workers.
         args = zip(df_chunks, itertools.repeat(coordinates), itertools.repeat(dist_range))
-        result = pool.starmap(helpers.point_within_range_helper, args)
-        pool.close()
-        pool.join()
+        result = WorkerPool.starmap(helpers.point_within_range_helper, args, backend=backend)
 
-        # Now lets join all the smaller partitions and return the resultant dataframe
-        result = pd.concat(result)
+        # Now lets join all the smaller partitions back in the original order of
+        # the points and return the resultant dataframe
+        result = pd.concat(result).sort_index()
         return PTRAILDataFrame(result.reset_index().drop(columns=['index']),
                                const.LAT, const.LONG, const.DateTime, const.TRAJECTORY_ID)
 
     @staticmethod
-    def create_distance_from_point_column(dataframe: PTRAILDataFrame, coordinates: tuple):
+    def create_distance_from_point_column(dataframe: PTRAILDataFrame, coordinates: tuple,
+                                          backend: Optional[Text] = None):
         """
             Given a point, this function calculates the distance between that point and all the
             points present in the dataframe and adds that column into the dataframe.
@@ -386,6 +356,9 @@ class KinematicFeatures:
                     The dataframe on which calculation is to be done.
                 coordinates: tuple
                     The coordinates from which the distance is to be calculated.
+                backend: Optional[Text]
+                    The backend on which the work is run, one of serial, threads or
+                    processes. If None, then the default backend of the WorkerPool is used.
 
             Returns
             -------
@@ -393,21 +366,17 @@ class KinematicFeatures:
                     The dataframe containing the resultant Distance_from_(x, y) column.
         """
         # dataframe = dataframe.reset_index()
-        # splitting the dataframe according to trajectory ids
-        df_chunks = helpers._df_split_helper(dataframe)
-
-        # Here, create 2/3rds number of processes as there are in the system. Some CPUs are
-        # kept free at all times in order to not block up the system.
-        # (Note: The blocking of system is mostly prevalent in Windows and does not happen very often
-        # in Linux. However, out of caution some CPUs are kept free regardless of the system.)
-        pool = multiprocessing.Pool(NUM_CPU)
-        answer = pool.starmap(helpers.distance_from_given_point_helper, zip(df_chunks, itertools.repeat(coordinates)))
-        pool.close()
-        pool.join()
-
-        # Now lets join all the smaller partitions and then add the Distance to the
-        # specific point column.
-        answer = pd.concat(answer)
+        # splitting the dataframe into chunks of balanced sizes. Each distance is calculated
+        # on its own, hence the long trajectories can be split across the chunks as well.
+        df_chunks = helpers._df_split_helper(dataframe, split_long=True)
+
+        # Run the helper function in parallel on the shared pool of workers.
+        answer = WorkerPool.starmap(helpers.distance_from_given_point_helper,
+                                    zip(df_chunks, itertools.repeat(coordinates)), backend=backend)
+
+        # Now lets join all the smaller partitions back in the original order of the
+        # points and then add the Distance to the specific point column.
+        answer = pd.concat(answer).sort_index()
 
         # return the answer dataframe converted to PTRAILDataFrame.
         return PTRAILDataFrame(answer.reset_index(), const.LAT, const.LONG, const.DateTime, const.TRAJECTORY_ID)
@@ -454,11 +423,7 @@ class KinematicFeatures:
             # Assign the new column and return the NumPandasTrajDF.
             dataframe['Speed'] = (distances / time_deltas.dropna()).to_numpy()
             dataframe = dataframe.replace([np.inf, -np.inf], np.nan)
-            return PTRAILDataFrame(data_set=dataframe.reset_index(),
-                                   datetime='DateTime',
-                                   traj_id='traj_id',
-                                   latitude='lat',
-                                   longitude='lon')
+            return PTRAILDataFrame._from_validated(dataframe)
         except KeyError:
             # If the Distance_prev_to_curr column is not present in the Dataframe and a KeyError
             # is thrown, then catch it and the overridden behaviour is as follows:
@@ -474,11 +439,7 @@ class KinematicFeatures:
             # Assign the column and return the NumPandasTrajDF.
             dataframe['Speed'] = (distances / time_deltas).to_numpy(dtype=np.float64)
             dataframe = dataframe.replace([np.inf, -np.inf], np.nan)
-            return PTRAILDataFrame(data_set=dataframe.reset_index(),
-                                   datetime='DateTime',
-                                   traj_id='traj_id',
-                                   latitude='lat',
-                                   longitude='lon')
+            return PTRAILDataFrame._from_validated(dataframe)
 
     @staticmethod
     def create_acceleration_column(dataframe: PTRAILDataFrame):
@@ -513,11 +474,7 @@ class KinematicFeatures:
 
             dataframe['Acceleration'] = (speed_deltas / time_deltas).to_numpy()
             dataframe = dataframe.replace([np.inf, -np.inf], np.nan)
-            return PTRAILDataFrame(data_set=dataframe.reset_index(),
-                                   datetime='DateTime',
-                                   traj_id='traj_id',
-                                   latitude='lat',
-                                   longitude='lon')
+            return PTRAILDataFrame._from_validated(dataframe)
 
         except KeyError:
             # When Speed column is not present then first call create_speed_from_prev_column() function to make
@@ -530,11 +487,7 @@ class KinematicFeatures:
 
             dataframe['Acceleration'] = (speed_deltas / time_deltas).to_numpy()
             dataframe = dataframe.replace([np.inf, -np.inf], np.nan)
-            return PTRAILDataFrame(data_set=dataframe.reset_index(),
-                                   datetime='DateTime',
-                                   traj_id='traj_id',
-                                   latitude='lat',
-                                   longitude='lon')
+            return PTRAILDataFrame._from_validated(dataframe)
 
     @staticmethod
     def create_jerk_column(dataframe: PTRAILDataFrame):
@@ -569,11 +522,7 @@ class KinematicFeatures:
 
             dataframe['Jerk'] = (acceleration_deltas / time_deltas).to_numpy()
             dataframe = dataframe.replace([np.inf, -np.inf], np.nan)
-            return PTRAILDataFrame(data_set=dataframe.reset_index(),
-                                   datetime='DateTime',
-                                   traj_id='traj_id',
-                                   latitude='lat',
-                                   longitude='lon')
+            return PTRAILDataFrame._from_validated(dataframe)
 
         except KeyError:
             # When Speed column is not present then first call create_speed_from_prev_column() function to make
@@ -586,14 +535,10 @@ class KinematicFeatures:
 
             dataframe['Jerk'] = (acceleration_deltas / time_deltas).to_numpy()
             dataframe = dataframe.replace([np.inf, -np.inf], np.nan)
-            return PTRAILDataFrame(data_set=dataframe.reset_index(),
-                                   datetime='DateTime',
-                                   traj_id='traj_id',
-                                   latitude='lat',
-                                   longitude='lon')
+            return PTRAILDataFrame._from_validated(dataframe)
 
     @staticmethod
-    def create_bearing_column(dataframe: PTRAILDataFrame):
+    def create_bearing_column(dataframe: PTRAILDataFrame, backend: Optional[Text] = None):
         """
             Create a column containing bearing between 2 consecutive points. Bearing is also
             referred as "Forward Azimuth" sometimes. Bearing/Forward Azimuth is defined as
@@ -611,38 +556,27 @@ class KinematicFeatures:
             ----------
                 dataframe: PTRAILDataFrame
                     The dataframe on which the bearing is to be calculated.
+                backend: Optional[Text]
+                    The backend on which the work is run, one of serial, threads or
+                    processes. If None, then the default backend of the WorkerPool is used.
 
             Returns
             -------
                 PTRAILDataFrame:
                         The dataframe containing the resultant Bearing_from_prev column.
         """
-        # if cpu_count <= 1:
-        #     cpu_count = 1
-        # elif cpu_count >= NUM_CPU:
-        #     cpu_count = NUM_CPU - 1
-        # else:
-        #     cpu_count = cpu_count
-
         # Case-1: The number of unique Trajectory IDs is less than x.
         if dataframe.reset_index().traj_id.nunique() < const.MIN_IDS:
             result = helpers.bearing_helper(dataframe)
-            return PTRAILDataFrame(result, const.LAT, const.LONG,
-                                   const.DateTime, const.TRAJECTORY_ID)
+            return PTRAILDataFrame._from_validated(result)
 
         # Case-2: The number unique Trajectory IDs is significant.
         else:
             # splitting the dataframe according to trajectory ids.
             df_chunks = helpers._df_split_helper(dataframe)
 
-            # Here, create 2/3rds number of processes as there are in the system. Some CPUs are
-            # kept free at all times in order to not block up the system.
-            # (Note: The blocking of system is mostly prevalent in Windows and does not happen very often
-            # in Linux. However, out of caution some CPUs are kept free regardless of the system.)
-            multi_pool = multiprocessing.Pool(NUM_CPU)
-            result = multi_pool.map(helpers.bearing_helper, df_chunks)
-            multi_pool.close()
-            multi_pool.join()
+            # Run the helper function in parallel on the shared pool of workers.
+            result = WorkerPool.map(helpers.bearing_helper, df_chunks, backend=backend)
 
             # merge the smaller pieces and then return the dataframe converted to PTRAILDataFrame.
             dataframe = pd.concat(result).drop(columns=['index'])
@@ -683,11 +617,7 @@ class KinematicFeatures:
 
             dataframe['Bearing_Rate'] = (bearing_deltas / time_deltas).to_numpy()
             dataframe = dataframe.replace([np.inf, -np.inf], np.nan)
-            return PTRAILDataFrame(data_set=dataframe.reset_index(),
-                                   datetime='DateTime',
-                                   traj_id='traj_id',
-                                   latitude='lat',
-                                   longitude='lon')
+            return PTRAILDataFrame._from_validated(dataframe)
         except KeyError:
             # Similar to the step above but just makes the Bearing column first
             # WARNING!!!! Use dt.total_seconds() as dt.seconds gives false values and as it
@@ -698,11 +628,7 @@ class KinematicFeatures:
 
             dataframe['Bearing_Rate'] = (bearing_deltas / time_deltas).to_numpy()
             dataframe = dataframe.replace([np.inf, -np.inf], np.nan)
-            return PTRAILDataFrame(data_set=dataframe.reset_index(),
-                                   datetime='DateTime',
-                                   traj_id='traj_id',
-                                   latitude='lat',
-                                   longitude='lon')
+            return PTRAILDataFrame._from_validated(dataframe)
 
     @staticmethod
     def create_rate_of_br_column(dataframe: PTRAILDataFrame):
@@ -738,26 +664,18 @@ class KinematicFeatures:
 
             dataframe['Rate_of_bearing_rate'] = (bearing_rate_deltas / time_deltas).to_numpy()
             dataframe = dataframe.replace([np.inf, -np.inf], np.nan)
-            return PTRAILDataFrame(data_set=dataframe.reset_index(),
-                                   datetime='DateTime',
-                                   traj_id='traj_id',
-                                   latitude='lat',
-                                   longitude='lon')
+            return PTRAILDataFrame._from_validated(dataframe)
         except KeyError:
             # Similar to the step above but just makes the Bearing column first
             # WARNING!!!! Use dt.total_seconds() as dt.seconds gives false values and as it
             #             does not account for time difference when it is negative.
             dataframe = KinematicFeatures.create_bearing_rate_column(dataframe)
-            bearing_rate_deltas = dataframe.reset_index()['Bearing'].diff()
+            bearing_rate_deltas = dataframe.reset_index()['Bearing_Rate'].diff()
             time_deltas = dataframe.reset_index()[const.DateTime].diff().dt.total_seconds()
 
             dataframe['Rate_of_bearing_rate'] = (bearing_rate_deltas / time_deltas).to_numpy()
             dataframe = dataframe.replace([np.inf, -np.inf], np.nan)
-            return PTRAILDataFrame(data_set=dataframe.reset_index(),
-                                   datetime='DateTime',
-                                   traj_id='traj_id',
-                                   latitude='lat',
-                                   longitude='lon')
+            return PTRAILDataFrame._from_validated(dataframe)
 
     @staticmethod
     def get_distance_travelled_by_traj_id(dataframe: PTRAILDataFrame, traj_id: Text):
@@ -802,7 +720,7 @@ class KinematicFeatures:
                                          f"Please check the Trajectory ID and try again.")
 
     @staticmethod
-    def get_number_of_locations(dataframe: PTRAILDataFrame, traj_id: Text = None):
+    def get_number_of_locations(dataframe: PTRAILDataFrame, traj_id: Text = None, backend: Optional[Text] = None):
         """
             Get the number of unique coordinates in the dataframe specific to a trajectory ID.
 
@@ -817,6 +735,9 @@ class KinematicFeatures:
                     The dataframe of which the number of locations are to be computed
                 traj_id: Text
                     The trajectory id for which the number of unique locations are to be found
+                backend: Optional[Text]
+                    The backend on which the work is run, one of serial, threads or
+                    processes. If None, then the default backend of the WorkerPool is used.
 
             Returns
             -------
@@ -825,27 +746,20 @@ class KinematicFeatures:
                 pandas.core.dataframe.DataFrame:
                     The dataframe containing start locations of all trajectory IDs.
         """
-        dataframe = dataframe.reset_index()
         if traj_id is None:
-            ids_ = dataframe[const.TRAJECTORY_ID].value_counts(ascending=True).keys().to_list()
-            # Get the ideal number of IDs by which the dataframe is to be split.
-            split_factor = helpers._get_partition_size(len(ids_))
-            ids_ = [ids_[i: i + split_factor] for i in range(0, len(ids_), split_factor)]
-
-            # Here, create 2/3rds number of processes as there are in the system. Some CPUs are
-            # kept free at all times in order to not block up the system.
-            # (Note: The blocking of system is mostly prevalent in Windows and does not happen very often
-            # in Linux. However, out of caution some CPUs are kept free regardless of the system.)
-            mp_pool = multiprocessing.Pool(NUM_CPU)
-            results = mp_pool.starmap(helpers.number_of_location_helper, zip(itertools.repeat(dataframe), ids_))
-            mp_pool.close()
-            mp_pool.join()
-
-            # Concatenate all the smaller dataframes and return the answer.
-            results = pd.concat(results)
+            # Place the columns in shared memory and run the helper function in parallel on the shared
+            # pool of worker processes, where each worker only receives the ranges of rows.
+            with SharedColumns(dataframe) as columns:
+                # Split the rows into partitions of balanced numbers of points.
+                args = [(columns.handle, ranges) for ranges in columns.partitions()]
+                results = pd.concat(WorkerPool.starmap(helpers.number_of_location_helper, args, backend=backend))
+                results = results.sort_index()
+                results.index = columns.to_traj_ids(results.index)
+
             return results
 
         else:
+            dataframe = dataframe.reset_index()
             filtered_df = dataframe.loc[dataframe[const.TRAJECTORY_ID] == traj_id]
             return filtered_df.groupby([const.LAT, const.LONG]).ngroups
 
@@ -854,6 +768,13 @@ class KinematicFeatures:
         """
             Generate all the Kinematic features with a single call of this function.
 
+            Note
+            ----
+                All the features (Distance, Distance_from_start, Speed, Acceleration, Jerk,
+                Bearing, Bearing_Rate and Rate_of_bearing_rate) are calculated together in a
+                single pass over the coordinate and time arrays of the dataframe and are then
+                attached to the dataframe at once.
+
             Parameters
             ----------
                 dataframe: PTRAILDataFrame
@@ -864,11 +785,17 @@ class KinematicFeatures:
                 PTRAILDataFrame:
                     The dataframe enriched with Kinematic Features.
         """
-        to_return = KinematicFeatures.create_distance_column(dataframe)
-        to_return = KinematicFeatures.create_distance_from_start_column(to_return)
-        to_return = KinematicFeatures.create_jerk_column(to_return)
-        to_return = KinematicFeatures.create_rate_of_br_column(to_return)
+        dataframe = dataframe.reset_index()
+        features = helpers._kinematic_features_kernel(dataframe[const.TRAJECTORY_ID].to_numpy(),
+                                                      dataframe[const.LAT].to_numpy(dtype=np.float64),
+                                                      dataframe[const.LONG].to_numpy(dtype=np.float64),
+                                                      dataframe[const.DateTime].to_numpy())
+
+        # Attach all the features to the dataframe at once. Previously calculated
+        # features (if any) are replaced by the new ones.
+        dataframe = dataframe.drop(columns=[col for col in features if col in dataframe.columns])
+        dataframe = pd.concat([dataframe, pd.DataFrame(features, index=dataframe.index)], axis=1)
 
-        return to_return
+        return PTRAILDataFrame._from_validated(dataframe)
 
 
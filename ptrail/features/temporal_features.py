@@ -15,16 +15,14 @@
         Arina De Jesus Amador Monteiro Sanches. “Uma Arquitetura E Imple-menta ̧c ̃ao Do M ́odulo De
         Pr ́e-processamento Para Biblioteca Pymove”.Bachelor’s thesis. Universidade Federal Do Cear ́a, 2019
 """
-import itertools
-import multiprocessing
 from typing import Optional, Text
 
 import numpy as np
 import pandas as pd
 
 from ptrail.core.TrajectoryDF import PTRAILDataFrame
-from ptrail.features.helper_functions import Helpers as helpers
 from ptrail.utilities import constants as const
+from ptrail.utilities.exceptions import *
 
 
 class TemporalFeatures:
@@ -51,8 +49,7 @@ class TemporalFeatures:
         df['Date'] = df[const.DateTime].dt.date
 
         # Return the dataframe by converting it to PTRAILDataFrame
-        return PTRAILDataFrame(df.reset_index(drop=True),
-                               const.LAT, const.LONG, const.DateTime, const.TRAJECTORY_ID)
+        return PTRAILDataFrame._from_validated(df)
 
     @staticmethod
     def create_time_column(dataframe: PTRAILDataFrame):
@@ -77,7 +74,7 @@ class TemporalFeatures:
         dataframe['Time'] = dataframe[const.DateTime].dt.time
 
         # Return the dataframe by converting it into PTRAILDataFrame type
-        return PTRAILDataFrame(dataframe, const.LAT, const.LONG, const.DateTime, const.TRAJECTORY_ID)
+        return PTRAILDataFrame._from_validated(dataframe)
 
     @staticmethod
     def create_day_of_week_column(dataframe: PTRAILDataFrame):
@@ -102,7 +99,7 @@ class TemporalFeatures:
         dataframe['Day_Of_Week'] = dataframe[const.DateTime].dt.day_name()
 
         # Return the dataframe by converting it into PTRAILDataFrame type
-        return PTRAILDataFrame(dataframe, const.LAT, const.LONG, const.DateTime, const.TRAJECTORY_ID)
+        return PTRAILDataFrame._from_validated(dataframe)
 
     @staticmethod
     def create_weekend_indicator_column(dataframe: PTRAILDataFrame):
@@ -156,7 +153,7 @@ class TemporalFeatures:
             dataframe.at[index_fd, 'Weekend'] = True
             # Return the dataframe by converting it into PTRAILDataFrame
 
-        return PTRAILDataFrame(dataframe, const.LAT, const.LONG, const.DateTime, const.TRAJECTORY_ID)
+        return PTRAILDataFrame._from_validated(dataframe)
 
     @staticmethod
     def create_time_of_day_column(dataframe: PTRAILDataFrame):
@@ -196,7 +193,7 @@ class TemporalFeatures:
         ]
         # Map the conditions to the different periods of  the day
         dataframe['Time_Of_Day'] = np.select(conditions, const.TIME_OF_DAY)
-        return PTRAILDataFrame(dataframe, const.LAT, const.LONG, const.DateTime, const.TRAJECTORY_ID)
+        return PTRAILDataFrame._from_validated(dataframe)
 
     @staticmethod
     def get_traj_duration(dataframe: PTRAILDataFrame, traj_id: Optional[Text] = None):
@@ -222,21 +219,13 @@ class TemporalFeatures:
                 pandas.core.dataframe.DataFrame:
                     The dataframe containing the duration of all trajectories in the dataset.
         """
-        dataframe = dataframe.reset_index()
         if traj_id is None:
-            ids_ = dataframe[const.TRAJECTORY_ID].value_counts(ascending=True).keys().to_list()
-
-            split_factor = helpers._get_partition_size(len(ids_))
-            ids_ = [ids_[i: i + split_factor] for i in range(0, len(ids_), split_factor)]
-
-            mp_pool = multiprocessing.Pool(len(ids_))
-            results = mp_pool.starmap(helpers.traj_duration_helper, zip(itertools.repeat(dataframe), ids_))
-            mp_pool.close()
-            mp_pool.join()
-
-            results = pd.concat(results).sort_values(const.TRAJECTORY_ID)
-            return results
+            # Calculate the time bounds of all the trajectories at once and return
+            # the durations only.
+            bounds = TemporalFeatures.get_traj_time_bounds(dataframe)
+            return bounds[['Traj_Duration']]
         else:
+            dataframe = dataframe.reset_index()
             small = dataframe.loc[dataframe[const.TRAJECTORY_ID] == traj_id, [const.DateTime]]
             if len(small) == 0:
                 return f"No {traj_id} exists in the given data. Please try again."
@@ -270,30 +259,13 @@ class TemporalFeatures:
                     present in the data when the user hasn't asked for a particular
                     trajectory's start time.
         """
-        dataframe = dataframe.reset_index()
         if traj_id is None:
-            # First, create a list containing all the ids of the data and then further divide that
-            # list items and split it into sub-lists of 100 ids each if there are more than 100 ids.
-            ids_ = dataframe[const.TRAJECTORY_ID].value_counts(ascending=True).keys().to_list()
-
-            # Get the ideal number of IDs by which the dataframe is to be split.
-            split_factor = helpers._get_partition_size(len(ids_))
-            ids_ = [ids_[i: i + split_factor] for i in range(0, len(ids_), split_factor)]
-
-            # Now, create a multiprocessing pool and then run processes in parallel
-            # which calculate the start times for a smaller set of IDs only.
-            mp_pool = multiprocessing.Pool(len(ids_))
-            results = mp_pool.starmap(helpers.start_time_helper, zip(itertools.repeat(dataframe), ids_))
-            mp_pool.close()
-            mp_pool.join()
-
-            # Concatenate all the smaller dataframes and return the answer.
-            results = pd.concat(results).sort_values(const.TRAJECTORY_ID)
-            return results
+            # Calculate the time bounds of all the trajectories at once and return
+            # the start times only.
+            bounds = TemporalFeatures.get_traj_time_bounds(dataframe)
+            return bounds[['Start_Time']].rename(columns={'Start_Time': const.DateTime})
         else:
-            filt = dataframe.loc[dataframe[const.TRAJECTORY_ID] == traj_id]
-            filt_two = filt.loc[filt[const.DateTime] == filt[const.DateTime].min()]
-            return filt_two[const.DateTime].iloc[0]
+            return TemporalFeatures.get_traj_time_bounds(dataframe, traj_id)[0]
 
     @staticmethod
     def get_end_time(dataframe: PTRAILDataFrame, traj_id: Optional[Text] = None):
@@ -322,30 +294,69 @@ class TemporalFeatures:
                     present in the data when the user hasn't asked for a particular
                     trajectory's end time.
         """
-        dataframe = dataframe.reset_index()
         if traj_id is None:
-            # First, create a list containing all the ids of the data and then further divide that
-            # list items and split it into sub-lists of 100 ids each if there are more than 100 ids.
-            ids_ = dataframe[const.TRAJECTORY_ID].value_counts(ascending=True).keys().to_list()
-
-            # Get the ideal number of IDs by which the dataframe is to be split.
-            split_factor = helpers._get_partition_size(len(ids_))
-            ids_ = [ids_[i: i + split_factor] for i in range(0, len(ids_), split_factor)]
-
-            # Now, create a multiprocessing pool and then run processes in parallel
-            # which calculate the end times for a smaller set of IDs only.
-            mp_pool = multiprocessing.Pool(len(ids_))
-            results = mp_pool.starmap(helpers.end_time_helper, zip(itertools.repeat(dataframe), ids_))
-            mp_pool.close()
-            mp_pool.join()
-
-            # Concatenate all the smaller dataframes and return the answer.
-            results = pd.concat(results).sort_values(const.TRAJECTORY_ID)
-            return results
+            # Calculate the time bounds of all the trajectories at once and return
+            # the end times only.
+            bounds = TemporalFeatures.get_traj_time_bounds(dataframe)
+            return bounds[['End_Time']].rename(columns={'End_Time': const.DateTime})
+        else:
+            return TemporalFeatures.get_traj_time_bounds(dataframe, traj_id)[1]
+
+    @staticmethod
+    def get_traj_time_bounds(dataframe: PTRAILDataFrame, traj_id: Optional[Text] = None):
+        """
+            Get the start time, end time and the duration of the trajectories
+            with a single pass over the data.
+
+            Note
+            ----
+                If the trajectory ID is not specified by the user, then by default,
+                the time bounds of all the trajectory IDs in the data are returned.
+
+            Parameters
+            ----------
+                dataframe: PTRAILDataFrame
+                    The dataframe on which the operations are to be performed.
+                traj_id: Optional[Text]
+                    The trajectory for which the time bounds are required.
+
+            Returns
+            -------
+                tuple:
+                    The start time, end time and the duration of a single trajectory.
+                pandas.core.dataframe.DataFrame
+                    Pandas dataframe indexed by the trajectory ID containing the Start_Time,
+                    End_Time and Traj_Duration of all the trajectories present in the data
+                    when the user hasn't asked for a particular trajectory's time bounds.
+
+            Raises
+            ------
+                MissingTrajIDException:
+                    The trajectory ID given by the user is not present in the data.
+        """
+        # Get the trajectory IDs and timestamps of the points, either from the
+        # index or from the columns of the dataframe.
+        if const.TRAJECTORY_ID in dataframe.index.names:
+            traj_ids = dataframe.index.get_level_values(const.TRAJECTORY_ID)
+            times = dataframe.index.get_level_values(const.DateTime)
         else:
-            filt = dataframe.loc[dataframe[const.TRAJECTORY_ID] == traj_id]
-            filt_two = filt.loc[filt[const.DateTime] == filt[const.DateTime].max()]
-            return filt_two[const.DateTime].iloc[0]
+            traj_ids = dataframe[const.TRAJECTORY_ID]
+            times = dataframe[const.DateTime]
+
+        # Now, reduce the timestamps of each trajectory to their min and max values
+        # with a single sorted groupby and calculate the durations from them.
+        times = pd.Series(np.asarray(times), index=pd.Index(np.asarray(traj_ids), name=const.TRAJECTORY_ID))
+        bounds = times.groupby(level=const.TRAJECTORY_ID, sort=True).agg(['min', 'max'])
+        bounds.columns = ['Start_Time', 'End_Time']
+        bounds['Traj_Duration'] = bounds['End_Time'] - bounds['Start_Time']
+
+        if traj_id is None:
+            return bounds
+
+        if traj_id not in bounds.index:
+            raise MissingTrajIDException(f"The Trajectory ID '{traj_id}' is not present in the data.")
+        row = bounds.loc[traj_id]
+        return row['Start_Time'], row['End_Time'], row['Traj_Duration']
 
     @staticmethod
     def generate_temporal_features(dataframe: PTRAILDataFrame):
@@ -1,12 +1,16 @@
+import pickle
 import unittest
 from json import JSONDecodeError
 
 import numpy as np
 import pandas as pd
+import shapely
 from shapely.geometry import Polygon
 
 from ptrail.core.TrajectoryDF import PTRAILDataFrame
 from ptrail.features.contextual_features import ContextualFeatures
+from ptrail.features.geo_layer_index import GeoLayerIndex
+from ptrail.utilities.DistanceCalculator import FormulaLog
 
 
 class SemanticTests(unittest.TestCase):
@@ -45,6 +49,62 @@ class SemanticTests(unittest.TestCase):
                                                                    visited_location_name='FAKE_NAME',
                                                                    location_column_name='CowPast')
 
+    def test_visited_location_tolerance(self):
+        # Several locations are tagged in one pass with the same result as separate calls.
+        habitat = GeoLayerIndex(self.starkey_habitat)
+        visited = ContextualFeatures.visited_location(df=self.starkey_traj,
+                                                      geo_layers=habitat,
+                                                      visited_location_name=['BEAR', 'HORSE'],
+                                                      location_column_name='CowPast',
+                                                      tolerance=500)
+        for name in ['BEAR', 'HORSE']:
+            single = ContextualFeatures.visited_location(df=self.starkey_traj,
+                                                         geo_layers=self.starkey_habitat,
+                                                         visited_location_name=name,
+                                                         location_column_name='CowPast',
+                                                         tolerance=500)
+            self.assertListEqual(list(visited[f'Visited_{name}']), list(single[f'Visited_{name}']))
+
+        # A point is matched only if it lies within the tolerance of a point of the location.
+        lat, lon = self.mini_pasture['lat'].iloc[0], self.mini_pasture['lon'].iloc[0]
+        points = self.starkey_traj.reset_index()
+        distances = [FormulaLog.haversine_distance(lat, lon, p_lat, p_lon)
+                     for p_lat, p_lon in zip(points['lat'], points['lon'])]
+        single_point = self.mini_pasture.iloc[:1]
+        for tolerance in [0, 100, 1000]:
+            near = ContextualFeatures.visited_location(df=self.starkey_traj,
+                                                       geo_layers=single_point,
+                                                       visited_location_name='BEAR',
+                                                       location_column_name='CowPast',
+                                                       tolerance=tolerance)
+            self.assertListEqual(list(near['Visited_BEAR']),
+                                 [int(distance <= tolerance) for distance in distances])
+
+    def test_geo_layer_index(self):
+        habitat = GeoLayerIndex(self.starkey_habitat)
+        habitat = pickle.loads(pickle.dumps(habitat))
+
+        # The index gives the same results as the raw dataframe and is reused across the calls.
+        from_frame = ContextualFeatures.visited_location(df=self.starkey_traj,
+                                                         geo_layers=self.starkey_habitat,
+                                                         visited_location_name='BEAR',
+                                                         location_column_name='CowPast')
+        from_index = ContextualFeatures.visited_location(df=self.starkey_traj,
+                                                         geo_layers=habitat,
+                                                         visited_location_name='BEAR',
+                                                         location_column_name='CowPast')
+        self.assertTrue(pd.DataFrame(from_frame).equals(pd.DataFrame(from_index)))
+        self.assertIs(habitat.tree('CowPast', 'BEAR'), habitat.tree('CowPast', 'BEAR'))
+
+        bbox = habitat.bounds('CowPast', 'BEAR')
+        self.assertEqual(bbox, (self.mini_pasture['lat'].min(), self.mini_pasture['lon'].min(),
+                                self.mini_pasture['lat'].max(), self.mini_pasture['lon'].max()))
+        self.assertEqual(len(habitat.select('CowPast', 'BEAR')), len(self.mini_pasture))
+
+        # A point of the habitat intersects it while a point far away does not.
+        self.assertListEqual(list(habitat.intersects([self.mini_pasture['lat'].iloc[0], 0],
+                                                     [self.mini_pasture['lon'].iloc[0], 0])), [True, False])
+
     def test_visited_poi_positive(self):
         water_visited = ContextualFeatures.visited_poi(df=self.single_traj,
                                                        surrounding_data=self.mini_pasture,
@@ -60,6 +120,30 @@ class SemanticTests(unittest.TestCase):
                                                            dist_column_label='Fake_Name',
                                                            nearby_threshold=10)
 
+    def test_visited_poi_index(self):
+        # Each point is near a POI if its distance from any location of the surroundings is
+        # within the threshold of the distance of that location to its POI.
+        surroundings = self.single_traj.reset_index().iloc[::5]
+        surroundings = pd.DataFrame({'lat': surroundings['lat'], 'lon': surroundings['lon'],
+                                     'DistEWat': np.linspace(0, 500, len(surroundings))})
+        expected = [np.any(np.abs(surroundings['DistEWat'].to_numpy()
+                                  - FormulaLog.haversine_distance(np.full(len(surroundings), lat),
+                                                                  np.full(len(surroundings), lon),
+                                                                  surroundings['lat'].to_numpy(),
+                                                                  surroundings['lon'].to_numpy())) <= 50)
+                    for lat, lon in zip(self.single_traj['lat'], self.single_traj['lon'])]
+
+        for backend in ['serial', 'threads']:
+            water_visited = ContextualFeatures.visited_poi(df=self.single_traj,
+                                                           surrounding_data=surroundings,
+                                                           dist_column_label='DistEWat',
+                                                           nearby_threshold=50,
+                                                           backend=backend)
+            # The points keep their order with the traj_id and DateTime as columns.
+            self.assertIsInstance(water_visited.index, pd.RangeIndex)
+            self.assertTrue(water_visited[['traj_id', 'DateTime']].equals(
+                self.single_traj.reset_index()[['traj_id', 'DateTime']]))
+            self.assertListEqual(list(water_visited['Nearby_POI']), expected)
 
     def test_trajectories_inside_polygon(self):
         traj_inside_poly = ContextualFeatures.trajectories_inside_polygon(df=self.starkey_traj,
@@ -68,6 +152,26 @@ class SemanticTests(unittest.TestCase):
         self.assertListEqual(list(traj_inside_poly.reset_index().columns),
                              list(self.starkey_traj.reset_index().columns))
 
+    def test_trajectories_inside_polygon_zones(self):
+        mask = ContextualFeatures.trajectories_inside_polygon(df=self.starkey_traj,
+                                                              polygon=self.poly,
+                                                              return_mask=True)
+        inside = ContextualFeatures.trajectories_inside_polygon(df=self.starkey_traj, polygon=self.poly)
+        self.assertIsInstance(mask, pd.Series)
+        self.assertEqual(mask.sum(), len(inside))
+        self.assertTrue(pd.DataFrame(inside).equals(pd.DataFrame(self.starkey_traj[mask])))
+
+        # Each point is labelled with the first zone that it lies in.
+        box = Polygon.from_bounds(*self.poly.bounds)
+        zones = ContextualFeatures.trajectories_inside_polygon(df=self.starkey_traj,
+                                                               polygon={'pasture': self.poly, 'box': box})
+        self.assertEqual((zones['Zone'] == 'pasture').sum(), len(inside))
+        in_box = ContextualFeatures.trajectories_inside_polygon(df=self.starkey_traj, polygon=box)
+        self.assertEqual(len(zones), len(in_box))
+
+        # The polygons given by the caller are not prepared in place.
+        self.assertFalse(shapely.is_prepared(box))
+
     def test_traj_intersect_inside_polygon(self):
         t1 = self.starkey_traj.reset_index().loc[self.starkey_traj.reset_index()['traj_id'] == '910313E37']
         t1 = PTRAILDataFrame(t1,
@@ -87,6 +191,29 @@ class SemanticTests(unittest.TestCase):
         self.assertGreaterEqual(len(intersect), 1)
         self.assertEqual(len(intersect.columns), 6)
 
+    def test_detect_encounters(self):
+        # Objects a and b move together for 5 minutes before b moves away while c stays far away.
+        times = pd.date_range('2020-01-01', periods=10, freq='min')
+        lon = np.linspace(-118, -117.99, 10)
+        b_lat = np.where(np.arange(10) < 5, 45.0001, 45.1)
+        df = PTRAILDataFrame(pd.DataFrame({'lat': np.concatenate([np.full(10, 45.0), b_lat, np.full(10, 46.0)]),
+                                           'lon': np.tile(lon, 3),
+                                           'DateTime': np.tile(times, 3),
+                                           'traj_id': np.repeat(['a', 'b', 'c'], 10)}),
+                             'lat', 'lon', 'DateTime', 'traj_id')
+
+        for backend in ['serial', 'threads']:
+            encounters = ContextualFeatures.detect_encounters(df, distance=50, time_window=60, backend=backend)
+            self.assertEqual(len(encounters), 1)
+            self.assertListEqual(list(encounters[['traj_id_1', 'traj_id_2']].iloc[0]), ['a', 'b'])
+            self.assertEqual(encounters['Start'].iloc[0], times[0])
+            self.assertEqual(encounters['End'].iloc[0], times[4])
+            self.assertAlmostEqual(encounters['Min_Distance'].iloc[0],
+                                   FormulaLog.haversine_distance(45.0, -118, 45.0001, -118))
+
+        with self.assertRaises(ValueError):
+            ContextualFeatures.detect_encounters(df, distance=0, time_window=30)
+
     def test_nearest_poi_positive(self):
         poi = ContextualFeatures.nearest_poi(coords=(47.5759762, -52.7031302),
                                              tags={'amenity': ['bank', 'atm']},
@@ -5,7 +5,9 @@ import pandas as pd
 from ptrail.core.TrajectoryDF import PTRAILDataFrame
 from ptrail.features.kinematic_features import KinematicFeatures
 import ptrail.utilities.constants as const
+from ptrail.utilities.DistanceCalculator import FormulaLog as calc
 from ptrail.utilities.exceptions import MissingTrajIDException
+from ptrail.utilities.executor import WorkerPool
 
 
 class KinematicFeaturesTest(unittest.TestCase):
@@ -47,6 +49,17 @@ class KinematicFeaturesTest(unittest.TestCase):
             self.assertIsInstance(new_df[1], float)
             self.assertIsNotNone(new_df)
 
+    def test_start_end_location_all_ids(self):
+        start = KinematicFeatures.get_start_location(self._test_df)
+        end = KinematicFeatures.get_end_location(self._test_df)
+        grouped = self._test_df.reset_index().groupby(const.TRAJECTORY_ID)
+
+        # The locations of all the IDs must match the first and last points of each trajectory.
+        np.testing.assert_allclose(start[[const.LAT, const.LONG]].to_numpy(),
+                                   grouped[[const.LAT, const.LONG]].first().loc[start.index].to_numpy())
+        np.testing.assert_allclose(end[[const.LAT, const.LONG]].to_numpy(),
+                                   grouped[[const.LAT, const.LONG]].last().loc[end.index].to_numpy())
+
     def test_dist_between_consecutive(self):
         new_df = KinematicFeatures.create_distance_column(self._test_df)
         self.assertIsNotNone(new_df['Distance'])
@@ -58,6 +71,16 @@ class KinematicFeaturesTest(unittest.TestCase):
                 self.assertIsInstance(filt_df['Distance'].iloc[1], float)
                 assert np.isnan(filt_df['Distance'].iloc[0])
 
+    def test_dist_between_consecutive_matches_haversine(self):
+        new_df = KinematicFeatures.create_distance_column(self._test_df).reset_index()
+
+        # Compare the vectorized distances with a point by point calculation.
+        for traj_id, filt_df in new_df.groupby(const.TRAJECTORY_ID):
+            lat, lon = filt_df[const.LAT].to_numpy(), filt_df[const.LONG].to_numpy()
+            for j in range(1, min(len(filt_df), 20)):
+                expected = calc.haversine_distance(lat[j - 1], lon[j - 1], lat[j], lon[j])
+                self.assertAlmostEqual(filt_df['Distance'].iloc[j], expected, places=6)
+
     def test_dist_from_start(self):
         new_df = KinematicFeatures.create_distance_from_start_column(self._test_df)
         self.assertIsNotNone(new_df['Distance_from_start'])
@@ -166,6 +189,18 @@ class KinematicFeaturesTest(unittest.TestCase):
                 assert np.isnan(filt_df['Rate_of_bearing_rate'].iloc[1])
                 self.assertIsInstance(filt_df['Rate_of_bearing_rate'].iloc[2], float)
 
+    def test_generate_kinematic_features(self):
+        fused = KinematicFeatures.generate_kinematic_features(self._test_df)
+        sequential = KinematicFeatures.create_distance_from_start_column(self._test_df)
+        sequential = KinematicFeatures.create_jerk_column(sequential)
+        sequential = KinematicFeatures.create_rate_of_br_column(sequential)
+
+        # The fused kernel must yield the same values as the individual functions.
+        for col in ['Distance', 'Distance_from_start', 'Speed', 'Acceleration',
+                    'Jerk', 'Bearing', 'Bearing_Rate', 'Rate_of_bearing_rate']:
+            np.testing.assert_allclose(fused[col].to_numpy(), sequential[col].to_numpy(),
+                                       rtol=1e-7, equal_nan=True)
+
     def test_distance_travelled_by_traj_id_positive(self):
         dist = KinematicFeatures.get_distance_travelled_by_traj_id(dataframe=self._test_df,
                                                                    traj_id='91732')
@@ -187,5 +222,34 @@ class KinematicFeaturesTest(unittest.TestCase):
             self.assertIsNotNone(new_df)
 
 
+    def test_number_of_locations_matches_traj_id(self):
+        new_df = KinematicFeatures.get_number_of_locations(self._test_df)
+        for traj_id in new_df.index[:5]:
+            self.assertEqual(new_df.loc[traj_id, 'Number of Unique Coordinates'],
+                             KinematicFeatures.get_number_of_locations(self._test_df, traj_id))
+
+    def test_backends(self):
+        expected = KinematicFeatures.get_number_of_locations(self._test_df)
+        dist = KinematicFeatures.create_distance_from_point_column(self._test_df, (61.5, 24.5))
+        for backend in ['serial', 'threads', 'processes']:
+            result = KinematicFeatures.get_number_of_locations(self._test_df, backend=backend)
+            self.assertTrue(expected.equals(result))
+            other = KinematicFeatures.create_distance_from_point_column(self._test_df, (61.5, 24.5), backend=backend)
+            assert np.all(dist.reset_index().values == other.reset_index().values)
+
+    def test_results_independent_of_partitions(self):
+        # The results do not depend on how many partitions the data is split into.
+        WorkerPool.set_num_workers(3)
+        try:
+            start = KinematicFeatures.get_start_location(self._test_df)
+            dist = KinematicFeatures.create_distance_from_point_column(self._test_df, (61.5, 24.5))
+        finally:
+            WorkerPool.set_num_workers(None)
+        assert np.all(start.values == KinematicFeatures.get_start_location(self._test_df).values)
+        self.assertListEqual(list(start.index), sorted(start.index))
+        assert np.all(dist.reset_index().values ==
+                      KinematicFeatures.create_distance_from_point_column(self._test_df, (61.5, 24.5)).reset_index().values)
+
+
 if __name__ == '__main__':
     unittest.main()
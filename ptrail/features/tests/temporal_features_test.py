@@ -79,5 +79,16 @@ class TemporalFeaturesTest(unittest.TestCase):
             self.assertIsNotNone(new_df)
 
 
+    def test_traj_time_bounds(self):
+        bounds = TemporalFeatures.get_traj_time_bounds(self._test_df)
+        self.assertListEqual(list(bounds.columns), ['Start_Time', 'End_Time', 'Traj_Duration'])
+        self.assertTrue((bounds['Start_Time'] == TemporalFeatures.get_start_time(self._test_df)['DateTime']).all())
+        self.assertTrue((bounds['End_Time'] == TemporalFeatures.get_end_time(self._test_df)['DateTime']).all())
+
+        traj_id = bounds.index[0]
+        start, end, duration = TemporalFeatures.get_traj_time_bounds(self._test_df, traj_id)
+        self.assertEqual(duration, end - start)
+        self.assertEqual(start, TemporalFeatures.get_start_time(self._test_df, traj_id))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,399 @@
+"""
+    The filter_plan module contains the FilterPlan, which is a lazy version of
+    the filters in the filters module. Instead of creating a new dataframe for
+    each filter, the plan collects the filters, derives the kinematic features
+    needed by them only once, combines all of them into a single boolean mask
+    and creates the filtered dataframe only once when it is executed. For
+    example, a cleaning pipeline can be written as follows:
+
+    ``FilterPlan(df).by_bounding_box(bbox).by_max_speed(50).by_min_points(10).execute()``
+
+    Note
+    ----
+        All the filters of a plan are evaluated on the original dataframe, i.e. the
+        quantiles of the outlier filters, the number of points of the trajectories and
+        the kinematic features are computed before any point is removed. This is the same
+        as chaining the functions of the filters module on a dataframe which already has
+        the Distance and Speed columns.
+
+    | Authors: Yaksh J Haranwala, Salman Haidri
+"""
+from typing import Callable, Optional, Text
+
+import numpy as np
+import pandas as pd
+
+import ptrail.utilities.constants as const
+from ptrail.core.TrajectoryDF import PTRAILDataFrame
+from ptrail.features.kinematic_features import KinematicFeatures as kinematic
+from ptrail.preprocessing.filters import Filters
+
+
+class FilterPlan:
+    def __init__(self, dataframe: PTRAILDataFrame):
+        """
+            Create an empty plan of filters for the dataframe.
+
+            Parameters
+            ----------
+                dataframe: PTRAILDataFrame
+                    The dataframe that is to be filtered.
+        """
+        self._dataframe = dataframe
+        self._predicates = []
+        self._features = set()
+
+    def __len__(self):
+        return len(self._predicates)
+
+    def by_bounding_box(self, bounding_box: tuple, inside: bool = True):
+        """
+            Keep the points that are within/outside the bounding box.
+
+            Parameters
+            ----------
+                bounding_box: tuple
+                    The (lat_min, lon_min, lat_max, lon_max) bounding box.
+                inside: bool
+                    Indicate whether the points inside or outside the bounding box are
+                    to be kept.
+
+            Returns
+            -------
+                FilterPlan:
+                    The plan itself so that the filters can be chained.
+        """
+        def predicate(df):
+            lat, lon = df[const.LAT].to_numpy(), df[const.LONG].to_numpy()
+            filt = ((lat >= bounding_box[0]) & (lon >= bounding_box[1])
+                    & (lat <= bounding_box[2]) & (lon <= bounding_box[3]))
+            return filt if inside else ~filt
+
+        return self._add(predicate)
+
+    def by_date(self, start_date: Optional[Text] = None, end_date: Optional[Text] = None):
+        """
+            Keep the points recorded between the start date and the end date (both
+            included). If either of the dates is not given, then the points are not
+            limited on that side.
+
+            Parameters
+            ----------
+                start_date: Optional[Text]
+                    The start date from which the points are to be kept.
+                end_date: Optional[Text]
+                    The end date until which the points are to be kept.
+
+            Returns
+            -------
+                FilterPlan:
+                    The plan itself so that the filters can be chained.
+
+            Raises
+            ------
+                ValueError:
+                    When the start date is later than the end date.
+        """
+        start_date, end_date = FilterPlan._to_range(start_date, end_date, 'Date')
+        start_date = start_date.normalize() if start_date is not None else None
+        end_date = end_date.normalize() if end_date is not None else None
+        return self._add(lambda df: FilterPlan._between(FilterPlan._times(df).normalize(), start_date, end_date))
+
+    def by_datetime(self, start_dateTime: Optional[Text] = None, end_dateTime: Optional[Text] = None):
+        """
+            Keep the points recorded between the start datetime and the end datetime
+            (both included). If either of the datetimes is not given, then the points
+            are not limited on that side.
+
+            Parameters
+            ----------
+                start_dateTime: Optional[Text]
+                    The start datetime from which the points are to be kept.
+                end_dateTime: Optional[Text]
+                    The end datetime until which the points are to be kept.
+
+            Returns
+            -------
+                FilterPlan:
+                    The plan itself so that the filters can be chained.
+
+            Raises
+            ------
+                ValueError:
+                    When the start datetime is later than the end datetime.
+        """
+        start_dateTime, end_dateTime = FilterPlan._to_range(start_dateTime, end_dateTime, 'Datetime')
+        return self._add(lambda df: FilterPlan._between(FilterPlan._times(df), start_dateTime, end_dateTime))
+
+    def by_max_speed(self, max_speed: float):
+        """
+            Remove the points whose speed is more than the given speed. The points
+            without a speed (the first point of each trajectory) are removed.
+
+            Parameters
+            ----------
+                max_speed: float
+                    The speed threshold (m/s) above which the points are to be removed.
+
+            Returns
+            -------
+                FilterPlan:
+                    The plan itself so that the filters can be chained.
+        """
+        return self._add(lambda df: df['Speed'].fillna(max_speed + 1).to_numpy() <= max_speed, 'Speed')
+
+    def by_min_speed(self, min_speed: float):
+        """
+            Remove the points whose speed is less than the given speed. The points
+            without a speed (the first point of each trajectory) are removed.
+
+            Parameters
+            ----------
+                min_speed: float
+                    The speed threshold (m/s) below which the points are to be removed.
+
+            Returns
+            -------
+                FilterPlan:
+                    The plan itself so that the filters can be chained.
+        """
+        return self._add(lambda df: df['Speed'].fillna(min_speed - 1).to_numpy() >= min_speed, 'Speed')
+
+    def by_min_consecutive_distance(self, min_distance: float):
+        """
+            Remove the points whose distance from the previous point is less than the
+            given distance. The points without a distance (the first point of each
+            trajectory) are removed.
+
+            Parameters
+            ----------
+                min_distance: float
+                    The distance threshold (metres) below which the points are to be removed.
+
+            Returns
+            -------
+                FilterPlan:
+                    The plan itself so that the filters can be chained.
+        """
+        return self._add(lambda df: df['Distance'].fillna(min_distance - 1).to_numpy() >= min_distance,
+                         'Distance')
+
+    def by_max_consecutive_distance(self, max_distance: float):
+        """
+            Remove the points whose distance from the previous point is more than the
+            given distance. The points without a distance (the first point of each
+            trajectory) are removed.
+
+            Parameters
+            ----------
+                max_distance: float
+                    The distance threshold (metres) above which the points are to be removed.
+
+            Returns
+            -------
+                FilterPlan:
+                    The plan itself so that the filters can be chained.
+        """
+        return self._add(lambda df: df['Distance'].fillna(max_distance + 1).to_numpy() <= max_distance,
+                         'Distance')
+
+    def outliers_by_consecutive_distance(self):
+        """
+            Remove the points whose distance from the previous point lies outside the
+            range [Q1 - 1.5 * IQR, Q3 + 1.5 * IQR] of the distances.
+
+            Returns
+            -------
+                FilterPlan:
+                    The plan itself so that the filters can be chained.
+        """
+        return self._add(lambda df: FilterPlan._within_iqr(df['Distance']), 'Distance')
+
+    def outliers_by_consecutive_speed(self):
+        """
+            Remove the points whose speed lies outside the range
+            [Q1 - 1.5 * IQR, Q3 + 1.5 * IQR] of the speeds.
+
+            Returns
+            -------
+                FilterPlan:
+                    The plan itself so that the filters can be chained.
+        """
+        return self._add(lambda df: FilterPlan._within_iqr(df['Speed']), 'Speed')
+
+    def by_min_points(self, num_min_points: int = 3):
+        """
+            Remove the trajectories which have fewer points than the given number.
+
+            Parameters
+            ----------
+                num_min_points: int
+                    The minimum number of points that a trajectory should have if it
+                    is to be retained in the dataset.
+
+            Returns
+            -------
+                FilterPlan:
+                    The plan itself so that the filters can be chained.
+        """
+        def predicate(df):
+            _, offsets = df.traj_offsets
+            lengths = np.diff(offsets)
+            return np.repeat(lengths >= num_min_points, lengths)
+
+        return self._add(predicate)
+
+    def hampel(self, column_name: Text, window_size: int = 5, n_sigma: float = 3):
+        """
+            Remove the outliers of the column detected using the hampel filter. For
+            more info, see the Filters.hampel_outlier_detection() function.
+
+            Parameters
+            ----------
+                column_name: Text
+                    The column on the basis of which the outliers are to be detected.
+                window_size: int
+                    The number of points on each side of a point in its window.
+                n_sigma: float
+                    The number of standard deviations from the rolling median beyond
+                    which a point is an outlier.
+
+            Returns
+            -------
+                FilterPlan:
+                    The plan itself so that the filters can be chained.
+        """
+        features = [column_name] if column_name in ['Distance', 'Speed'] else []
+        return self._add(lambda df: Filters.hampel_outlier_detection(df, column_name, window_size, n_sigma,
+                                                                     return_mask=True).to_numpy(), *features)
+
+    def where(self, predicate: Callable):
+        """
+            Keep the points for which the given predicate is True.
+
+            Parameters
+            ----------
+                predicate: Callable
+                    The function which takes the dataframe (along with the derived
+                    features) and returns a boolean array-like aligned with its rows.
+
+            Returns
+            -------
+                FilterPlan:
+                    The plan itself so that the filters can be chained.
+        """
+        return self._add(predicate)
+
+    def mask(self):
+        """
+            Evaluate all the filters of the plan and combine them into a single mask
+            without creating the filtered dataframe.
+
+            Returns
+            -------
+                pandas.core.series.Series:
+                    The boolean mask aligned with the dataframe (along with the derived
+                    features) which is True at the points that are kept.
+        """
+        dataframe, mask = self._evaluate()
+        return pd.Series(mask, index=dataframe.index)
+
+    def execute(self):
+        """
+            Evaluate all the filters of the plan and create the filtered dataframe.
+
+            Returns
+            -------
+                PTRAILDataFrame:
+                    The filtered dataframe. The Distance and Speed columns derived for
+                    the filters are included in it.
+        """
+        dataframe, mask = self._evaluate()
+        return PTRAILDataFrame._from_validated(dataframe[mask])
+
+    def _add(self, predicate: Callable, *features):
+        """
+            Add a predicate to the plan along with the features needed by it.
+
+            Parameters
+            ----------
+                predicate: Callable
+                    The function which takes the dataframe and returns the boolean mask.
+                features:
+                    The names of the kinematic features needed by the predicate.
+
+            Returns
+            -------
+                FilterPlan:
+                    The plan itself.
+        """
+        self._predicates.append(predicate)
+        self._features.update(features)
+        return self
+
+    def _evaluate(self):
+        """
+            Derive the features needed by the plan and evaluate its predicates.
+
+            Returns
+            -------
+                tuple:
+                    The dataframe along with the derived features and the combined mask.
+        """
+        # Derive the missing features only once for all the predicates. The speed
+        # is calculated from the distance, hence both are derived together.
+        dataframe = self._dataframe
+        if 'Speed' in self._features and 'Speed' not in dataframe.columns:
+            dataframe = kinematic.create_speed_column(dataframe)
+        if 'Distance' in self._features and 'Distance' not in dataframe.columns:
+            dataframe = kinematic.create_distance_column(dataframe)
+
+        mask = np.ones(len(dataframe), dtype=bool)
+        for predicate in self._predicates:
+            mask &= np.asarray(predicate(dataframe), dtype=bool)
+        return dataframe, mask
+
+    @staticmethod
+    def _times(dataframe):
+        """
+            Get the DateTime of the points of the dataframe.
+        """
+        if const.DateTime in dataframe.index.names:
+            return dataframe.index.get_level_values(const.DateTime)
+        return pd.DatetimeIndex(dataframe[const.DateTime])
+
+    @staticmethod
+    def _to_range(start, end, name: Text):
+        """
+            Convert the start and end of a time range to pandas Timestamps and check
+            that the range is not empty.
+        """
+        start = pd.to_datetime(start) if start is not None else None
+        end = pd.to_datetime(end) if end is not None else None
+        if start is not None and end is not None and end < start:
+            raise ValueError(f"End {name} should be later than Start {name}.")
+        return start, end
+
+    @staticmethod
+    def _between(times, start, end):
+        """
+            Check whether the times lie within the range (both ends included).
+        """
+        mask = np.ones(len(times), dtype=bool)
+        if start is not None:
+            mask &= np.asarray(times >= start)
+        if end is not None:
+            mask &= np.asarray(times <= end)
+        return mask
+
+    @staticmethod
+    def _within_iqr(values: pd.Series):
+        """
+            Check whether the values lie strictly within 1.5 times the inter quartile
+            range from the quartiles.
+        """
+        q_low, q_high = values.quantile(0.25), values.quantile(0.75)
+        cut_off = (q_high - q_low) * 1.5
+        values = values.to_numpy()
+        with np.errstate(invalid='ignore'):
+            return (values > q_low - cut_off) & (values < q_high + cut_off)
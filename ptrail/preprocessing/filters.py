@@ -5,12 +5,8 @@
 
     | Authors: Yaksh J Haranwala, Salman Haidri
 """
-import itertools
 import math
-import multiprocessing
-import os
 import warnings
-from math import ceil
 from typing import Text, Optional
 
 import numpy as np
@@ -22,9 +18,8 @@ from ptrail.preprocessing.helpers import Helpers as helper
 from ptrail.features.temporal_features import TemporalFeatures as temporal
 from ptrail.features.kinematic_features import KinematicFeatures as kinematic
 from ptrail.utilities.exceptions import *
-
-num = os.cpu_count()
-NUM_CPU = ceil((num * 2) / 3)
+from ptrail.utilities.executor import WorkerPool
+from ptrail.utilities.partitioner import Partitioner
 
 
 class Filters:
@@ -152,7 +147,7 @@ class Filters:
                 & (dataframe[const.LONG] <= bounding_box[3])
         )
         df = dataframe.loc[filt] if inside else dataframe.loc[~filt]
-        return PTRAILDataFrame(df.reset_index(), const.LAT, const.LONG, const.DateTime, const.TRAJECTORY_ID)
+        return PTRAILDataFrame._from_validated(df)
 
     @staticmethod
     def filter_by_date(dataframe: PTRAILDataFrame, start_date: Optional[Text] = None, end_date: Optional[Text] = None):
@@ -308,7 +303,7 @@ class Filters:
                 filtered_df = dataframe.loc[filt].reset_index()
 
         # Convert the smaller dataframe back to PTRAILDataFrame and return it.
-        return PTRAILDataFrame(filtered_df, const.LAT, const.LONG, const.DateTime, const.TRAJECTORY_ID)
+        return PTRAILDataFrame._from_validated(filtered_df)
 
     @staticmethod
     def filter_by_max_speed(dataframe: PTRAILDataFrame, max_speed: float):
@@ -341,7 +336,7 @@ class Filters:
             filtered_df = dataframe.loc[filt].reset_index(drop=True)
 
             # Convert the smaller dataframe back to PTRAILDataFrame and return it.
-            return PTRAILDataFrame(filtered_df, const.LAT, const.LONG, const.DateTime, const.TRAJECTORY_ID)
+            return PTRAILDataFrame._from_validated(filtered_df)
         except KeyError:
             # raise MissingColumnsException(f"The column 'Speed is not present in the dataset. "
             #                               f"Please run the function create_speed_from_prev_column() before"
@@ -381,7 +376,7 @@ class Filters:
             filtered_df = dataframe.loc[filt].reset_index()
 
             # Convert the smaller dataframe back to PTRAILDataFrame and return it.
-            return PTRAILDataFrame(filtered_df, const.LAT, const.LONG, const.DateTime, const.TRAJECTORY_ID)
+            return PTRAILDataFrame._from_validated(filtered_df)
         except KeyError:
             dataframe = kinematic.create_speed_column(dataframe)
             return Filters.filter_by_min_speed(dataframe, min_speed)
@@ -419,7 +414,7 @@ class Filters:
             filtered_df = dataframe.loc[filt].reset_index(drop=True)
 
             # Convert the smaller dataframe back to PTRAILDataFrame and return it.
-            return PTRAILDataFrame(filtered_df, const.LAT, const.LONG, const.DateTime, const.TRAJECTORY_ID)
+            return PTRAILDataFrame._from_validated(filtered_df)
         except KeyError:
 
             dataframe = kinematic.create_distance_column(dataframe)
@@ -458,7 +453,7 @@ class Filters:
             filtered_df = dataframe.loc[filt]
 
             # Convert the smaller dataframe back to PTRAILDataFrame and return it.
-            return PTRAILDataFrame(filtered_df, const.LAT, const.LONG, const.DateTime, const.TRAJECTORY_ID)
+            return PTRAILDataFrame._from_validated(filtered_df)
         except KeyError:
             dataframe = kinematic.create_distance_column(dataframe)
             return Filters.filter_by_max_consecutive_distance(dataframe, max_distance)
@@ -593,7 +588,7 @@ class Filters:
                                      dataframe['Distance'] < higher)
 
             filtered_df = dataframe.loc[df_filt]
-            return PTRAILDataFrame(filtered_df, const.LAT, const.LONG, const.DateTime, const.TRAJECTORY_ID)
+            return PTRAILDataFrame._from_validated(filtered_df)
 
         except KeyError:
             dataframe = kinematic.create_distance_column(dataframe)
@@ -666,19 +661,25 @@ class Filters:
 
         # Apply the filter, convert the resultant dataframe to PTRAILDataFrame and return it.
         df = dataframe[filt]
-        return PTRAILDataFrame(df, const.LAT, const.LONG, const.DateTime, const.TRAJECTORY_ID)
+        return PTRAILDataFrame._from_validated(df)
 
     @staticmethod
-    def hampel_outlier_detection(dataframe, column_name: Text):
+    def hampel_outlier_detection(dataframe, column_name: Text, window_size: int = 5, n_sigma: float = 3,
+                                 return_mask: bool = False, max_workers: Optional[int] = None,
+                                 backend: Optional[Text] = None):
         """
             Use the hampel filter to remove outliers from the dataset on the basis
-            of column specified by the user.
+            of column specified by the user. A point is an outlier if it differs from
+            the rolling median of its trajectory by more than n_sigma times the rolling
+            standard deviation estimated using the median absolute deviation (MAD).
 
-            Warning
-            -------
-                Do not use Hampel filter outlier detection and try to detect outliers
-                with DateTime as it will raise a NotImplementedError as it has not been
-                implemented yet by the original author of the Hampel filter.
+            Note
+            ----
+                | The window of a point contains window_size points on each side of it and
+                  never crosses the boundary of a trajectory. For more info, take a look at
+                  the documentation of the Helpers._hampel_outliers() function.
+                | The column must be numeric, hence outliers cannot be detected with
+                  DateTime.
 
             Parameters
             ----------
@@ -686,76 +687,66 @@ class Filters:
                     The dataframe from which the outliers are to be removed.
                 column_name: Text
                     The column on te basis of which the outliers are to be detected.
+                window_size: int
+                    The number of points on each side of a point in its window.
+                n_sigma: float
+                    The number of standard deviations from the rolling median beyond
+                    which a point is an outlier.
+                return_mask: bool
+                    If True, then the boolean mask of the points which are not outliers
+                    is returned instead of the filtered dataframe.
+                max_workers: Optional[int]
+                    The maximum number of workers of the shared pool that are used at the
+                    same time. If None, then all the workers of the pool are used.
+                backend: Optional[Text]
+                    The backend on which the work is run, one of serial, threads or
+                    processes. If None, then the default backend of the WorkerPool is used.
 
             Returns
             -------
                 PTRAILDataFrame:
                     The dataframe with the outliers removed.
+                pandas.core.series.Series:
+                    The boolean mask aligned with the dataframe which is False at the
+                    outliers, if return_mask is True.
 
             Raises
             ------
-                KeyError:
+                MissingColumnsException:
                     The user-specified column is not present in the dataset.
+                ValueError:
+                    The window size is less than 1 or n_sigma is negative.
 
             References
             ----------
-                Pedrido, M.O., "Hampel", (2020), GitHub repository,
-                https://github.com/MichaelisTrofficus/hampel_filter
-        """
-        # Reset the index of the dataframe and then split the original dataframe into
-        # smaller chunks containing a fixed number of trajectory IDs.
-        df = dataframe.reset_index()
-        df_chunks = helper._df_split_helper(df)
-
-        # create a list using the multiprocessing manager to store the returns of the parallel
-        # helper functions.
-        processes = [None] * len(df_chunks)
-        manager = multiprocessing.Manager()
-        return_list = manager.list()
-
-        # Spawn the parallel process and run the hampel filter.
-        for i in range(len(processes)):
-            processes[i] = multiprocessing.Process(target=Filters._hampel,
-                                                   args=(df_chunks[i], column_name, return_list))
-            processes[i].start()
-
-        # Join the helper processes again to free up the CPUs and the main memory.
-        for j in range(len(processes)):
-            processes[j].join()
+                Hampel, F.R., "The influence curve and its role in robust estimation",
+                Journal of the American Statistical Association, 69(346), 383-393 (1974).
+        """
+        if column_name not in dataframe.columns:
+            raise MissingColumnsException(f"The column {column_name} does not exist in the dataset.")
+        if window_size < 1 or n_sigma < 0:
+            raise ValueError("The window size must be at least 1 and n_sigma must not be negative.")
+
+        # Split the column into partitions of whole trajectories and find the outliers
+        # of each partition on the shared pool of workers.
+        _, offsets = dataframe.traj_offsets
+        values = dataframe[column_name].to_numpy(dtype=np.float64)
+        partitions, tasks = [], []
+        for ranges in Partitioner.partition_ranges(offsets):
+            rows = Partitioner._range_rows(ranges)
+            local_offsets = np.append(0, np.cumsum(ranges[:, 1] - ranges[:, 0]))
+            partitions.append(rows)
+            tasks.append((values[rows], local_offsets, window_size, n_sigma))
+        results = WorkerPool.starmap(helper._hampel_outliers, tasks, max_workers, backend=backend)
+
+        keep = np.ones(len(values), dtype=bool)
+        for rows, outliers in zip(partitions, results):
+            keep[rows] = ~outliers
+
+        if return_mask:
+            return pd.Series(keep, index=dataframe.index)
 
         warnings.warn("If kinematic features have been generated on the dataframe, then make "
                       "sure to generate them again as outlier detection drops the point from "
                       "the dataframe and does not run the kinematic features again.")
-
-        # Convert the results back to PTRAILDataFrame and return the resultant dataframe.
-        return PTRAILDataFrame(pd.concat(return_list),
-                               const.LAT, const.LONG, const.DateTime, const.TRAJECTORY_ID)
-
-    @staticmethod
-    def _hampel(dataframe, column_name: Text, return_list: list):
-        """
-            This is a mid-level helper function for the hampel filter. The
-            purpose of this function is to split the smaller chunks of dataframe
-            received into even smaller chunks containing 1 trajectory ID per chunk,
-            then call the helper function from the helper module and run the hampel filter
-            on it, then merge all the smaller results and append it to the return list.
-        """
-        # Split the smaller dataframe further into smaller chunks containing only 1
-        # Trajectory ID per index.
-        ids_ = list(dataframe[const.TRAJECTORY_ID].value_counts().keys())
-        df_chunks = [dataframe.loc[dataframe[const.TRAJECTORY_ID] == ids_[i]] for i in range(len(ids_))]
-
-        # Here, create as many processes at once as there are number of CPUs available in
-        # the system - 1. One CPU is kept free at all times in order to not block up
-        # the system. (Note: The blocking of system is mostly prevalent in Windows and does
-        # not happen very often in Linux. However, out of caution 1 CPU is kept free regardless
-        # of the system.)
-        small_pool = multiprocessing.Pool(NUM_CPU - 1)
-        final = small_pool.starmap(helper.hampel_help,
-                                   zip(df_chunks, itertools.repeat(column_name)))
-        small_pool.close()
-        small_pool.join()
-
-        return_list.append(pd.concat(final))
-
-
+        return PTRAILDataFrame._from_validated(dataframe[keep])
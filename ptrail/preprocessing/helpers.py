@@ -4,9 +4,9 @@
         | 1. None of the methods in this module should be used directly while performing operations on data.
         | 2. These methods are helpers for the interpolation methods in the interpolation.py
              module and hence run linearly and not in parallel which will result in slower execution time.
-        | 3. All the methods in this module perform calculation on a single Trajectory ID due to which
-             it will wrong results on data with multiple trajectories. Instead, use the interpolation.py
-             methods for faster and reliable calculations.
+        | 3. The interpolation methods in this module expect the points of each trajectory to be
+             stored in contiguous rows sorted by DateTime, otherwise they will give wrong results.
+             Instead, use the interpolation.py methods for faster and reliable calculations.
 
     The helpers class has the functionalities that interpolate a point based
     on the given data by the user. The class contains the following 4
@@ -22,178 +22,263 @@
 
     | Authors: Yaksh J Haranwala, Salman Haidri
 """
-import math
-import os
-from typing import Text, Union
+from typing import List, Optional, Text, Union
 
 import numpy as np
 import pandas as pd
 import datetime as dt
-from hampel import hampel
 from scipy.interpolate import CubicSpline
 
 from ptrail.core.TrajectoryDF import PTRAILDataFrame
-from ptrail.features.kinematic_features import KinematicFeatures as spatial
+from ptrail.features.helper_functions import Helpers as feature_helpers
 from ptrail.utilities import constants as const
+from ptrail.utilities.DistanceCalculator import FormulaLog as calc
 from ptrail.utilities.exceptions import *
+from ptrail.utilities.partitioner import Partitioner
 
 
 class Helpers:
     # ------------------------------------ Interpolation Helpers --------------------------------------- #
     @staticmethod
-    def linear_help(dataframe: Union[pd.DataFrame, PTRAILDataFrame],
-                    id_: Text, sampling_rate: float, class_label_col):
+    def linear_help(dataframe: Union[pd.DataFrame, PTRAILDataFrame], sampling_rate: float, class_label_col):
         """
             This method takes a dataframe and uses linear interpolation to determine coordinates
             of location on Datetime where the time difference between 2 consecutive points exceeds
             the user-specified sampling_rate and inserts the interpolated point those between 2 points.
 
-            Warning
-            -------
-                This method should not be used for dataframes with multiple trajectory ids as it will
-                yield wrong results and there might be a significant drop in performance.
+            Note
+            ----
+                All the gaps of all the trajectories in the dataframe are interpolated at once
+                using array operations, hence the dataframe can contain multiple trajectories.
+                However, the points of each trajectory must be in contiguous rows sorted by
+                DateTime.
 
             Parameters
             ----------
                 dataframe: Union[pd.DataFrame, NumTrajDF]
                      The dataframe containing the original trajectory data.
-                id_: Text
-                    The Trajectory ID of the points in the dataframe.
                 sampling_rate: float
                     The maximum time difference between 2 points greater than which
                     a point will be inserted between 2 points.
+                class_label_col: Text
+                    The column header which contains the class label of the point.
 
             Returns
             -------
                 pandas.core.dataframe.DataFrame
-                    The dataframe containing the trajectory enhanced with interpolated
+                    The dataframe containing the trajectories enhanced with interpolated
                     points.
 
         """
-        # Now, for each unique ID in the dataframe, interpolate the points.
-        # Create a Series containing new times which are calculated as follows:
-        #    new_time[i] = original_time[i] + sampling_rate.
-        new_times = dataframe.reset_index()[const.DateTime] + pd.to_timedelta(sampling_rate, unit='seconds')
-
-        # Now, interpolate the latitudes using numpy based on the new times calculated above.
-        ip_lat = np.interp(new_times,
-                           dataframe.reset_index()[const.DateTime],
-                           dataframe.reset_index()[const.LAT])
+        dataframe = Helpers._select_ip_columns(dataframe, class_label_col)
 
-        # Now, interpolate the longitudes using numpy based on the new times calculated above.
-        ip_long = np.interp(new_times,
-                            dataframe.reset_index()[const.DateTime],
-                            dataframe.reset_index()[const.LONG])
+        # Find the points after which a new point is to be inserted. Since the time difference of
+        # the gap is greater than the sampling rate, the new point at (time of the point + sampling_rate)
+        # always lies between the 2 points of the gap, and hence its position is interpolated
+        # linearly between them.
+        prev, _ = Helpers._find_gaps(dataframe, sampling_rate)
+        new_times = dataframe[const.DateTime].to_numpy()[prev] + pd.to_timedelta(sampling_rate, unit='seconds')
+        ip_coords = Helpers._linear_positions(dataframe, prev, new_times)
 
-        # Here, store the time difference between all the consecutive points in an array.
-        time_deltas = dataframe.reset_index()[const.DateTime].diff().dt.total_seconds()
-
-        # Now, for each point in the trajectory, check whether the time difference between
-        # 2 consecutive points is greater than the user-specified sampling_rate, and if so then
-        # insert a new point that is linearly interpolated between the 2 original points.
-        for j in range(len(time_deltas)):
-            if time_deltas[j] > sampling_rate:
-                if class_label_col == '':
-                    dataframe.loc[new_times[j - 1]] = [id_, ip_lat[j - 1], ip_long[j - 1]]
-                else:
-                    dataframe.loc[new_times[j - 1]] = [id_, ip_lat[j - 1], ip_long[j - 1],
-                                                       dataframe[class_label_col].iloc[0]]
-
-        return dataframe
+        return Helpers._insert_points(dataframe, prev, new_times, ip_coords[:, 0], ip_coords[:, 1], class_label_col)
 
     @staticmethod
-    def cubic_help(df: Union[pd.DataFrame, PTRAILDataFrame], id_: Text,
-                   sampling_rate: float, class_label_col):
+    def cubic_help(df: Union[pd.DataFrame, PTRAILDataFrame], sampling_rate: float, class_label_col):
         """
             This method takes a dataframe and uses cubic interpolation to determine coordinates
             of location on Datetime where the time difference between 2 consecutive points exceeds
-            the user-specified sampling_rate and inserts the interpolated point those between 2 points.
+            the user-specified sampling_rate and fills the gap between those 2 points with points
+            spaced by the sampling_rate, so that no gap exceeds the sampling_rate anymore.
 
-            Warning
-            -------
-                This method should not be used for dataframes with multiple trajectory ids as it will
-                yield wrong results and there might be a significant drop in performance.
+            Note
+            ----
+                | A cubic spline is fitted on each trajectory having more than 3 points and the
+                  trajectories with 3 or less points are not interpolated.
+                | The coefficients of all the splines are gathered in a single array and all the
+                  new points of all the trajectories are evaluated at once.
 
             Parameters
             ----------
                 df: Union[pd.DataFrame, NumTrajDF]
                      The dataframe containing the original trajectory data.
-                id_: Text
-                    The Trajectory ID of the points in the dataframe.
                 sampling_rate: float
                     The maximum time difference between 2 points greater than which
-                    a point will be inserted between 2 points.
+                    points will be inserted between 2 points.
+                class_label_col: Text
+                    The column header which contains the class label of the point.
 
             Returns
             -------
                 pandas.core.dataframe.DataFrame
-                    The dataframe containing the trajectory enhanced with interpolated
+                    The dataframe containing the trajectories enhanced with interpolated
                     points.
         """
-        # Create a Series containing new times which are calculated as follows:
-        #    new_time[i] = original_time[i] + sampling_rate.
-        new_times = df.reset_index()[const.DateTime] + pd.to_timedelta(sampling_rate, unit='seconds')
-
-        # Now, using Scipy's Cubic spline, create a spline object for interpolation of
-        # points for the dataframes which have a length greater than 3 else CubicSpline
-        # doesn't execute.
-        if len(df) > 3:
-            # Create the x and y values for the CubicSpline function.
-            # We make sure that there is a strictly increasing sequence of points.
-            x = df.reset_index()[const.DateTime].sort_values().drop_duplicates()
-            y = df.reset_index().iloc[x.index][[const.LAT, const.LONG]].to_numpy()
-
-            cubic_spline = CubicSpline(x=x, y=y, extrapolate=True, bc_type='not-a-knot')
-            # Now, calculate the interpolated position of the points at all the new_times
-            #    calculated above.
-            ip_coords = cubic_spline(new_times)
-
-        # Here, store the time difference between all the consecutive points in an array.
-        time_deltas = df.reset_index()[const.DateTime].diff().dt.total_seconds()
-
-        # Now, for each point in the trajectory, check whether the time difference between
-        # 2 consecutive points is greater than the user-specified sampling_rate, and if so then
-        # insert a new point that is cubic-spline interpolated between the 2 original points.
-        for j in range(len(time_deltas)):
-            # If the trajectory has less than 3 points, then skip the trajectory
-            # from the interpolation.
-            if len(df) > 3:
-                if time_deltas[j] > sampling_rate:
-                    if class_label_col == '':
-                        df.loc[new_times[j - 1]] = [id_, ip_coords[j - 1][0], ip_coords[j - 1][1]]
-                    else:
-                        df.loc[new_times[j - 1]] = [id_, ip_coords[j - 1][0], ip_coords[j - 1][1],
-                                                    df[class_label_col].iloc[0]]
-
-        return df
+        df = Helpers._select_ip_columns(df, class_label_col)
+        ids_, offsets = PTRAILDataFrame._build_traj_offsets(df[const.TRAJECTORY_ID])
+
+        splines = Helpers._fit_cubic_splines(df, offsets)
+
+        # Find all the timestamps to be filled in the gaps of the fitted trajectories and
+        # evaluate the splines at all of them at once.
+        prev, _ = Helpers._find_gaps(df, sampling_rate)
+        prev = prev[splines[0][np.searchsorted(offsets, prev, side='right') - 1]]
+        prev, new_times = Helpers._gap_sample_times(df, prev, sampling_rate)
+        ip_coords = Helpers._eval_cubic_splines(splines, prev, new_times)
+
+        return Helpers._insert_points(df, prev, new_times, ip_coords[:, 0], ip_coords[:, 1], class_label_col)
 
     @staticmethod
-    def random_walk_help(dataframe: PTRAILDataFrame, id_: Text,
-                         sampling_rate: float, class_label_col):
+    def grid_help(dataframe: Union[pd.DataFrame, PTRAILDataFrame], sampling_rate: float,
+                  ip_type: Text, class_label_col):
+        """
+            This method takes a dataframe and resamples each of its trajectories onto a regular
+            time grid aligned to the epoch with the sampling_rate as the spacing, using either
+            the linear, the cubic or the kinematic interpolation. The grid of each trajectory contains all the
+            multiples of the sampling_rate between its first and last points, hence the trajectories with
+            no such multiple are not present in the result.
+
+            Note
+            ----
+                | The number of grid points of each trajectory is calculated before the
+                  interpolation, and hence the output arrays are allocated only once.
+                | The trajectories having 3 or less points are linearly interpolated when
+                  the cubic interpolation is asked for. Similarly, the grid points lying
+                  between the first 2 points of a trajectory are linearly interpolated when
+                  the kinematic interpolation is asked for.
+
+            Parameters
+            ----------
+                dataframe: Union[pd.DataFrame, NumTrajDF]
+                     The dataframe containing the original trajectory data.
+                sampling_rate: float
+                    The time difference (in seconds) between 2 consecutive grid points.
+                ip_type: Text
+                    The type of interpolation that is to be used, either linear, cubic
+                    or kinematic.
+                class_label_col: Text
+                    The column header which contains the class label of the point.
+
+            Returns
+            -------
+                pandas.core.dataframe.DataFrame
+                    The dataframe containing the grid points of all the trajectories sorted by
+                    trajectory and DateTime.
+        """
+        dataframe = Helpers._select_ip_columns(dataframe, class_label_col)
+        ids_, offsets = PTRAILDataFrame._build_traj_offsets(dataframe[const.TRAJECTORY_ID])
+        counts, first = Helpers._grid_sizes(dataframe, offsets, sampling_rate)
+
+        # Allocate the grid of all the trajectories at once and fill in the timestamps of
+        # each grid point as the first grid time of its trajectory plus a multiple of the step.
+        step = np.int64(round(sampling_rate * 1e9))
+        grid_codes = np.repeat(np.arange(len(ids_)), counts)
+        grid_steps = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        grid_times = first[grid_codes] + grid_steps * step
+
+        # Find the last original point at or before each grid point by merging the original
+        # points and the grid points in (trajectory, time) order.
+        times = dataframe[const.DateTime].to_numpy(dtype='datetime64[ns]').view(np.int64)
+        codes = np.repeat(np.arange(len(ids_)), np.diff(offsets))
+        order = np.lexsort((np.repeat([0, 1], [len(times), len(grid_times)]),
+                            np.concatenate([times, grid_times]),
+                            np.concatenate([codes, grid_codes])))
+        is_grid = order >= len(times)
+        last_original = np.maximum.accumulate(np.where(is_grid, -1, order))
+        prev = np.empty(len(grid_times), dtype=np.int64)
+        prev[order[is_grid] - len(times)] = last_original[is_grid]
+
+        grid_times = grid_times.view('datetime64[ns]')
+        ip_coords = Helpers._linear_positions(dataframe, prev, grid_times)
+        if ip_type == 'cubic':
+            splines = Helpers._fit_cubic_splines(dataframe, offsets)
+            is_fitted = splines[0][grid_codes]
+            ip_coords[is_fitted] = Helpers._eval_cubic_splines(splines, prev[is_fitted], grid_times[is_fitted])
+        elif ip_type == 'kinematic':
+            kinematic_coords, is_valid = Helpers._kinematic_positions(dataframe, prev, grid_times)
+            ip_coords[is_valid] = kinematic_coords[is_valid]
+
+        to_return = pd.DataFrame({
+            const.DateTime: grid_times,
+            const.TRAJECTORY_ID: ids_[grid_codes],
+            const.LAT: ip_coords[:, 0],
+            const.LONG: ip_coords[:, 1],
+        })
+        if class_label_col != '':
+            to_return[class_label_col] = dataframe[class_label_col].to_numpy()[offsets[grid_codes]]
+        return to_return
+
+    @staticmethod
+    def _grid_sizes(dataframe: pd.DataFrame, offsets: np.ndarray, sampling_rate: float):
+        """
+            Calculate the number of points of the regular time grid of each trajectory.
+            The grid is aligned to the epoch, i.e. all the grid times are multiples of the
+            sampling_rate.
+
+            Parameters
+            ----------
+                dataframe: pandas.core.dataframe.DataFrame
+                    The dataframe containing the original points with a default index.
+                offsets: np.ndarray
+                    The offset index of the trajectories of the dataframe.
+                sampling_rate: float
+                    The time difference (in seconds) between 2 consecutive grid points.
+
+            Returns
+            -------
+                tuple:
+                    The array containing the number of grid points of each trajectory and
+                    the array containing the first grid time (in nanoseconds) of each trajectory.
+
+            Raises
+            ------
+                ValueError:
+                    The sampling_rate is not positive.
+        """
+        step = np.int64(round(sampling_rate * 1e9))
+        if step <= 0:
+            raise ValueError("The sampling rate must be greater than 0.")
+
+        times = dataframe[const.DateTime].to_numpy(dtype='datetime64[ns]').view(np.int64)
+        first = -(-times[offsets[:-1]] // step) * step
+        last = times[offsets[1:] - 1] // step * step
+        counts = np.maximum((last - first) // step + 1, 0)
+        return counts, first
+
+    @staticmethod
+    def random_walk_help(dataframe: Union[pd.DataFrame, PTRAILDataFrame], sampling_rate: float,
+                         class_label_col, seeds: Optional[List[np.random.SeedSequence]] = None):
         """
             This method takes a dataframe and uses random-walk interpolation to determine coordinates
             of location on Datetime where the time difference between 2 consecutive points exceeds
             the user-specified sampling_rate and inserts the interpolated point those between 2 points.
 
-            Warning
-            -------
-                This method should not be used for dataframes with multiple trajectory ids as it will
-                yield wrong results and there might be a significant drop in performance.
+            Note
+            ----
+                | The displacement of each new point from the point at which its gap starts is
+                  drawn from normal distributions of the distance and the bearing between the
+                  consecutive points of its trajectory.
+                | Each trajectory draws its displacements from its own random number generator
+                  created from the seed sequence given for it. Hence, the results only depend
+                  on the seeds and not on how the trajectories are split among the processes.
+                | The trajectories having 3 or less points are not interpolated.
 
             Parameters
             ----------
                 dataframe: Union[pd.DataFrame, NumTrajDF]
                      The dataframe containing the original trajectory data.
-                id_: Text
-                    The Trajectory ID of the points in the dataframe.
                 sampling_rate: float
                     The maximum time difference between 2 points greater than which
                     a point will be inserted between 2 points.
+                class_label_col: Text
+                    The column header which contains the class label of the point.
+                seeds: Optional[List[np.random.SeedSequence]]
+                    The seed sequence of each trajectory in the order of the trajectories in
+                    the dataframe. If None, then fresh seed sequences are used.
 
             Returns
             -------
                 pandas.core.dataframe.DataFrame
-                    The dataframe containing the trajectory enhanced with interpolated
+                    The dataframe containing the trajectories enhanced with interpolated
                     points.
 
             References
@@ -202,104 +287,78 @@ class Helpers:
                 segmentation algorithm based on change detection with interpolation kernels.
                 Geoinformatica (2020)
         """
-        # Create a Series containing new times which are calculated as follows:
-        #    new_time[i] = original_time[i] + sampling_rate.
-        new_times = dataframe.reset_index()[const.DateTime] + pd.to_timedelta(sampling_rate, unit='seconds')
-
-        # First, create a distance between the consecutive points of the dataframe,
-        # then, calculate the mean and standard deviation of all the distances between
-        # consecutive points.
-        df1 = spatial.create_distance_column(dataframe)
-        d_mean = (df1['Distance'].mean(skipna=True))
-        d_std = (df1['Distance'].std(skipna=True))
-
-        # Now, create a bearing between the consecutive points of the dataframe,
-        # then, calculate the mean and standard deviation of all the bearings between
-        # consecutive points.
-        df = spatial.create_bearing_column(df1)
-        b_mean = df['Bearing'].mean(skipna=True)
-        b_std = df['Bearing'].std(skipna=True)
-
-        calc_a = np.random.normal(d_mean, d_std, 1) / 1000
-        calc_b = np.radians(np.random.normal(b_mean, b_std, 1))
-
-        # print(f"Calc: {calc_a, calc_b}")
-        # if d_std == 0 or b_std == 0:
-        #     return dataframe
-        #
-        # # Here, using Scipy's truncnorm() function, create an object that gives out random
-        # # values. It is to be noted that the values are restricted between latitude.min()
-        # # and latitude.max().
-        # d_mean = truncnorm((df1['lat'].min() - d_mean) / d_std,
-        #                    (df1['lat'].max() - d_mean) / d_std,
-        #                    loc=d_mean,
-        #                    scale=d_std)
-        #
-        # # Here, using Scipy's truncnorm() function, create an object that gives out random
-        # # values. It is to be noted that the values are restricted between longitude.min()
-        # # and longitude.max().
-        # b_mean = truncnorm((df['lon'].min() - b_mean) / b_std,
-        #                    (df['lon'].max() - b_mean) / b_std,
-        #                    loc=b_mean,
-        #                    scale=b_std)
-        #
-        # # Using the 2 objects created above, generate a random value from them. The value
-        # # is selected randomly from a uniformly distributed sample
-        # calc_a = d_mean.rvs()
-        # calc_b = math.radians(b_mean.rvs())
-
+        dataframe = Helpers._select_ip_columns(dataframe, class_label_col)
+        ids_, offsets = PTRAILDataFrame._build_traj_offsets(dataframe[const.TRAJECTORY_ID])
+        codes = np.repeat(np.arange(len(ids_)), np.diff(offsets))
+        seeds = np.random.SeedSequence().spawn(len(ids_)) if seeds is None else seeds
+
+        # First, calculate the distance and bearing between the consecutive points of all
+        # the trajectories and then their mean and standard deviation for each trajectory.
+        traj_ids = dataframe[const.TRAJECTORY_ID].to_numpy()
+        lat = dataframe[const.LAT].to_numpy(dtype=np.float64)
+        lon = dataframe[const.LONG].to_numpy(dtype=np.float64)
+        distances = feature_helpers._consecutive_distances(traj_ids, lat, lon)
+        bearings = calc.bearing_calculation(np.roll(lat, 1), np.roll(lon, 1), lat, lon)
+        bearings[feature_helpers._traj_start_mask(traj_ids)] = np.nan
+        stats = pd.DataFrame({'Distance': distances, 'Bearing': bearings}).groupby(codes).agg(['mean', 'std'])
+
+        # Find the gaps of the trajectories having more than 3 points.
+        prev, _ = Helpers._find_gaps(dataframe, sampling_rate)
+        prev = prev[np.diff(offsets)[codes[prev]] > 3]
+        gap_codes = codes[prev]
+
+        # Now, draw the random values of all the gaps of each trajectory in a single batch
+        # from the generator of the trajectory. Since the gaps are in the order of the
+        # trajectories, the batches are contiguous.
+        counts = np.bincount(gap_codes, minlength=len(ids_))
+        draws = np.empty((len(prev), 2))
+        bounds = np.append(0, np.cumsum(counts))
+        for i in np.flatnonzero(counts):
+            draws[bounds[i]:bounds[i + 1]] = np.random.default_rng(seeds[i]).standard_normal((counts[i], 2))
+
+        calc_a = (stats[('Distance', 'mean')].to_numpy()[gap_codes]
+                  + stats[('Distance', 'std')].to_numpy()[gap_codes] * draws[:, 0]) / 1000
+        calc_b = np.radians(stats[('Bearing', 'mean')].to_numpy()[gap_codes]
+                            + stats[('Bearing', 'std')].to_numpy()[gap_codes] * draws[:, 1])
         dy = calc_a * np.cos(calc_b)
         dx = calc_a * np.sin(calc_b)
 
-        # Here, store the time difference between all the consecutive points in an array.
-        time_deltas = df.reset_index()[const.DateTime].diff().dt.total_seconds()
-
-        # Look for a time diff that exceeds the sampling_rate and if one is found, calculate the
-        # latitude and longitude and then append them to the dataframe at the location where
-        # the threshold is crossed.
-        for i in range(len(time_deltas)):
-            if len(df) > 3:
-                if time_deltas[i] > sampling_rate:
-                    new_lat = df[const.LAT].iloc[i - 1] + (dy / const.RADIUS_OF_EARTH) * (180 / np.pi)
-                    new_lon = df[const.LONG].iloc[i - 1] +\
-                              (dx / const.RADIUS_OF_EARTH) * (180 / np.pi) / np.cos(df[const.LAT].iloc[i - 1] * np.pi / 180)
-                    if class_label_col == '':
-                        dataframe.loc[new_times[i - 1]] = [id_, new_lat[0], new_lon[0]]
-                    else:
-                        dataframe.loc[new_times[i - 1]] = [id_, new_lat[0], new_lon[0],
-                                                           dataframe[class_label_col].iloc[0]]
-
+        # Move from the point at which each gap starts by the displacement drawn for it.
+        ip_lat = lat[prev] + (dy / const.RADIUS_OF_EARTH) * (180 / np.pi)
+        ip_long = lon[prev] + (dx / const.RADIUS_OF_EARTH) * (180 / np.pi) / np.cos(lat[prev] * np.pi / 180)
 
-        # Return the new dataframe
-        return dataframe
+        new_times = dataframe[const.DateTime].to_numpy()[prev] + pd.to_timedelta(sampling_rate, unit='seconds')
+        return Helpers._insert_points(dataframe, prev, new_times, ip_lat, ip_long, class_label_col)
 
     @staticmethod
-    def kinematic_help(dataframe: Union[pd.DataFrame, PTRAILDataFrame], id_: Text,
-                       sampling_rate: float, class_label_col):
+    def kinematic_help(dataframe: Union[pd.DataFrame, PTRAILDataFrame], sampling_rate: float, class_label_col):
         """
             This method takes a dataframe and uses kinematic interpolation to determine coordinates
             of location on Datetime where the time difference between 2 consecutive points exceeds
             the user-specified sampling_rate and inserts the interpolated point those between 2 points.
 
-            Warning
-            -------
-                This method should not be used for dataframes with multiple trajectory ids as it will
-                yield wrong results and there might be a significant drop in performance.
+            Note
+            ----
+                | The gaps of all the trajectories in the dataframe are interpolated at once,
+                  hence the dataframe can contain multiple trajectories. However, the points of
+                  each trajectory must be in contiguous rows sorted by DateTime.
+                | The gaps right after the first point of a trajectory are not interpolated
+                  since the velocity at the start of the gap is not known.
 
             Parameters
             ----------
                 dataframe: Union[pd.DataFrame, NumTrajDF]
                      The dataframe containing the original trajectory data.
-                id_: Text
-                    The Trajectory ID of the points in the dataframe.
                 sampling_rate: float
                     The maximum time difference between 2 points greater than which
                     a point will be inserted between 2 points.
+                class_label_col: Text
+                    The column header which contains the class label of the point.
 
             Returns
             -------
                 pandas.core.dataframe.DataFrame
-                    The dataframe containing the trajectory enhanced with interpolated
+                    The dataframe containing the trajectories enhanced with interpolated
                     points.
 
             References
@@ -307,53 +366,345 @@ class Helpers:
                 Nogueira, T.O., "kinematic_interpolation.py", (2016), GitHub repository,
                 https://gist.github.com/talespaiva/128980e3608f9bc5083b.js
         """
-        # Create a Series containing new times which are calculated as follows:
-        #    new_time[i] = original_time[i] + sampling_rate.
-        new_times = dataframe.reset_index()[const.DateTime] + pd.to_timedelta(sampling_rate, unit='seconds')
+        dataframe = Helpers._select_ip_columns(dataframe, class_label_col)
+
+        # Find the points after which a new point is to be inserted and calculate the
+        # positions of the new points of all the gaps at once.
+        prev, _ = Helpers._find_gaps(dataframe, sampling_rate)
+        new_times = dataframe[const.DateTime].to_numpy()[prev] + pd.to_timedelta(sampling_rate, unit='seconds')
+        ip_coords, is_valid = Helpers._kinematic_positions(dataframe, prev, new_times)
+
+        return Helpers._insert_points(dataframe, prev[is_valid], new_times[is_valid],
+                                      ip_coords[is_valid, 0], ip_coords[is_valid, 1], class_label_col)
+
+    @staticmethod
+    def _select_ip_columns(dataframe: Union[pd.DataFrame, PTRAILDataFrame], class_label_col):
+        """
+            Extract the DateTime, Trajectory ID, Latitude, Longitude and the class label
+            columns (if any) that are used by the interpolation helpers.
+
+            Parameters
+            ----------
+                dataframe: Union[pd.DataFrame, NumTrajDF]
+                     The dataframe containing the original trajectory data.
+                class_label_col: Text
+                    The column header which contains the class label of the point.
+
+            Returns
+            -------
+                pandas.core.dataframe.DataFrame
+                    The dataframe with the columns above and a default index.
+        """
+        if const.DateTime in dataframe.index.names or const.TRAJECTORY_ID in dataframe.index.names:
+            dataframe = dataframe.reset_index()
+
+        columns = [const.DateTime, const.TRAJECTORY_ID, const.LAT, const.LONG]
+        if class_label_col != '':
+            columns.append(class_label_col)
+        return dataframe[columns].reset_index(drop=True)
+
+    @staticmethod
+    def _find_gaps(dataframe: pd.DataFrame, sampling_rate: float):
+        """
+            Find the gaps wherein the time difference between 2 consecutive points
+            of a trajectory is greater than the sampling rate.
+
+            Parameters
+            ----------
+                dataframe: pandas.core.dataframe.DataFrame
+                    The dataframe containing the points of whole trajectories sorted
+                    by DateTime with a default index.
+                sampling_rate: float
+                    The maximum time difference between 2 consecutive points.
+
+            Returns
+            -------
+                tuple:
+                    The array containing the positions of the points at which the gaps
+                    start and the array containing the time difference (in seconds) of
+                    every point from its previous point which is NaN at the first point
+                    of each trajectory.
+        """
+        times = dataframe[const.DateTime].to_numpy(dtype='datetime64[ns]')
+        time_deltas = np.full(len(times), np.nan)
+        time_deltas[1:] = (times[1:] - times[:-1]) / np.timedelta64(1, 's')
+        time_deltas[feature_helpers._traj_start_mask(dataframe[const.TRAJECTORY_ID].to_numpy())] = np.nan
+
+        # The comparisons with NaN are False, hence no gap ever crosses 2 trajectories.
+        with np.errstate(invalid='ignore'):
+            gap_ends = np.flatnonzero(time_deltas > sampling_rate)
+        return gap_ends - 1, time_deltas
+
+    @staticmethod
+    def _linear_positions(dataframe: pd.DataFrame, prev: np.ndarray, new_times: np.ndarray):
+        """
+            Linearly interpolate the positions of the new points between the point at which
+            their gap starts and the next point of the same trajectory.
+
+            Parameters
+            ----------
+                dataframe: pandas.core.dataframe.DataFrame
+                    The dataframe containing the original points with a default index.
+                prev: np.ndarray
+                    The position of the last original point at or before each new point.
+                new_times: np.ndarray
+                    The timestamps of the new points.
+
+            Returns
+            -------
+                np.ndarray
+                    The array of shape (len(new_times), 2) containing the latitude and the
+                    longitude of each new point.
+        """
+        # The next point is clipped to the last point of the trajectory for the new points
+        # which are at the same time as the last point.
+        times = dataframe[const.DateTime].to_numpy(dtype='datetime64[ns]').view(np.int64)
+        _, offsets = PTRAILDataFrame._build_traj_offsets(dataframe[const.TRAJECTORY_ID])
+        last_rows = offsets[np.searchsorted(offsets, prev, side='right')] - 1
+        nxt = np.minimum(prev + 1, last_rows)
+
+        span = (times[nxt] - times[prev]).astype(np.float64)
+        elapsed = (np.asarray(new_times, dtype='datetime64[ns]').view(np.int64) - times[prev]).astype(np.float64)
+        fraction = np.divide(elapsed, span, out=np.zeros(len(prev)), where=span > 0)[:, None]
+
+        coords = dataframe[[const.LAT, const.LONG]].to_numpy(dtype=np.float64)
+        return coords[prev] + (coords[nxt] - coords[prev]) * fraction
+
+    @staticmethod
+    def _fit_cubic_splines(dataframe: pd.DataFrame, offsets: np.ndarray):
+        """
+            Fit a cubic spline on each trajectory having more than 3 points and gather the
+            polynomial coefficients of all the splines in a single array, so that they can
+            be evaluated for all the trajectories at once.
+
+            Note
+            ----
+                Since the spline is fitted on a strictly increasing sequence of times, only the
+                first point at each distinct time of a trajectory is used as a knot.
+
+            Parameters
+            ----------
+                dataframe: pandas.core.dataframe.DataFrame
+                    The dataframe containing the original points with a default index.
+                offsets: np.ndarray
+                    The offset index of the trajectories of the dataframe.
+
+            Returns
+            -------
+                tuple:
+                    The boolean array indicating which trajectories are fitted, the array of
+                    shape (4, number of knots, 2) containing the coefficients of the interval
+                    starting at each knot, the array mapping each point to its knot and the
+                    array containing the times (in nanoseconds) of the knots.
+        """
+        times = dataframe[const.DateTime].to_numpy(dtype='datetime64[ns]').view(np.int64)
+        is_knot = feature_helpers._traj_start_mask(dataframe[const.TRAJECTORY_ID].to_numpy())
+        is_knot[1:] |= times[1:] != times[:-1]
+        knot_of_row = np.cumsum(is_knot) - 1
+        knot_rows = np.flatnonzero(is_knot)
+        knot_bounds = np.searchsorted(knot_rows, offsets)
+
+        # The last knot of each trajectory has no interval after it and hence its
+        # coefficients are left as 0.
+        coords = dataframe[[const.LAT, const.LONG]].to_numpy(dtype=np.float64)
+        coefficients = np.zeros((4, len(knot_rows), 2))
+        fitted = np.zeros(len(offsets) - 1, dtype=bool)
+        for i in range(len(offsets) - 1):
+            rows = knot_rows[knot_bounds[i]:knot_bounds[i + 1]]
+            if offsets[i + 1] - offsets[i] > 3 and len(rows) > 1:
+                seconds = (times[rows] - times[rows[0]]) / 1e9
+                spline = CubicSpline(x=seconds, y=coords[rows], extrapolate=True, bc_type='not-a-knot')
+                coefficients[:, knot_bounds[i]:knot_bounds[i + 1] - 1] = spline.c
+                fitted[i] = True
+
+        return fitted, coefficients, knot_of_row, times[knot_rows]
+
+    @staticmethod
+    def _eval_cubic_splines(splines: tuple, prev: np.ndarray, new_times: np.ndarray):
+        """
+            Evaluate the cubic splines fitted by _fit_cubic_splines() at the new points. Each
+            new point is evaluated on the polynomial of the interval in which it lies.
 
-        # Here, store the time difference between all the consecutive points in an array.
-        time_deltas = dataframe.reset_index()[const.DateTime].diff().dt.total_seconds()
-        lat_diff = dataframe.reset_index()[const.LAT].diff()
-        lon_diff = dataframe.reset_index()[const.LONG].diff()
+            Parameters
+            ----------
+                splines: tuple
+                    The splines returned by the _fit_cubic_splines() function.
+                prev: np.ndarray
+                    The position of the last original point at or before each new point.
+                new_times: np.ndarray
+                    The timestamps of the new points.
 
-        lat_velocity = lat_diff / time_deltas
-        lon_velocity = lon_diff / time_deltas
+            Returns
+            -------
+                np.ndarray
+                    The array of shape (len(new_times), 2) containing the latitude and the
+                    longitude of each new point.
+        """
+        _, coefficients, knot_of_row, knot_times = splines
+        knots = knot_of_row[prev]
+        elapsed = np.asarray(new_times, dtype='datetime64[ns]').view(np.int64) - knot_times[knots]
+        dt_ = (elapsed / 1e9)[:, None]
 
-        lat = list(dataframe.reset_index()[const.LAT].values)
-        lon = list(dataframe.reset_index()[const.LONG].values)
+        c = coefficients[:, knots]
+        return ((c[0] * dt_ + c[1]) * dt_ + c[2]) * dt_ + c[3]
 
-        # Look for a time diff that exceeds the sampling_rate and if one is found, calculate the
-        # latitude and longitude and then append them to the dataframe at the location where
-        # the threshold is crossed.
-        for i in range(len(time_deltas)):
-            if time_deltas[i] > sampling_rate and not np.isnan(lat_velocity[i - 1]):
-                ax = np.array([[(time_deltas[i] ** 2) / 2, (time_deltas[i] ** 3) / 6],
-                               [float(time_deltas[i]), (time_deltas[i] ** 2) / 2]])
-                bx = [lat[i] - lat[i - 1] - lat_velocity[i - 1] * time_deltas[i], lat_velocity[i] - lat_velocity[i - 1]]
-                coef_x = np.linalg.solve(ax, bx)
+    @staticmethod
+    def _kinematic_positions(dataframe: pd.DataFrame, prev: np.ndarray, new_times: np.ndarray):
+        """
+            Calculate the positions of the new points using kinematic interpolation. The
+            motion between the 2 points of each gap is modelled as a cubic polynomial of
+            time which matches the positions of the 2 points and the velocities at them,
+            wherein the velocity at a point is the velocity from its previous point.
 
-                ay = ax
-                by = [lon[i] - lon[i - 1] - lon_velocity[i - 1] * time_deltas[i], lon_velocity[i] - lon_velocity[i - 1]]
-                coef_y = np.linalg.solve(ay, by)
+            Note
+            ----
+                The 2x2 linear systems giving the acceleration and jerk coefficients of all
+                the gaps are solved at once in the closed form.
 
-                td = new_times[i - 1].timestamp() / 10e9
-                x = Helpers._pos(t=td, x1=lat[i - 1], v1=lat_velocity[i - 1], b=coef_x[0], c=coef_x[1])
-                y = Helpers._pos(t=td, x1=lon[i - 1], v1=lon_velocity[i - 1], b=coef_y[0], c=coef_y[1])
+            Parameters
+            ----------
+                dataframe: pandas.core.dataframe.DataFrame
+                    The dataframe containing the original points with a default index.
+                prev: np.ndarray
+                    The position of the last original point at or before each new point.
+                new_times: np.ndarray
+                    The timestamps of the new points.
 
-                if class_label_col == '':
-                    dataframe.loc[new_times[i - 1]] = [id_, x, y]
-                else:
-                    dataframe.loc[new_times[i - 1]] = [id_, x, y, dataframe[class_label_col].iloc[0]]
+            Returns
+            -------
+                tuple:
+                    The array of shape (len(new_times), 2) containing the latitude and the
+                    longitude of each new point and the boolean array indicating the new
+                    points whose position could be calculated. A position cannot be
+                    calculated when the velocity at either point of the gap is not known.
+        """
+        times = dataframe[const.DateTime].to_numpy(dtype='datetime64[ns]').view(np.int64)
+        coords = dataframe[[const.LAT, const.LONG]].to_numpy(dtype=np.float64)
+
+        # The velocity at each point from its previous point, which is NaN at the first
+        # point of each trajectory.
+        time_deltas = np.full(len(times), np.nan)
+        time_deltas[1:] = (times[1:] - times[:-1]) / 1e9
+        time_deltas[feature_helpers._traj_start_mask(dataframe[const.TRAJECTORY_ID].to_numpy())] = np.nan
+        velocity = np.full(coords.shape, np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            velocity[1:] = (coords[1:] - coords[:-1]) / time_deltas[1:, None]
+
+        # The gap of a point at the same time as the last point of its trajectory ends at
+        # the last point itself, and hence it has no time span and no valid solution.
+        nxt = np.minimum(prev + 1, len(times) - 1)
+        dt_ = time_deltas[nxt]
+        dt_[nxt == prev] = np.nan
+        v1, v2 = velocity[prev], velocity[nxt]
+        is_valid = np.isfinite(v1).all(axis=1) & np.isfinite(v2).all(axis=1) & (dt_ > 0)
+
+        # Solve [[dt^2/2, dt^3/6], [dt, dt^2/2]] . [b, c] = [x2 - x1 - v1 * dt, v2 - v1] for the
+        # acceleration(b) and jerk(c) of all the gaps using the inverse of the 2x2 matrix,
+        # whose determinant is dt^4/12.
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dt_ = dt_[:, None]
+            rhs_pos = coords[nxt] - coords[prev] - v1 * dt_
+            rhs_vel = v2 - v1
+            det = dt_ ** 4 / 12
+            b = ((dt_ ** 2 / 2) * rhs_pos - (dt_ ** 3 / 6) * rhs_vel) / det
+            c = ((dt_ ** 2 / 2) * rhs_vel - dt_ * rhs_pos) / det
+
+            # Finally, evaluate the polynomial at the time elapsed since the start of the gap.
+            t = ((np.asarray(new_times, dtype='datetime64[ns]').view(np.int64) - times[prev]) / 1e9)[:, None]
+            ip_coords = coords[prev] + v1 * t + (t ** 2) * b / 2 + (t ** 3) * c / 6
+
+        return ip_coords, is_valid
+
+    @staticmethod
+    def _gap_sample_times(dataframe: pd.DataFrame, prev: np.ndarray, sampling_rate: float):
+        """
+            Calculate all the timestamps at which the points are to be inserted in the gaps
+            so that the time difference between 2 consecutive points does not exceed the
+            sampling rate anymore. The timestamps of a gap are spaced by the sampling rate
+            starting from the point at which the gap starts.
+
+            Parameters
+            ----------
+                dataframe: pandas.core.dataframe.DataFrame
+                    The dataframe containing the original points with a default index.
+                prev: np.ndarray
+                    The positions of the points at which the gaps start.
+                sampling_rate: float
+                    The maximum time difference between 2 consecutive points.
+
+            Returns
+            -------
+                tuple:
+                    The array containing the position of the point at which the gap of each
+                    new point starts and the array containing the timestamps of the new points.
+        """
+        times = dataframe[const.DateTime].to_numpy(dtype='datetime64[ns]')
+        step = np.int64(round(sampling_rate * 1e9))
+        gap_lengths = (times[prev + 1] - times[prev]).astype(np.int64)
+
+        # The number of points needed in each gap so that every new point lies strictly
+        # before the point at which the gap ends.
+        counts = (gap_lengths - 1) // step
+        rep_prev = np.repeat(prev, counts)
+
+        # The step number of each new point within its own gap, i.e. 1, 2, ..., count.
+        steps = np.arange(len(rep_prev)) - np.repeat(np.cumsum(counts) - counts, counts) + 1
+        return rep_prev, times[rep_prev] + (steps * step).astype('timedelta64[ns]')
+
+    @staticmethod
+    def _insert_points(dataframe: pd.DataFrame, prev: np.ndarray, new_times: np.ndarray,
+                       ip_lat: np.ndarray, ip_long: np.ndarray, class_label_col):
+        """
+            Insert the interpolated points into the dataframe with a single concatenation
+            and sort. Each new point carries the class label of the first point of its
+            trajectory.
+
+            Parameters
+            ----------
+                dataframe: pandas.core.dataframe.DataFrame
+                    The dataframe containing the original points with a default index.
+                prev: np.ndarray
+                    The position of the point at which the gap of each new point starts.
+                new_times: np.ndarray
+                    The timestamps of the new points.
+                ip_lat: np.ndarray
+                    The latitudes of the new points.
+                ip_long: np.ndarray
+                    The longitudes of the new points.
+                class_label_col: Text
+                    The column header which contains the class label of the point.
 
-        return dataframe
+            Returns
+            -------
+                pandas.core.dataframe.DataFrame
+                    The dataframe containing both the original and the interpolated points
+                    sorted by trajectory and DateTime with DateTime as the index.
+        """
+        ids_, offsets = PTRAILDataFrame._build_traj_offsets(dataframe[const.TRAJECTORY_ID])
+        codes = np.repeat(np.arange(len(ids_)), np.diff(offsets))
+
+        new_points = pd.DataFrame({
+            const.DateTime: new_times,
+            const.TRAJECTORY_ID: dataframe[const.TRAJECTORY_ID].to_numpy()[prev],
+            const.LAT: ip_lat,
+            const.LONG: ip_long,
+        })
+        if class_label_col != '':
+            new_points[class_label_col] = dataframe[class_label_col].to_numpy()[offsets[codes[prev]]]
+
+        # Concatenate the original and new points once and then sort them by trajectory
+        # and time. The sort is stable, so the original order is kept for equal times.
+        result = pd.concat([dataframe, new_points], ignore_index=True)
+        order = np.lexsort((result[const.DateTime].to_numpy(), np.concatenate([codes, codes[prev]])))
+        return result.iloc[order].set_index(const.DateTime)
 
     @staticmethod
-    def hampel_help(df, column_name):
+    def hampel_help(df, column_name, window_size: int = 5, n_sigma: float = 3):
         """
             This function is the helper function for the hampel_outlier_detection()
             function present in the filters module. The purpose of the function is to
-            run the hampel filter on a single trajectory ID, remove the outliers
-            and return the smaller dataframe.
+            run the hampel filter on the trajectories of the given dataframe, remove
+            the outliers and return the smaller dataframe.
 
             Warning
             -------
@@ -361,57 +712,147 @@ class Helpers:
                 slower execution of the function and might result in removal of
                 points that are actually not outliers.
 
-            Warning
-            -------
-                Do not use Hampel filter outlier detection and try to detect outliers
-                with DateTime as it will raise a NotImplementedError as it has not been
-                implemented yet by the original author of the Hampel filter.
-
             Parameters
             ----------
                 df: PTRAILDataFrame/pd.core.dataframe.DataFrame
                     The dataframe which the outliers are to be removed
                 column_name: Text
                     The column based on which the outliers are to be removed.
+                window_size: int
+                    The number of points on each side of a point in its window.
+                n_sigma: float
+                    The number of standard deviations from the median of the window
+                    beyond which a point is an outlier.
 
             Returns
             -------
                 pd.core.dataframe.DataFrame
                     The dataframe where the outlier points are removed.
 
+            Raises
+            ------
+                MissingColumnsException:
+                    The column is not present in the dataframe.
         """
-        try:
-            # First, extract the column from the dataframe and then obtain the
-            # outlier indices which are to be removed.
-            col = df[column_name]
-            outlier_indices = hampel(col)
+        if column_name not in df.columns:
+            raise MissingColumnsException(f"The column {column_name} does not exist in the dataset.")
 
-            # Now, drop the indices given out by the hampel filter.
-            to_return = df.drop(df.index[outlier_indices])
-            #
+        traj_ids = df.index.get_level_values(const.TRAJECTORY_ID) \
+            if const.TRAJECTORY_ID in df.index.names else df[const.TRAJECTORY_ID]
+        _, offsets = PTRAILDataFrame._build_traj_offsets(traj_ids)
+        outliers = Helpers._hampel_outliers(df[column_name].to_numpy(dtype=np.float64), offsets,
+                                            window_size, n_sigma)
+        return df[~outliers]
 
-            return to_return
+    @staticmethod
+    def _hampel_outliers(values: np.ndarray, offsets: np.ndarray, window_size: int, n_sigma: float):
+        """
+            Find the outliers of a column using the Hampel filter. A point is an outlier
+            if it differs from the median of its window by more than n_sigma times the
+            scaled median absolute deviation (MAD) of the window.
+
+            Note
+            ----
+                | The window of a point contains the window_size points before and after
+                  it within the same trajectory. The windows are taken over the sorted
+                  column array all at once and never cross the boundary of a trajectory.
+                | The points near the ends of a trajectory, which do not have a full
+                  window, use the window of the nearest point that has one. The trajectories
+                  shorter than a window use all of their points as the window.
+                | Points whose window contains a missing value are never outliers.
 
-        except KeyError:
-            raise MissingColumnsException(f"The column {column_name} does not exist in the dataset."
-                                          f"Please check the column name and try again.")
+            Parameters
+            ----------
+                values: np.ndarray
+                    The values of the column with the points of each trajectory in
+                    contiguous rows.
+                offsets: np.ndarray
+                    The offsets of the trajectories, i.e. the first row of each trajectory
+                    followed by the total number of rows.
+                window_size: int
+                    The number of points on each side of a point in its window.
+                n_sigma: float
+                    The number of standard deviations beyond which a point is an outlier.
+
+            Returns
+            -------
+                np.ndarray
+                    The boolean array which is True at the outliers.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        offsets = np.asarray(offsets, dtype=np.int64)
+        lengths = np.diff(offsets)
+        codes = np.repeat(np.arange(len(lengths)), lengths)
+        width = 2 * window_size + 1
+        median = np.full(len(values), np.nan)
+        mad = np.full(len(values), np.nan)
+
+        # Find the windows which lie within a single trajectory and compute their median
+        # and MAD in blocks so that the copies of the windows stay small.
+        if len(values) >= width:
+            windows = np.lib.stride_tricks.sliding_window_view(values, width)
+            starts = np.flatnonzero(codes[:len(values) - width + 1] == codes[width - 1:])
+            block = max(1, 2 ** 20 // width)
+            for i in range(0, len(starts), block):
+                rows = starts[i:i + block]
+                window_median = np.median(windows[rows], axis=1)
+                median[rows + window_size] = window_median
+                mad[rows + window_size] = np.median(np.abs(windows[rows] - window_median[:, None]), axis=1)
+
+        # The points near the ends of a trajectory take the window of the nearest
+        # point which has a full one.
+        long_traj = (lengths >= width)[codes]
+        nearest = np.clip(np.arange(len(values)), offsets[:-1][codes] + window_size,
+                          offsets[1:][codes] - 1 - window_size)
+        nearest = np.where(long_traj, nearest, np.arange(len(values)))
+        median, mad = median[nearest], mad[nearest]
+
+        # The trajectories shorter than a window use all their points as the window.
+        short_rows = np.flatnonzero(~long_traj)
+        if len(short_rows) > 0:
+            short_codes = codes[short_rows]
+            median[short_rows] = Helpers._group_median(values[short_rows], short_codes)
+            mad[short_rows] = Helpers._group_median(np.abs(values[short_rows] - median[short_rows]), short_codes)
+
+        # The constant scales the MAD to the standard deviation of normally distributed data.
+        with np.errstate(invalid='ignore'):
+            return np.abs(values - median) > n_sigma * 1.4826 * mad
 
     @staticmethod
-    def _pos(t, x1, v1, b, c):
-        return x1 + v1 * t + (t ** 2) * b / 2 + (t ** 3) * c / 6
+    def _group_median(values: np.ndarray, codes: np.ndarray):
+        """
+            Compute the median of each group of values and return it for every value.
+
+            Parameters
+            ----------
+                values: np.ndarray
+                    The values whose medians are to be computed.
+                codes: np.ndarray
+                    The sorted group code of each value.
+
+            Returns
+            -------
+                np.ndarray
+                    The median of the group of each value.
+        """
+        _, starts, counts = np.unique(codes, return_index=True, return_counts=True)
+        ordered = values[np.lexsort((values, codes))]
+        medians = (ordered[starts + (counts - 1) // 2] + ordered[starts + counts // 2]) / 2
+
+        # A group containing a missing value has no median.
+        has_nan = np.add.reduceat(np.isnan(values).astype(np.int64), starts) > 0
+        return np.repeat(np.where(has_nan, np.nan, medians), counts)
 
-    # ------------------------------------------ Statistics Helpers ----------------------------------- #
     @staticmethod
     def split_traj_helper(df, num_days):
         # First, create the date column and get all the unique traj_ids
         # in the dataframe.
         df['Date'] = df[const.DateTime].dt.date
-        ids_ = list(df.traj_id.value_counts().keys())
+        df = df.reset_index()
+        ids_, offsets = PTRAILDataFrame._build_traj_offsets(df[const.TRAJECTORY_ID])
 
-        df_chunks = []
-        for i in range(len(ids_)):
-            small_df = df.reset_index().loc[df.reset_index()[const.TRAJECTORY_ID] == ids_[i]]
-            df_chunks.append(small_df)
+        # Slice the points of each trajectory out using the offset index.
+        df_chunks = [df.iloc[offsets[i]:offsets[i + 1]] for i in range(len(ids_))]
 
         # Now, iterate over the entire dataframe and then segment
         # the trajectories by num_days each.
@@ -471,6 +912,11 @@ class Helpers:
                     results.append(seg.drop(columns=['index', 'level_0']))
                     seg_id += 1
 
+        # A chunk containing only the trajectories shorter than num_days
+        # yields no segments, which are then skipped while concatenating.
+        if len(results) == 0:
+            return None
+
         # Finally, concat the dataframes, set the index as
         # [traj_id, seg_id, DateTime].
         return pd.concat(results).reset_index().set_index(['traj_id', 'seg_id', 'DateTime']).sort_values(by=['traj_id',
@@ -572,67 +1018,32 @@ class Helpers:
 
     # -------------------------------------- General Utilities ---------------------------------- #
     @staticmethod
-    def _get_partition_size(size):
-        """
-            Takes number of ids and makes use of a formula that gives a factor to makes set of ids
-            according to the number of processors available to work with.
-
-            Parameters
-            ----------
-                size: int
-                    The total number of trajectory IDs in the dataset.
-
-            Returns
-            -------
-                int
-                    The factor by which the datasets are to be split.
-        """
-        # Based on the Operating system, get the number of CPUs available for
-        # multiprocessing.
-        num = os.cpu_count()
-        NUM_CPU = math.ceil((num * 2) / 3)
-
-        # Integer divide the total number of Trajectory IDs by the number of available CPUs
-        # The factor of 1 is added to avoid errors when the integer division yields a 0.
-        factor = (size // NUM_CPU) + 1
-
-        # Return the factor if it is less than 100 otherwise return 100.
-        # This factor hence is capped at 100.
-        return factor if factor < 100 else 100
-
-    @staticmethod
-    def _df_split_helper(dataframe):
+    def _df_split_helper(dataframe, split_long: bool = False):
         """
             This is the helper function for splitting up dataframes into smaller chunks.
             This function is widely used for main functions to help split the original
-            dataframe into smaller chunks based on a fixed range of IDs. This function
-            splits the dataframes based on a predetermined number, stores them in a list
-            and returns it.
-            NOTE: The dataframe is split based on the number of CPU cores available for.
-                  For more info, take a look at the documentation of the get_partition_size()
-                  function.
+            dataframe into smaller chunks which are then processed in parallel. The
+            chunks are balanced by the number of points in them instead of the number
+            of trajectory IDs.
+
+            Note
+            ----
+                The chunks are made by the Partitioner based on the number of worker
+                processes of the shared pool. For more info, take a look at the
+                documentation of the Partitioner.partition_ranges() function.
 
             Parameters
             ----------
                 dataframe: PTRAILDataFrame
                     The dataframe that is to be split.
+                split_long: bool
+                    Whether the trajectories that are too long for a single chunk can be
+                    split across the chunks. Only to be used by the operations which
+                    compute each point on its own.
 
             Returns
             -------
                 list:
                     The list containing smaller dataframe chunks.
         """
-        # First, create a list containing all the ids of the data and then further divide that
-        # list items and split it into sub-lists of ids equal to split_factor.
-        ids_ = list(dataframe.reset_index().traj_id.value_counts().keys())
-
-        # Get the ideal number of IDs by which the dataframe is to be split.
-        split_factor = Helpers._get_partition_size(len(ids_))
-        ids_ = [ids_[i: i + split_factor] for i in range(0, len(ids_), split_factor)]
-
-        # Now split the dataframes based on set of Trajectory ids.
-        # As of now, each smaller chunk is supposed to have data of 100
-        # trajectory IDs max
-        df_chunks = [dataframe.loc[dataframe[const.TRAJECTORY_ID].isin(ids_[i])]
-                     for i in range(len(ids_))]
-        return df_chunks
+        return Partitioner.split(dataframe, split_long)
@@ -10,26 +10,24 @@
 
 """
 import itertools
-import multiprocessing as mlp
-import os
-from math import ceil
-from typing import Optional, Text, Union
+import warnings
+from typing import Optional, Text
 
-import pandas
+import numpy as np
 import pandas as pd
 
 from ptrail.core.TrajectoryDF import PTRAILDataFrame as NumTrajDF
 from ptrail.preprocessing.helpers import Helpers as helper
 from ptrail.utilities import constants as const
-
-num = os.cpu_count()
-NUM_CPU = ceil((num * 2) / 3)
+from ptrail.utilities.executor import WorkerPool
+from ptrail.utilities.partitioner import Partitioner
 
 
 class Interpolation:
     @staticmethod
     def interpolate_position(dataframe: NumTrajDF, sampling_rate: float,
-                             ip_type: Optional[Text] = 'linear', class_label_col: Optional[Text]=''):
+                             ip_type: Optional[Text] = 'linear', class_label_col: Optional[Text]='',
+                             seed: Optional[int] = None, max_workers: Optional[int] = None):
         """
             Interpolate the position of an object and create new points using one of
             the interpolation methods provided by the Library. Currently, the library
@@ -51,9 +49,10 @@ class Interpolation:
             ----
                 The time-jump parameter specifies where the new points are to be
                 inserted based on the time difference between 2 consecutive points.
-                However, it does not guarantee that the dataset will be brought down
-                to having difference between 2 consecutive points equal to or
-                less than the user specified time jump.
+                However, apart from the cubic interpolation which fills every gap with
+                points spaced by the time jump, it does not guarantee that the dataset
+                will be brought down to having difference between 2 consecutive points
+                equal to or less than the user specified time jump.
 
             Note
             ----
@@ -71,7 +70,14 @@ class Interpolation:
                     The type of interpolation that is to be used.
                 class_label_col: Optional[Text], default = ''
                     The column header which contains the class label of the point.
-
+                seed: Optional[int], default = None
+                    The seed of the random number generators used by the random walk
+                    interpolation. Each trajectory gets its own generator derived from
+                    the seed, hence the results are reproducible regardless of the number
+                    of processes used. If None, then the results differ on every run.
+                max_workers: Optional[int], default = None
+                    The maximum number of processes of the shared pool that are used at the
+                    same time. If None, then all the processes of the pool are used.
 
             Returns
             -------
@@ -79,298 +85,119 @@ class Interpolation:
                     The dataframe containing the interpolated trajectory points.
         """
         # First, lets split the dataframe into smaller chunks containing
-        # points of only n trajectory per chunk. n is
+        # the points of whole trajectories only.
         df = dataframe.reset_index()
+        traj_ids, _ = dataframe.traj_offsets
         df_chunks = helper._df_split_helper(df)
 
-        # Create a pool of processes which has number of processes
-        # equal to the number of unique dataframe partitions.
-        processes = [None] * len(df_chunks)
-        manager = mlp.Manager()
-        return_list = manager.list()
-
         ip_type = ip_type.lower().strip()
         if ip_type == 'linear':
-            for i in range(len(processes)):
-                processes[i] = mlp.Process(target=Interpolation._linear_ip,
-                                           args=(df_chunks[i], sampling_rate, return_list, class_label_col))
-                processes[i].start()
-
-            for j in range(len(processes)):
-                processes[j].join()
-
+            tasks = zip(df_chunks, itertools.repeat(sampling_rate), itertools.repeat(class_label_col))
+            results = WorkerPool.starmap(helper.linear_help, tasks, max_workers)
         elif ip_type == 'cubic':
-            for i in range(len(processes)):
-                processes[i] = mlp.Process(target=Interpolation._cubic_ip,
-                                           args=(df_chunks[i], sampling_rate, return_list, class_label_col))
-                processes[i].start()
-
-            for j in range(len(processes)):
-                processes[j].join()
+            tasks = zip(df_chunks, itertools.repeat(sampling_rate), itertools.repeat(class_label_col))
+            results = WorkerPool.starmap(helper.cubic_help, tasks, max_workers)
         elif ip_type == 'kinematic':
-            for i in range(len(processes)):
-                processes[i] = mlp.Process(target=Interpolation._kinematic_ip,
-                                           args=(df_chunks[i], sampling_rate, return_list, class_label_col))
-                processes[i].start()
-
-            for j in range(len(processes)):
-                processes[j].join()
+            tasks = zip(df_chunks, itertools.repeat(sampling_rate), itertools.repeat(class_label_col))
+            results = WorkerPool.starmap(helper.kinematic_help, tasks, max_workers)
         elif ip_type == 'random-walk':
-            for i in range(len(processes)):
-                processes[i] = mlp.Process(target=Interpolation._random_walk_ip,
-                                           args=(df_chunks[i], sampling_rate, return_list, class_label_col))
-                processes[i].start()
-
-            for j in range(len(processes)):
-                processes[j].join()
+            # Derive an independent seed sequence for each trajectory from the seed and
+            # give each chunk the sequences of its own trajectories.
+            seeds = np.random.SeedSequence(seed).spawn(len(traj_ids))
+            positions = [pd.Index(traj_ids).get_indexer(chunk[const.TRAJECTORY_ID].unique()) for chunk in df_chunks]
+            tasks = zip(df_chunks, itertools.repeat(sampling_rate), itertools.repeat(class_label_col),
+                        [[seeds[i] for i in pos] for pos in positions])
+            results = WorkerPool.starmap(helper.random_walk_help, tasks, max_workers)
         else:
             raise ValueError(f"Interpolation type: {ip_type} specified does not exist. Please check the"
                              "interpolation type specified and type again.")
 
-        return NumTrajDF(pd.concat(return_list).reset_index(),
-                         const.LAT, const.LONG, const.DateTime, const.TRAJECTORY_ID)
+        # The points of each trajectory are already sorted, hence only the trajectories
+        # need to be put back into the order of the dataframe.
+        result = Partitioner.restore_order(pd.concat(results), traj_ids)
+        return NumTrajDF._from_validated(result.reset_index())
 
     @staticmethod
-    def _linear_ip(dataframe: Union[pd.DataFrame, NumTrajDF], sampling_rate: float,
-                   return_list: list, class_label_col):
+    def resample_to_grid(dataframe: NumTrajDF, sampling_rate: float,
+                         ip_type: Optional[Text] = 'linear', class_label_col: Optional[Text] = '',
+                         max_workers: Optional[int] = None):
         """
-            Interpolate the position of points using the Linear Interpolation method. It makes
-            the use of numpy's interpolation technique for the interpolation of the points.
+            Resample each trajectory onto a regular time grid. Unlike interpolate_position()
+            which only inserts points in the gaps, the points of the resampled trajectories
+            are exactly sampling_rate seconds apart and the original points are replaced by
+            the grid points. The grid is aligned to the epoch, i.e. the timestamps of all the
+            grid points are multiples of the sampling rate, and it covers the time between
+            the first and the last point of each trajectory. Currently, the library supports
+            the following interpolation methods for the resampling:
 
-            WARNING: Do not use this method directly as it will run slower. Instead,
-                     use the method interpolate_position() and specify the ip_type as
-                     linear to perform linear interpolation much faster.
+                1. Linear Interpolation
+                2. Cubic-Spline Interpolation
+                3. Kinematic Interpolation
+
+            Warning
+            -------
+                Just like interpolate_position(), only the 4 mandatory library columns (and
+                the class label column, if given) are returned.
+
+            Note
+            ----
+                | The trajectories having 3 or less points are linearly interpolated when
+                  the cubic interpolation is asked for. Similarly, the points lying between
+                  the first 2 points of a trajectory are linearly interpolated when the
+                  kinematic interpolation is asked for.
+                | A trajectory whose time span does not contain any multiple of the sampling
+                  rate (for example, a trajectory with a single point) has no grid points and
+                  is dropped from the output. A warning listing the dropped trajectory IDs is
+                  raised in that case.
 
             Parameters
             ----------
                 dataframe: PTRAILDataFrame
-                    The dataframe containing the original data.
+                    The dataframe containing the original dataset.
                 sampling_rate: float
-                    The maximum time difference between 2 points. If the time difference between
-                    2 consecutive points is greater than the time jump, then another point will
-                    be inserted between the given 2 points.
-                return_list: list
-                    The list used by the Multiprocessing manager to get the return values
+                    The time difference (in seconds) between 2 consecutive grid points.
+                ip_type: Optional[Text], default = linear
+                    The type of interpolation that is to be used.
                 class_label_col: Optional[Text], default = ''
                     The column header which contains the class label of the point.
+                max_workers: Optional[int], default = None
+                    The maximum number of processes of the shared pool that are used at the
+                    same time. If None, then all the processes of the pool are used.
 
             Returns
             -------
-                pandas.core.dataframe.DataFrame:
-                    The dataframe enhanced with interpolated points.
-        """
-        # First, reset the index, extract the Latitude, Longitude, DateTime and Trajectory ID columns
-        # and set the DateTime column only as the index. Then, store all the unique Trajectory IDs in
-        # a list.
-        if class_label_col == '':
-            dataframe = dataframe.reset_index()[
-                [const.DateTime, const.TRAJECTORY_ID, const.LAT, const.LONG]].set_index(const.DateTime)
-        else:
-            dataframe = dataframe.reset_index()[
-                [const.DateTime, const.TRAJECTORY_ID, const.LAT, const.LONG, class_label_col]].set_index(const.DateTime)
-
-        # Split the smaller dataframe further into smaller chunks containing only 1
-        # Trajectory ID per index.
-        ids_ = list(dataframe[const.TRAJECTORY_ID].value_counts().keys())
-        df_chunks = [dataframe.loc[dataframe[const.TRAJECTORY_ID] == ids_[i]] for i in range(len(ids_))]
-
-        # Here, create as many processes at once as there are number of CPUs available in
-        # the system - 1. One CPU is kept free at all times in order to not block up
-        # the system. (Note: The blocking of system is mostly prevalent in Windows and does
-        # not happen very often in Linux. However, out of caution 1 CPU is kept free regardless
-        # of the system.)
-        small_pool = mlp.Pool(NUM_CPU)
-        final = small_pool.starmap(helper.linear_help,
-                                   zip(df_chunks, ids_, itertools.repeat(sampling_rate),
-                                       itertools.repeat(class_label_col)))
-        small_pool.close()
-        small_pool.join()
-
-        # Append the smaller dataframe to process manager list so that result
-        # can be finally merged into a larger dataframe.
-        return_list.append(pd.concat(final))
-
-    @staticmethod
-    def _cubic_ip(dataframe: Union[pd.DataFrame, NumTrajDF],
-                  sampling_rate: float, return_list: list, class_label_col):
-        try:
-            """
-                Method for cubic interpolation of a dataframe based on the time jump provided.
-                It makes use of scipy library's CubicSpline functionality and interpolates
-                the coordinates based on the Datetime of the dataframe.
-    
-                WARNING: Do not use this method directly as it will run slower. Instead,
-                         use the method interpolate_position() and specify the ip_type as
-                         cubic to perform cubic interpolation much faster.
-    
-                Parameters
-                ----------
-                    dataframe: Union[pd.DataFrame, NumTrajDF]
-                        The dataframe on which interpolation is to be performed
-                    sampling_rate: float
-                        The maximum time difference allowed to have between rows
-                    return_list: list
-                        The list used by the Multiprocessing manager to get the return values
-                    class_label_col: Optional[Text], default = ''
-                        The column header which contains the class label of the point.
-
-                Returns
-                -------
-                    pandas.core.dataframe.DataFrame:
-                        The dataframe containing the new interpolated points.
-    
-            """
-            # First, reset the index, extract the Latitude, Longitude, DateTime and Trajectory ID columns
-            # and set the DateTime column only as the index. Then, store all the unique Trajectory IDs in
-            # a list.
-            if class_label_col == '':
-                dataframe = dataframe.reset_index()[
-                    [const.DateTime, const.TRAJECTORY_ID, const.LAT, const.LONG]].set_index(const.DateTime)
-            else:
-                dataframe = dataframe.reset_index()[
-                    [const.DateTime, const.TRAJECTORY_ID, const.LAT, const.LONG, class_label_col]].set_index(
-                    const.DateTime)
-
-            # Split the smaller dataframe further into smaller chunks containing only 1
-            # Trajectory ID per index.
-            ids_ = list(dataframe[const.TRAJECTORY_ID].value_counts().keys())
-            df_chunks = [dataframe.loc[dataframe[const.TRAJECTORY_ID] == ids_[i]] for i in range(len(ids_))]
-
-            # Here, create as many processes at once as there are number of CPUs available in
-            # the system - 1. One CPU is kept free at all times in order to not block up
-            # the system. (Note: The blocking of system is mostly prevalent in Windows and does
-            # not happen very often in Linux. However, out of caution 1 CPU is kept free regardless
-            # of the system.).
-            small_pool = mlp.Pool(NUM_CPU)
-            final = small_pool.starmap(helper.cubic_help,
-                                       zip(df_chunks, ids_,
-                                           itertools.repeat(sampling_rate), itertools.repeat(class_label_col)))
-            small_pool.close()
-            small_pool.join()
-
-            # Append the smaller dataframe to process manager list so that result
-            # can be finally merged into a larger dataframe.
-            return_list.append(pd.concat(final))
-
-        except ValueError:
-            raise ValueError
-
-    @staticmethod
-    def _kinematic_ip(dataframe: Union[pd.DataFrame, NumTrajDF],
-                      sampling_rate, return_list, class_label_col):
-        """
-             Method for Kinematic interpolation of a dataframe based on the time jump provided.
-             It interpolates the coordinates based on the Datetime of the dataframe.
-
-             WARNING: Do not use this method directly as it will run slower. Instead,
-                     use the method interpolate_position() and specify the ip_type as
-                     kinematic to perform kinematic interpolation much faster.
-
-             Parameters
-             ----------
-                 dataframe: Union[pd.DataFrame, NumTrajDF]
-                     The dataframe on which interpolation is to be performed
-                 sampling_rate: float
-                     The maximum time difference allowed to have between rows
-                 return_list: list
-                     The list used by the Multiprocessing manager to get the return values
-                class_label_col: Optional[Text], default = ''
-                    The column header which contains the class label of the point.
-
-             Returns
-             -------
-                 pandas.core.dataframe.DataFrame:
-                     The dataframe containing the new interpolated points.
-
-         """
-        # First, reset the index, extract the Latitude, Longitude, DateTime and Trajectory ID columns
-        # and set the DateTime column only as the index. Then, store all the unique Trajectory IDs in
-        # a list.
-        if class_label_col == '':
-            dataframe = dataframe.reset_index()[
-                [const.DateTime, const.TRAJECTORY_ID, const.LAT, const.LONG]].set_index(const.DateTime)
-        else:
-            dataframe = dataframe.reset_index()[
-                [const.DateTime, const.TRAJECTORY_ID, const.LAT, const.LONG, class_label_col]].set_index(const.DateTime)
-
-        # Split the smaller dataframe further into smaller chunks containing only 1
-        # Trajectory ID per index.
-        ids_ = list(dataframe[const.TRAJECTORY_ID].value_counts().keys())
-        df_chunks = [dataframe.loc[dataframe[const.TRAJECTORY_ID] == ids_[i]] for i in range(len(ids_))]
-
-        # Here, create as many processes at once as there are number of CPUs available in
-        # the system - 1. One CPU is kept free at all times in order to not block up
-        # the system. (Note: The blocking of system is mostly prevalent in Windows and does
-        # not happen very often in Linux. However, out of caution 1 CPU is kept free regardless
-        # of the system.).
-        small_pool = mlp.Pool(NUM_CPU)
-        final = small_pool.starmap(helper.kinematic_help,
-                                   zip(df_chunks, ids_, itertools.repeat(sampling_rate),
-                                       itertools.repeat(class_label_col)))
-        small_pool.close()
-        small_pool.join()
-
-        # Append the smaller dataframe to process manager list so that result
-        # can be finally merged into a larger dataframe.
-        return_list.append(pd.concat(final))
+                PTRAILDataFrame:
+                    The dataframe containing the resampled trajectory points.
 
-    @staticmethod
-    def _random_walk_ip(dataframe: Union[pd.DataFrame, NumTrajDF],
-                        sampling_rate, return_list, class_label_col):
+            Raises
+            ------
+                ValueError:
+                    The interpolation type does not exist or the sampling rate is not positive.
         """
-             Method for Random walk interpolation of a dataframe based on the time jump provided.
-             It interpolates the coordinates based on the Datetime of the dataframe.
-
-             WARNING: Do not use this method directly as it will run slower. Instead,
-                     use the method interpolate_position() and specify the ip_type as
-                     random-walk to perform random walk interpolation much faster.
-
-
-             Parameters
-             ----------
-                 dataframe: Union[pd.DataFrame, NumTrajDF]
-                     The dataframe on which interpolation is to be performed
-                 sampling_rate: float
-                     The maximum time difference allowed to have between rows
-                 return_list: list
-                     The list used by the Multiprocessing manager to get the return values
-                class_label_col: Optional[Text], default = ''
-                    The column header which contains the class label of the point.
-
-             Returns
-             -------
-                 pandas.core.dataframe.DataFrame:
-                     The dataframe containing the new interpolated points.
-
-         """
-        # First, reset the index, extract the Latitude, Longitude, DateTime and Trajectory ID columns
-        # and set the DateTime column only as the index. Then, store all the unique Trajectory IDs in
-        # a list.
-        if class_label_col == '':
-            dataframe = dataframe.reset_index()[
-                [const.DateTime, const.TRAJECTORY_ID, const.LAT, const.LONG]].set_index(const.DateTime)
-        else:
-            dataframe = dataframe.reset_index()[
-                [const.DateTime, const.TRAJECTORY_ID, const.LAT, const.LONG, class_label_col]].set_index(const.DateTime)
-
-        # Split the smaller dataframe further into smaller chunks containing only 1
-        # Trajectory ID per index.
-        ids_ = list(dataframe[const.TRAJECTORY_ID].value_counts().keys())
-        df_chunks = [dataframe.loc[dataframe[const.TRAJECTORY_ID] == ids_[i]] for i in range(len(ids_))]
-
-        # Here, create as many processes at once as there are number of CPUs available in
-        # the system - 1. One CPU is kept free at all times in order to not block up
-        # the system. (Note: The blocking of system is mostly prevalent in Windows and does
-        # not happen very often in Linux. However, out of caution 1/3rds of CPU are kept free
-        # regardless of the system.).
-        small_pool = mlp.Pool(NUM_CPU)
-        final = small_pool.starmap(helper.random_walk_help,
-                                   zip(df_chunks, ids_, itertools.repeat(sampling_rate),
-                                       itertools.repeat(class_label_col)))
-        small_pool.close()
-        small_pool.join()
-
-        # Append the smaller dataframe to process manager list so that result
-        # can be finally merged into a larger dataframe.
-        return_list.append(pd.concat(final))
-
+        ip_type = ip_type.lower().strip()
+        if ip_type not in ['linear', 'cubic', 'kinematic']:
+            raise ValueError(f"Interpolation type: {ip_type} specified is not supported for resampling. "
+                             f"Please check the interpolation type specified and type again.")
+        if sampling_rate <= 0:
+            raise ValueError("The sampling rate must be greater than 0.")
+
+        # Split the dataframe into chunks of whole trajectories and resample them in parallel
+        # on the shared pool of worker processes.
+        df = dataframe.reset_index()
+        traj_ids, _ = dataframe.traj_offsets
+        df_chunks = helper._df_split_helper(df)
+        results = WorkerPool.starmap(helper.grid_help, zip(df_chunks, itertools.repeat(sampling_rate),
+                                                           itertools.repeat(ip_type),
+                                                           itertools.repeat(class_label_col)), max_workers)
+
+        # The points of each trajectory are already sorted, hence only the trajectories
+        # need to be put back into the order of the dataframe.
+        result = Partitioner.restore_order(pd.concat(results, ignore_index=True), traj_ids)
+
+        # Let the user know about the trajectories that are too short to contain a grid point.
+        dropped = pd.Index(traj_ids)[~pd.Index(traj_ids).isin(result[const.TRAJECTORY_ID].unique())]
+        if len(dropped) > 0:
+            shown = ', '.join(map(str, dropped[:10])) + (', ...' if len(dropped) > 10 else '')
+            warnings.warn(f"{len(dropped)} trajectories do not contain any multiple of the sampling rate "
+                          f"between their first and last points and were dropped: {shown}")
+        return NumTrajDF._from_validated(result.reset_index(drop=True))
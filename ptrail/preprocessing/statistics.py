@@ -8,7 +8,7 @@
 
 """
 import itertools
-from typing import Optional
+from typing import Optional, Text
 
 import pandas as pd
 
@@ -16,18 +16,13 @@ from ptrail.core.TrajectoryDF import PTRAILDataFrame
 from ptrail.features.kinematic_features import KinematicFeatures
 from ptrail.preprocessing.helpers import Helpers as helpers
 import ptrail.utilities.constants as const
-from math import ceil
-
-import multiprocessing
-import os
-
-num = os.cpu_count()
-NUM_CPU = ceil((num * 2) / 3)
+from ptrail.utilities.executor import WorkerPool
+from ptrail.utilities.partitioner import Partitioner
 
 
 class Statistics:
     @staticmethod
-    def segment_traj_by_days(dataframe: PTRAILDataFrame, num_days):
+    def segment_traj_by_days(dataframe: PTRAILDataFrame, num_days, backend: Optional[Text] = None):
         """
             Given a dataframe containing trajectory data, segment all
             the trajectories by each week.
@@ -38,6 +33,9 @@ class Statistics:
                     The dataframe containing trajectory data.
                 num_days: int
                     The number of days that each segment is supposed to have.
+                backend: Optional[Text]
+                    The backend on which the work is run, one of serial, threads or
+                    processes. If None, then the default backend of the WorkerPool is used.
 
             Returns
             -------
@@ -48,21 +46,19 @@ class Statistics:
         # splitting the dataframe according to trajectory ids
         df_chunks = helpers._df_split_helper(dataframe=dataframe.reset_index())
 
-        # Here, create 2/3rds number of processes as there are in the system. Some CPUs are
-        # kept free at all times in order to not block up the system.
-        # (Note: The blocking of system is mostly prevalent in Windows and does not happen very often
-        # in Linux. However, out of caution some CPUs are kept free regardless of the system.)
-        pool = multiprocessing.Pool(NUM_CPU)
-        results = pool.starmap(helpers.split_traj_helper, zip(df_chunks, itertools.repeat(num_days)))
-        pool.close()
-        pool.join()
+        # Run the helper function in parallel on the shared pool of workers.
+        results = WorkerPool.starmap(helpers.split_traj_helper, zip(df_chunks, itertools.repeat(num_days)),
+                                     backend=backend)
 
-        to_return = pd.concat(results).reset_index().set_index(['traj_id', 'seg_id', 'DateTime'])
+        # Put the trajectories back into the order of the dataframe before indexing the segments.
+        results = Partitioner.restore_order(pd.concat(results).reset_index(), dataframe.traj_offsets[0])
+        to_return = results.set_index(['traj_id', 'seg_id', 'DateTime'])
 
         return to_return.drop(columns=['index'])
 
     @staticmethod
-    def generate_kinematic_stats(dataframe: PTRAILDataFrame, target_col_name: str, segmented: Optional[bool] = False):
+    def generate_kinematic_stats(dataframe: PTRAILDataFrame, target_col_name: str, segmented: Optional[bool] = False,
+                                 backend: Optional[Text] = None):
         """
             Generate the statistics of kinematic features for each unique trajectory in
             the dataframe.
@@ -76,6 +72,9 @@ class Statistics:
                     asked to append the target_col back at the end.
                 segmented: Optional[bool]
                     Indicate whether the trajectory has segments or not.
+                backend: Optional[Text]
+                    The backend on which the work is run, one of serial, threads or
+                    processes. If None, then the default backend of the WorkerPool is used.
 
             Returns
             -------
@@ -87,35 +86,22 @@ class Statistics:
         ptdf = KinematicFeatures.generate_kinematic_features(dataframe)
 
         # Then, lets break down the entire dataframe into pieces containing data of
-        # 1 trajectory in each piece.
-        ids_ = list(dataframe.reset_index().traj_id.value_counts().keys())
-        df_chunks = []
-
+        # 1 trajectory (or 1 segment of a trajectory) in each piece using the offset index.
+        ptdf = ptdf.reset_index()
         if segmented:
-            segments = ptdf.reset_index()['seg_id'].unique()
-            for i in range(len(ids_)):
-                for seg in segments:
-                    df = ptdf.reset_index().loc[(ptdf.reset_index()['traj_id'] == ids_[i])
-                                                & (ptdf.reset_index()['seg_id'] == seg)]
-                    if len(df) > 0:
-                        df_chunks.append(df)
-                    else:
-                        continue
+            # The segments of a trajectory may overlap in time, so bring the points of
+            # each segment together before building the offsets.
+            ptdf = ptdf.sort_values([const.TRAJECTORY_ID, 'seg_id'], kind='stable', ignore_index=True)
+            keys = pd.MultiIndex.from_arrays([ptdf[const.TRAJECTORY_ID], ptdf['seg_id']])
+            _, offsets = PTRAILDataFrame._build_traj_offsets(keys)
         else:
-            for i in range(len(ids_)):
-                small_df = ptdf.reset_index().loc[ptdf.reset_index()[const.TRAJECTORY_ID] == ids_[i]]
-                df_chunks.append(small_df)
-
-        # Here, create 2/3rds number of processes as there are in the system. Some CPUs are
-        # kept free at all times in order to not block up the system.
-        # (Note: The blocking of system is mostly prevalent in Windows and does not happen very often
-        # in Linux. However, out of caution some CPUs are kept free regardless of the system.)
-        mp_pool = multiprocessing.Pool(NUM_CPU)
-        results = mp_pool.starmap(helpers.stats_helper, zip(df_chunks,
-                                                            itertools.repeat(target_col_name),
-                                                            itertools.repeat(segmented)))
-        mp_pool.close()
-        mp_pool.join()
+            _, offsets = PTRAILDataFrame._build_traj_offsets(ptdf[const.TRAJECTORY_ID])
+        df_chunks = [ptdf.iloc[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+        # Run the helper function in parallel on the shared pool of workers.
+        results = WorkerPool.starmap(helpers.stats_helper, zip(df_chunks,
+                                                               itertools.repeat(target_col_name),
+                                                               itertools.repeat(segmented)), backend=backend)
 
         return pd.concat(results)
 
@@ -145,56 +131,40 @@ class Statistics:
                 pd.core.dataframe.DataFrame:
                     The dataframe above which is pivoted and has rows converted to columns.
         """
-        # Get all the unique trajectory IDs.
-        ids_ = list(dataframe.index.get_level_values('traj_id').unique())
-
-        final_chunks = []
+        # Build the offset index of the trajectories (or the segments of the trajectories)
+        # so that the rows of each one of them can be sliced out directly.
         if not segmented:
-            for val in ids_:
-                # separated the data for each trajectory id.
-                small = dataframe.loc[dataframe.index.get_level_values('traj_id') == val].reset_index().set_index(
-                    'traj_id')
-
-                # Get the target value out and drop the target column.
-                target = small[target_col_name].iloc[0]
-                small = small.drop(columns=[target_col_name])
-
-                # Pivot the table now and adjust the column names.
-                pivoted = small.reset_index().pivot_table(index='traj_id', columns='Columns')
-                pivoted.columns = pivoted.columns.map('_'.join).str.strip('|')
-
-                # Assign the target column again.
-                pivoted[target_col_name] = target
-                final_chunks.append(pivoted)
+            keys = dataframe.index.get_level_values('traj_id')
+            index_cols = 'traj_id'
         else:
-            for val in ids_:
-                segments = dataframe.index.get_level_values('seg_id').unique()
-                for seg in segments:
-                    small = dataframe.loc[(dataframe.index.get_level_values('traj_id') == val) &
-                                          (dataframe.index.get_level_values('seg_id') == seg)].reset_index().set_index(['traj_id', 'seg_id'])
+            keys = pd.MultiIndex.from_arrays([dataframe.index.get_level_values('traj_id'),
+                                              dataframe.index.get_level_values('seg_id')])
+            index_cols = ['traj_id', 'seg_id']
+        _, offsets = PTRAILDataFrame._build_traj_offsets(keys)
 
-                    if len(small) <= 0:
-                        continue
+        final_chunks = []
+        for i in range(len(offsets) - 1):
+            # separated the data for each trajectory id.
+            small = dataframe.iloc[offsets[i]:offsets[i + 1]].reset_index().set_index(index_cols)
 
-                    # Get the target value out and drop the target column.
-                    target = small[target_col_name].iloc[0]
-                    small = small.drop(columns=[target_col_name])
+            # Get the target value out and drop the target column.
+            target = small[target_col_name].iloc[0]
+            small = small.drop(columns=[target_col_name])
 
-                    # Pivot the table now and adjust the column names.
-                    pivoted = small.reset_index().pivot_table(index=['traj_id', 'seg_id'], columns='Columns')
-                    pivoted.columns = pivoted.columns.map('_'.join).str.strip('|')
+            # Pivot the table now and adjust the column names.
+            pivoted = small.reset_index().pivot_table(index=index_cols, columns='Columns')
+            pivoted.columns = pivoted.columns.map('_'.join).str.strip('|')
 
-                    # Assign the target column again.
-                    pivoted[target_col_name] = target
-                    final_chunks.append(pivoted)
+            # Assign the target column again.
+            pivoted[target_col_name] = target
+            final_chunks.append(pivoted)
 
         # Concatenate the smaller chunks and reorder the columns.
         to_return = pd.concat(final_chunks)
 
         # Store the correct order of the columns to a variable and add the name
         # of the target column to the end of it.
-        cols = const.ORDERED_COLS
-        cols.append(target_col_name)
+        cols = const.ORDERED_COLS + [target_col_name]
 
         # Reorder the final DF, drop duplicated columns and return it.
         to_return = to_return[cols]
@@ -1,10 +1,12 @@
 import unittest
 from ptrail.core.TrajectoryDF import PTRAILDataFrame
 from ptrail.preprocessing.filters import Filters
+from ptrail.preprocessing.filter_plan import FilterPlan
 from ptrail.features.temporal_features import TemporalFeatures
 from ptrail.features.kinematic_features import KinematicFeatures
 from ptrail.utilities.exceptions import *
 from ptrail.preprocessing.helpers import Helpers
+import numpy as np
 import pandas as pd
 
 
@@ -142,6 +144,68 @@ class FiltersTest(unittest.TestCase):
                                                    column_name='Distance')
         self.assertGreater(len(self._atlantic), len(filt_df))
 
+    def test_hampel_bounded_workers(self):
+        new_df = KinematicFeatures.create_distance_column(self._atlantic)
+        filt_df = Filters.hampel_outlier_detection(dataframe=new_df, column_name='Distance')
+        bounded_df = Filters.hampel_outlier_detection(dataframe=new_df, column_name='Distance', max_workers=1)
+        self.assertTrue(pd.DataFrame(filt_df).equals(pd.DataFrame(bounded_df)))
+
+        with self.assertRaises(ValueError):
+            Filters.hampel_outlier_detection(dataframe=new_df, column_name='Distance', max_workers=0)
+
+    def test_hampel_backends(self):
+        new_df = KinematicFeatures.create_distance_column(self._atlantic)
+        filt_df = Filters.hampel_outlier_detection(dataframe=new_df, column_name='Distance')
+        for backend in ['serial', 'threads']:
+            other_df = Filters.hampel_outlier_detection(dataframe=new_df, column_name='Distance', backend=backend)
+            self.assertTrue(pd.DataFrame(filt_df).equals(pd.DataFrame(other_df)))
+
+        with self.assertRaises(ValueError):
+            Filters.hampel_outlier_detection(dataframe=new_df, column_name='Distance', backend='gpu')
+
+    def test_hampel_mask(self):
+        # Two flat trajectories at very different levels with a single spike in the first one.
+        values = np.concatenate([np.full(20, 1.0), np.full(20, 100.0)])
+        values[7] = 50.0
+        df = PTRAILDataFrame(pd.DataFrame({'lat': np.linspace(40, 41, 40), 'lon': np.linspace(-70, -69, 40),
+                                           'DateTime': pd.date_range('2020-01-01', periods=40, freq='h'),
+                                           'traj_id': ['a'] * 20 + ['b'] * 20, 'Value': values}),
+                             'lat', 'lon', 'DateTime', 'traj_id')
+
+        # Only the spike is an outlier since the windows do not cross the trajectories.
+        mask = Filters.hampel_outlier_detection(df, 'Value', window_size=3, n_sigma=3, return_mask=True)
+        self.assertIsInstance(mask, pd.Series)
+        self.assertListEqual(list(np.flatnonzero(~mask.to_numpy())), [7])
+        filt_df = Filters.hampel_outlier_detection(df, 'Value', window_size=3, n_sigma=3)
+        self.assertTrue(pd.DataFrame(filt_df).equals(pd.DataFrame(df[mask])))
+
+        with self.assertRaises(ValueError):
+            Filters.hampel_outlier_detection(df, 'Value', window_size=0)
+
+    def test_filter_plan(self):
+        new_df = KinematicFeatures.create_speed_column(self._gulls)
+        bbox = Filters.get_bounding_box_by_radius(lat=61, lon=24, radius=100000)
+        chained = Filters.filter_by_bounding_box(new_df, bbox)
+        chained = Filters.filter_by_datetime(chained, start_dateTime='2009-05-27 14:00:00')
+        chained = Filters.filter_by_max_speed(chained, max_speed=5)
+        chained = Filters.filter_by_min_consecutive_distance(chained, min_distance=10)
+
+        # The plan derives the Distance and Speed columns itself and filters only once.
+        plan = FilterPlan(self._gulls).by_bounding_box(bbox).by_datetime(start_dateTime='2009-05-27 14:00:00')
+        plan = plan.by_max_speed(5).by_min_consecutive_distance(10)
+        self.assertEqual(len(plan), 4)
+        filt_df = plan.execute()
+        self.assertIsInstance(filt_df, PTRAILDataFrame)
+        self.assertTrue(pd.DataFrame(filt_df).equals(pd.DataFrame(chained)))
+        self.assertEqual(plan.mask().sum(), len(filt_df))
+
+        # The trajectories are counted before any point of the plan is removed.
+        min_points = FilterPlan(self._atlantic).by_min_points().execute()
+        self.assertEqual(len(min_points), len(Filters.remove_trajectories_with_less_points(self._atlantic)))
+
+        with self.assertRaises(ValueError):
+            FilterPlan(self._gulls).by_date(start_date='2009-12-31', end_date='2009-08-27')
+
     def test_hampel_negative(self):
         with self.assertRaises(MissingColumnsException):
             filt_df = Helpers.hampel_help(df=self._gulls,
@@ -1,6 +1,7 @@
 import unittest
 from ptrail.core.TrajectoryDF import PTRAILDataFrame
 from ptrail.preprocessing.interpolation import Interpolation
+import numpy as np
 import pandas as pd
 
 
@@ -20,6 +21,22 @@ class InterpolationTests(unittest.TestCase):
         self.assertGreaterEqual(len(linear_ip), len(self._test_df))
         self.assertEqual(len(linear_ip.reset_index().columns.to_list()), 4)
 
+    def test_linear_ip_positions(self):
+        df = PTRAILDataFrame(data_set={'lat': [10.0, 20.0, 21.0, 0.0, 4.0],
+                                       'lon': [50.0, 60.0, 61.0, 0.0, 8.0],
+                                       'datetime': ['2021-01-01 00:00:00', '2021-01-01 00:10:00',
+                                                    '2021-01-01 00:11:00', '2021-01-01 00:00:00',
+                                                    '2021-01-01 00:04:00'],
+                                       'id': [1, 1, 1, 2, 2]},
+                             latitude='lat', longitude='lon', datetime='datetime', traj_id='id')
+        linear_ip = Interpolation.interpolate_position(df, sampling_rate=120, ip_type='linear')
+
+        # One point is inserted 2 minutes after the start of each gap longer than 2 minutes.
+        new_points = linear_ip.loc[~linear_ip.index.isin(df.index)].reset_index()
+        self.assertListEqual(list(new_points['traj_id']), ['1', '2'])
+        self.assertListEqual(list(new_points['DateTime']), [pd.Timestamp('2021-01-01 00:02:00')] * 2)
+        assert np.allclose(new_points[['lat', 'lon']].values, [[12.0, 52.0], [2.0, 4.0]])
+
     def test_cubic_ip(self):
         cubic_ip = Interpolation.interpolate_position(self._test_df,
                                                       sampling_rate=3600 * 4,
@@ -27,6 +44,43 @@ class InterpolationTests(unittest.TestCase):
         self.assertGreaterEqual(len(cubic_ip), len(self._test_df))
         self.assertEqual(len(cubic_ip.reset_index().columns.to_list()), 4)
 
+    def test_cubic_ip_fills_gaps(self):
+        cubic_ip = Interpolation.interpolate_position(self._test_df,
+                                                      sampling_rate=3600 * 4,
+                                                      ip_type='cubic')
+        # Every gap of the trajectories having more than 3 points is filled in a single call.
+        time_deltas = cubic_ip.reset_index().groupby('traj_id')['DateTime'].diff().dt.total_seconds()
+        self.assertLessEqual(time_deltas.max(), 3600 * 4)
+        self.assertTrue(self._test_df.index.isin(cubic_ip.index).all())
+
+    def test_resample_to_grid(self):
+        for ip_type in ['linear', 'cubic', 'kinematic']:
+            resampled = Interpolation.resample_to_grid(self._test_df, sampling_rate=3600, ip_type=ip_type)
+            self.assertIsInstance(resampled, PTRAILDataFrame)
+
+            # All the points are on the hourly grid aligned to the epoch and are an hour apart.
+            times = resampled.reset_index()
+            self.assertTrue((times['DateTime'].astype('int64') % (3600 * 10 ** 9) == 0).all())
+            time_deltas = times.groupby('traj_id')['DateTime'].diff().dt.total_seconds().dropna()
+            self.assertTrue((time_deltas == 3600).all())
+
+        with self.assertRaises(ValueError):
+            Interpolation.resample_to_grid(self._test_df, sampling_rate=3600, ip_type='random-walk')
+
+    def test_resample_to_grid_drops_short_trajectories(self):
+        # The span of b (00:00:05 to 00:00:08) and the single point of c contain no multiple of 10 s.
+        df = PTRAILDataFrame(pd.DataFrame({'lat': [40.0, 40.1, 40.2, 40.3, 40.4, 40.5],
+                                           'lon': [-70.0, -69.9, -69.8, -69.7, -69.6, -69.5],
+                                           'DateTime': pd.to_datetime(['2020-01-01 00:00:00', '2020-01-01 00:00:20',
+                                                                       '2020-01-01 00:00:05', '2020-01-01 00:00:08',
+                                                                       '2020-01-01 00:00:03', '2020-01-01 00:00:40']),
+                                           'traj_id': ['a', 'a', 'b', 'b', 'c', 'd']}),
+                             'lat', 'lon', 'DateTime', 'traj_id')
+
+        with self.assertWarnsRegex(UserWarning, r'2 trajectories .* dropped: b, c'):
+            resampled = Interpolation.resample_to_grid(df, sampling_rate=10)
+        self.assertListEqual(list(resampled.reset_index()['traj_id']), ['a', 'a', 'a', 'd'])
+
     def test_rw_ip(self):
         rw_ip = Interpolation.interpolate_position(self._test_df,
                                                    sampling_rate=3600 * 4,
@@ -34,6 +88,25 @@ class InterpolationTests(unittest.TestCase):
         self.assertGreaterEqual(len(rw_ip), len(self._test_df))
         self.assertEqual(len(rw_ip.reset_index().columns.to_list()), 4)
 
+    def test_rw_ip_seeded(self):
+        from ptrail.utilities.executor import WorkerPool
+
+        results = []
+        for num_workers in [1, 3, 3]:
+            WorkerPool.set_num_workers(num_workers)
+            results.append(Interpolation.interpolate_position(self._test_df, sampling_rate=3600 * 4,
+                                                              ip_type='random-walk', seed=42))
+        WorkerPool.set_num_workers(None)
+
+        # The same seed gives the same points regardless of the number of processes.
+        for result in results[1:]:
+            pd.testing.assert_frame_equal(pd.DataFrame(results[0]), pd.DataFrame(result))
+
+        other = Interpolation.interpolate_position(self._test_df, sampling_rate=3600 * 4,
+                                                  ip_type='random-walk', seed=7)
+        self.assertEqual(len(other), len(results[0]))
+        self.assertFalse(np.allclose(pd.DataFrame(other)['lat'], pd.DataFrame(results[0])['lat']))
+
     def test_kin_ip(self):
         kin_ip = Interpolation.interpolate_position(self._test_df,
                                                     sampling_rate=3600 * 4,
@@ -42,5 +115,20 @@ class InterpolationTests(unittest.TestCase):
         self.assertEqual(len(kin_ip.reset_index().columns.to_list()), 4)
 
 
+    def test_kin_ip_constant_velocity(self):
+        df = PTRAILDataFrame(data_set={'lat': [10.0, 11.0, 21.0, 22.0],
+                                       'lon': [50.0, 52.0, 72.0, 74.0],
+                                       'datetime': ['2021-01-01 00:00:00', '2021-01-01 00:01:00',
+                                                    '2021-01-01 00:11:00', '2021-01-01 00:12:00'],
+                                       'id': [1, 1, 1, 1]},
+                             latitude='lat', longitude='lon', datetime='datetime', traj_id='id')
+        kin_ip = Interpolation.interpolate_position(df, sampling_rate=120, ip_type='kinematic')
+
+        # An object moving at a constant velocity keeps moving at it through the gap.
+        new_points = kin_ip.loc[~kin_ip.index.isin(df.index)].reset_index()
+        self.assertListEqual(list(new_points['DateTime']), [pd.Timestamp('2021-01-01 00:03:00')])
+        assert np.allclose(new_points[['lat', 'lon']].values, [[13.0, 56.0]])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -26,9 +26,11 @@ TIME_OF_DAY = [
 # ---------------------------------- Spatial Constants -------------------------------------------#
 RADIUS_OF_EARTH = 6371  # KM
 PREV_DIST = 'Distance_prev_to_curr'
+WGS84 = 'EPSG:4326'
 
 # ---------------------------------- Splitting Constants -----------------------------------------#
 MIN_IDS = 100
+PARTITIONS_PER_WORKER = 4
 
 # ---------------------------------- Stats Constants --------------------------------------------- #
 ORDERED_COLS = [
@@ -0,0 +1,314 @@
+"""
+    The executor module contains the process-wide pools of workers that are
+    shared by all the parallel operations of the library. The pools are created
+    lazily when they are first needed, are reused by all the subsequent calls
+    and are shut down either explicitly by the user or when the interpreter
+    exits.
+
+    The work can be run on one of the following backends:
+
+        | serial: The tasks are run one after the other in the calling thread.
+        | threads: The tasks are run on a pool of threads. Since the heavy work
+          of the library is done by NumPy which releases the GIL, the threads
+          run in parallel without pickling the data or forking the process.
+        | processes: The tasks are run on a pool of worker processes.
+
+    | Authors: Yaksh J Haranwala, Salman Haidri
+"""
+import atexit
+import multiprocessing
+import os
+import threading
+from multiprocessing.pool import ThreadPool
+from typing import Callable, Iterable, Optional, Text
+
+from ptrail.utilities.resources import CPUBudget
+
+# The backends on which the parallel operations can be run.
+BACKENDS = ['serial', 'threads', 'processes']
+
+# The environment variable which can be used to set the default backend.
+BACKEND_ENV = 'PTRAIL_BACKEND'
+
+
+class WorkerPool:
+    _pools = {}
+    _backend = None
+    _num_workers = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def get_num_workers():
+        """
+            Get the number of workers used by the shared pools.
+
+            Note
+            ----
+                Unless set by the user, the number of workers is the CPU budget of the
+                library, which is worked out on each call from the CPUs available to
+                the process and its container. For more info, take a look at the
+                documentation of the CPUBudget.get_budget() function.
+
+            Returns
+            -------
+                int:
+                    The number of workers.
+        """
+        if WorkerPool._num_workers is not None:
+            return WorkerPool._num_workers
+        return CPUBudget.get_budget()
+
+    @staticmethod
+    def set_num_workers(num_workers: Optional[int] = None):
+        """
+            Set the number of workers used by the shared pools. If a pool of a
+            different size is already running, then it is shut down and the new
+            pool is created when it is needed next.
+
+            Parameters
+            ----------
+                num_workers: Optional[int]
+                    The number of workers. If None, then the default number of workers
+                    is restored.
+
+            Raises
+            ------
+                ValueError:
+                    The number of workers is less than 1.
+        """
+        if num_workers is not None and num_workers < 1:
+            raise ValueError("The number of workers must be at least 1.")
+
+        with WorkerPool._lock:
+            old_size = WorkerPool.get_num_workers()
+            WorkerPool._num_workers = num_workers
+            changed = old_size != WorkerPool.get_num_workers()
+
+        if changed:
+            WorkerPool.shutdown()
+
+    @staticmethod
+    def get_backend():
+        """
+            Get the backend on which the parallel operations are run by default.
+
+            Note
+            ----
+                The backend set using the set_backend() function is used first, then
+                the one given in the PTRAIL_BACKEND environment variable. If neither
+                is given, then the processes backend is used.
+
+            Returns
+            -------
+                Text:
+                    The name of the backend.
+
+            Raises
+            ------
+                ValueError:
+                    The PTRAIL_BACKEND environment variable is not a valid backend.
+        """
+        if WorkerPool._backend is not None:
+            return WorkerPool._backend
+
+        backend = os.environ.get(BACKEND_ENV, '').strip().lower()
+        return WorkerPool._check_backend(backend) if backend else 'processes'
+
+    @staticmethod
+    def set_backend(backend: Optional[Text] = None):
+        """
+            Set the backend on which the parallel operations are run by default. The
+            backend can still be chosen for a single call of the operations that
+            accept the backend argument.
+
+            Parameters
+            ----------
+                backend: Optional[Text]
+                    One of serial, threads or processes. If None, then the default
+                    backend is restored.
+
+            Raises
+            ------
+                ValueError:
+                    The backend does not exist.
+        """
+        WorkerPool._backend = None if backend is None else WorkerPool._check_backend(backend)
+
+    @staticmethod
+    def get_pool(backend: Optional[Text] = None):
+        """
+            Get the shared pool of the backend and create it if it does not exist
+            yet.
+
+            Note
+            ----
+                | A pool inherited from the parent process (for instance, in a forked
+                  child process) is never reused and a new pool is created for the
+                  current process instead.
+                | The number of workers is checked on each call, hence a pool whose size
+                  does not match the current CPU budget is replaced.
+
+            Parameters
+            ----------
+                backend: Optional[Text]
+                    Either threads or processes. If None, then the default backend is used.
+
+            Returns
+            -------
+                multiprocessing.pool.Pool:
+                    The shared pool of workers.
+
+            Raises
+            ------
+                ValueError:
+                    The backend does not exist or does not use a pool.
+        """
+        backend = WorkerPool.get_backend() if backend is None else WorkerPool._check_backend(backend)
+        if backend == 'serial':
+            raise ValueError("The serial backend does not use a pool.")
+
+        num_workers = WorkerPool.get_num_workers()
+        with WorkerPool._lock:
+            pool, pid, size = WorkerPool._pools.get(backend, (None, None, None))
+            if pool is not None and pid == os.getpid() and size == num_workers:
+                return pool
+
+            # The CPU budget has changed since the pool was created, hence the pool
+            # is replaced by one of the new size.
+            new_pool = ThreadPool(num_workers) if backend == 'threads' else multiprocessing.Pool(num_workers)
+            WorkerPool._pools[backend] = (new_pool, os.getpid(), num_workers)
+
+        if pool is not None and pid == os.getpid():
+            pool.close()
+            pool.join()
+        return new_pool
+
+    @staticmethod
+    def map(func: Callable, iterable: Iterable, max_workers: Optional[int] = None,
+            backend: Optional[Text] = None):
+        """
+            Apply the function to each item of the iterable using the shared pool.
+
+            Parameters
+            ----------
+                func: Callable
+                    The function to be applied. It must be picklable for the processes
+                    backend.
+                iterable: Iterable
+                    The items on which the function is to be applied.
+                max_workers: Optional[int]
+                    The maximum number of items that are processed at the same time.
+                    If None, then all the workers of the pool are used.
+                backend: Optional[Text]
+                    One of serial, threads or processes. If None, then the default
+                    backend is used.
+
+            Returns
+            -------
+                list:
+                    The results of the function in the order of the items.
+        """
+        return WorkerPool.starmap(func, ((item,) for item in iterable), max_workers, backend)
+
+    @staticmethod
+    def starmap(func: Callable, iterable: Iterable, max_workers: Optional[int] = None,
+                backend: Optional[Text] = None):
+        """
+            Apply the function to each tuple of arguments of the iterable using the
+            shared pool.
+
+            Note
+            ----
+                When max_workers is less than the number of workers of the pool, a new
+                task is only submitted once one of the running tasks has finished. This
+                bounds the parallelism of the call without creating another pool.
+
+            Parameters
+            ----------
+                func: Callable
+                    The function to be applied. It must be picklable for the processes
+                    backend.
+                iterable: Iterable
+                    The tuples of arguments with which the function is to be called.
+                max_workers: Optional[int]
+                    The maximum number of tasks that are run at the same time. If None,
+                    then all the workers of the pool are used.
+                backend: Optional[Text]
+                    One of serial, threads or processes. If None, then the default
+                    backend is used.
+
+            Returns
+            -------
+                list:
+                    The results of the function in the order of the arguments.
+
+            Raises
+            ------
+                ValueError:
+                    The maximum number of workers is less than 1 or the backend does
+                    not exist.
+        """
+        if max_workers is not None and max_workers < 1:
+            raise ValueError("The maximum number of workers must be at least 1.")
+
+        backend = WorkerPool.get_backend() if backend is None else WorkerPool._check_backend(backend)
+        if backend == 'serial':
+            return [func(*args) for args in iterable]
+
+        pool = WorkerPool.get_pool(backend)
+        if max_workers is None or max_workers >= WorkerPool.get_num_workers():
+            return pool.starmap(func, iterable)
+
+        # Keep at most max_workers tasks in flight by waiting for the oldest
+        # task before submitting a new one.
+        tasks = []
+        for args in iterable:
+            if len(tasks) >= max_workers:
+                tasks[-max_workers].wait()
+            tasks.append(pool.apply_async(func, args))
+        return [task.get() for task in tasks]
+
+    @staticmethod
+    def shutdown():
+        """
+            Shut down the shared pools and wait for the workers to exit. A new pool
+            is created the next time a parallel operation is run.
+        """
+        with WorkerPool._lock:
+            pools = list(WorkerPool._pools.values())
+            WorkerPool._pools = {}
+
+        # Only the process which created a pool can shut it down.
+        for pool, pid, _ in pools:
+            if pid == os.getpid():
+                pool.close()
+                pool.join()
+
+    @staticmethod
+    def _check_backend(backend: Text):
+        """
+            Check whether the backend exists.
+
+            Parameters
+            ----------
+                backend: Text
+                    The name of the backend.
+
+            Returns
+            -------
+                Text:
+                    The name of the backend in lowercase.
+
+            Raises
+            ------
+                ValueError:
+                    The backend does not exist.
+        """
+        name = backend.lower().strip()
+        if name not in BACKENDS:
+            raise ValueError(f"Backend: {backend} specified does not exist. The backend must be one "
+                             f"of {', '.join(BACKENDS)}.")
+        return name
+
+
+atexit.register(WorkerPool.shutdown)
@@ -0,0 +1,224 @@
+"""
+    The partitioner module splits the trajectory data into the chunks that are
+    processed in parallel by the worker processes of the shared pool. The chunks
+    are balanced by the number of points that they contain rather than by the
+    number of trajectories, so that a few very long trajectories do not leave
+    all but one of the workers idle.
+
+    | Authors: Yaksh J Haranwala, Salman Haidri
+"""
+import heapq
+from math import ceil
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ptrail.core.TrajectoryDF import PTRAILDataFrame
+from ptrail.utilities import constants as const
+from ptrail.utilities.executor import WorkerPool
+
+
+class Partitioner:
+    @staticmethod
+    def get_num_partitions():
+        """
+            Get the number of partitions into which the data is to be split.
+
+            Note
+            ----
+                A few partitions are made for each worker process of the shared pool
+                so that a worker which finishes early can pick up another partition
+                instead of waiting for the slowest one.
+
+            Returns
+            -------
+                int:
+                    The number of partitions.
+        """
+        return WorkerPool.get_num_workers() * const.PARTITIONS_PER_WORKER
+
+    @staticmethod
+    def balance(sizes, num_partitions: int):
+        """
+            Pack the items into the given number of partitions such that the total
+            size of each partition is as even as possible. The longest-processing-time
+            greedy rule is used, i.e. the items are taken from the largest to the
+            smallest and each one is placed in the partition that is the smallest so far.
+
+            Parameters
+            ----------
+                sizes: array-like
+                    The size of each item.
+                num_partitions: int
+                    The number of partitions.
+
+            Returns
+            -------
+                list:
+                    The list containing the sorted positions of the items in each
+                    partition. Empty partitions are dropped.
+        """
+        sizes = np.asarray(sizes, dtype=np.int64)
+        heap = [(0, i) for i in range(max(1, num_partitions))]
+        assigned = np.empty(len(sizes), dtype=np.int64)
+
+        # The items are placed from the largest to the smallest one, the ties being
+        # broken by position so that the packing is deterministic.
+        for item in np.argsort(-sizes, kind='stable'):
+            load, partition = heapq.heappop(heap)
+            assigned[item] = partition
+            heapq.heappush(heap, (load + int(sizes[item]), partition))
+
+        order = np.argsort(assigned, kind='stable')
+        bounds = np.searchsorted(assigned[order], np.arange(max(1, num_partitions) + 1))
+        return [order[bounds[i]:bounds[i + 1]] for i in range(len(bounds) - 1) if bounds[i] < bounds[i + 1]]
+
+    @staticmethod
+    def partition_ranges(offsets, split_long: bool = False, num_partitions: Optional[int] = None):
+        """
+            Split the rows of the trajectories into partitions of balanced numbers of
+            points, each partition being a set of ranges of rows.
+
+            Note
+            ----
+                | A trajectory is never split across 2 partitions unless split_long is
+                  True, in which case the trajectories which are longer than the ideal
+                  size of a partition are cut into pieces of at most that size.
+                | Only the operations which compute each row on its own (i.e. without
+                  looking at the other points of the trajectory) are allowed to split
+                  the trajectories.
+
+            Parameters
+            ----------
+                offsets: array-like
+                    The offsets of the trajectories, i.e. the first row of each trajectory
+                    followed by the total number of rows.
+                split_long: bool
+                    Whether the long trajectories can be split across the partitions.
+                num_partitions: Optional[int]
+                    The number of partitions. If None, then it is derived from the number
+                    of workers of the shared pool.
+
+            Returns
+            -------
+                list:
+                    The list containing an array of (start_row, stop_row) pairs for each
+                    partition. The ranges of a partition are in the order of the rows.
+        """
+        offsets = np.asarray(offsets, dtype=np.int64)
+        starts, stops = offsets[:-1], offsets[1:]
+        if len(starts) == 0:
+            return []
+
+        if num_partitions is None:
+            num_partitions = Partitioner.get_num_partitions()
+        if split_long:
+            # Cut the trajectories that do not fit into a single partition into
+            # pieces of the ideal size of a partition.
+            max_points = max(1, ceil(offsets[-1] / max(1, num_partitions)))
+            pieces = np.maximum(1, -(-(stops - starts) // max_points))
+            first = np.repeat(starts, pieces)
+            step = np.arange(pieces.sum()) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+            starts = first + step * max_points
+            stops = np.minimum(starts + max_points, np.repeat(stops, pieces))
+
+        ranges = np.column_stack([starts, stops])
+        num_partitions = max(1, min(len(ranges), num_partitions))
+        return [ranges[items] for items in Partitioner.balance(stops - starts, num_partitions)]
+
+    @staticmethod
+    def split(dataframe, split_long: bool = False, num_partitions: Optional[int] = None) -> List[pd.DataFrame]:
+        """
+            Split the dataframe into chunks of balanced numbers of points. The trajectory
+            offsets cached on a PTRAILDataFrame are reused, hence the sizes of the
+            trajectories are not counted again on each call.
+
+            Note
+            ----
+                | The trajectory ID and DateTime index of the dataframe is reset before it
+                  is split, hence each chunk is indexed by the original position of its rows.
+                  The results of the chunks can therefore be put back into the original
+                  order by sorting them by their index.
+                | For more info on the partitioning, see the partition_ranges() function.
+
+            Parameters
+            ----------
+                dataframe: Union[PTRAILDataFrame, pandas.core.dataframe.DataFrame]
+                    The dataframe that is to be split.
+                split_long: bool
+                    Whether the long trajectories can be split across the chunks.
+                num_partitions: Optional[int]
+                    The number of chunks. If None, then it is derived from the number
+                    of workers of the shared pool.
+
+            Returns
+            -------
+                list:
+                    The list containing the smaller dataframe chunks.
+        """
+        if isinstance(dataframe, PTRAILDataFrame):
+            _, offsets = dataframe.traj_offsets
+            dataframe = dataframe.reset_index()
+        else:
+            if const.TRAJECTORY_ID in dataframe.index.names:
+                dataframe = dataframe.reset_index()
+            _, offsets = PTRAILDataFrame._build_traj_offsets(dataframe[const.TRAJECTORY_ID])
+
+        return [dataframe.iloc[Partitioner._range_rows(ranges)]
+                for ranges in Partitioner.partition_ranges(offsets, split_long, num_partitions)]
+
+    @staticmethod
+    def restore_order(dataframe: pd.DataFrame, traj_ids):
+        """
+            Put the trajectories of the concatenated results of the chunks back into
+            the given order. The trajectories are moved as whole blocks of rows, hence
+            the order of the points within each trajectory is kept as is.
+
+            Note
+            ----
+                The dataframe is expected to contain the trajectory ID column and the
+                points of each trajectory are expected to be in contiguous rows, as they
+                are in the results of the chunks of whole trajectories.
+
+            Parameters
+            ----------
+                dataframe: pandas.core.dataframe.DataFrame
+                    The concatenated results of the chunks.
+                traj_ids: array-like
+                    The trajectory IDs in the order in which they are to be placed.
+
+            Returns
+            -------
+                pandas.core.dataframe.DataFrame:
+                    The dataframe with the trajectories in the given order.
+        """
+        block_ids, offsets = PTRAILDataFrame._build_traj_offsets(dataframe[const.TRAJECTORY_ID])
+        if len(block_ids) < 2:
+            return dataframe
+
+        order = np.argsort(pd.Index(traj_ids).get_indexer(block_ids), kind='stable')
+        ranges = np.column_stack([offsets[:-1], offsets[1:]])[order]
+        return dataframe.iloc[Partitioner._range_rows(ranges)]
+
+    @staticmethod
+    def _range_rows(ranges):
+        """
+            Convert the ranges of rows into the positions of the rows. A single range
+            is returned as a slice so that the chunk is a view of the dataframe.
+
+            Parameters
+            ----------
+                ranges: numpy.ndarray
+                    The array of (start_row, stop_row) pairs.
+
+            Returns
+            -------
+                Union[slice, numpy.ndarray]:
+                    The positions of the rows in the ranges.
+        """
+        if len(ranges) == 1:
+            return slice(int(ranges[0, 0]), int(ranges[0, 1]))
+
+        lengths = ranges[:, 1] - ranges[:, 0]
+        return np.arange(lengths.sum()) + np.repeat(ranges[:, 0] - (np.cumsum(lengths) - lengths), lengths)
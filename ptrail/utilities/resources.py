@@ -0,0 +1,213 @@
+"""
+    The resources module contains the CPU budget of the library, i.e. the number
+    of processes that the parallel operations are allowed to use. The budget is
+    worked out each time it is asked for from the CPUs that the process may run
+    on, the CPU quota of its container (cgroup) and the overrides given by the
+    user, so that the library never starts more workers than there are CPUs
+    actually available to it.
+
+    | Authors: Yaksh J Haranwala, Salman Haidri
+"""
+import os
+import threading
+from math import ceil
+from typing import Optional
+
+# The environment variable which can be used to override the CPU budget.
+CPU_BUDGET_ENV = 'PTRAIL_CPU_BUDGET'
+
+
+class CPUBudget:
+    _budget = None
+    _lock = threading.Lock()
+    _cgroup_root = '/sys/fs/cgroup'
+
+    @staticmethod
+    def get_budget():
+        """
+            Get the number of CPUs that the parallel operations of the library are
+            allowed to use.
+
+            Note
+            ----
+                | The budget set using the set_budget() function is used first, then the
+                  one given in the PTRAIL_CPU_BUDGET environment variable.
+                | If there is no override, then 2/3rds of the available CPUs are used. Some
+                  CPUs are kept free at all times in order to not block up the system.
+
+            Returns
+            -------
+                int:
+                    The number of CPUs of the budget.
+
+            Raises
+            ------
+                ValueError:
+                    The PTRAIL_CPU_BUDGET environment variable is not a positive integer.
+        """
+        if CPUBudget._budget is not None:
+            return CPUBudget._budget
+
+        override = os.environ.get(CPU_BUDGET_ENV, '').strip()
+        if override:
+            try:
+                budget = int(override)
+            except ValueError:
+                budget = 0
+            if budget < 1:
+                raise ValueError(f"The environment variable {CPU_BUDGET_ENV} must be a positive integer, "
+                                 f"but it is '{override}'.")
+            return budget
+
+        return max(1, ceil((CPUBudget.get_available_cpus() * 2) / 3))
+
+    @staticmethod
+    def set_budget(budget: Optional[int] = None):
+        """
+            Set the number of CPUs that the parallel operations of the library are
+            allowed to use. The budget set here takes precedence over the one given
+            in the environment variable.
+
+            Parameters
+            ----------
+                budget: Optional[int]
+                    The number of CPUs. If None, then the default budget is restored.
+
+            Raises
+            ------
+                ValueError:
+                    The budget is less than 1.
+        """
+        if budget is not None and budget < 1:
+            raise ValueError("The CPU budget must be at least 1.")
+
+        with CPUBudget._lock:
+            CPUBudget._budget = budget
+
+    @staticmethod
+    def get_available_cpus():
+        """
+            Get the number of CPUs that are available to the current process, which
+            is the smallest of the number of CPUs that the process is allowed to run
+            on and the CPU quota of its cgroup (if any).
+
+            Returns
+            -------
+                int:
+                    The number of available CPUs.
+        """
+        # The CPUs that the process may be scheduled on, which is less than the
+        # number of CPUs in the system when the affinity of the process is set.
+        if hasattr(os, 'sched_getaffinity'):
+            available = len(os.sched_getaffinity(0))
+        else:
+            available = os.cpu_count() or 1
+
+        quota = CPUBudget._get_cgroup_quota()
+        if quota is not None:
+            available = min(available, quota)
+        return max(1, available)
+
+    @staticmethod
+    def _get_cgroup_quota():
+        """
+            Get the CPU quota of the cgroup of the current process rounded up to
+            a whole number of CPUs. Both the cgroup v2 (cpu.max) and the cgroup v1
+            (cpu.cfs_quota_us and cpu.cfs_period_us) files are looked up.
+
+            Returns
+            -------
+                Optional[int]:
+                    The number of CPUs of the quota or None if there is no quota.
+        """
+        for directory in CPUBudget._get_cgroup_dirs():
+            # cgroup v2: "<quota> <period>" or "max <period>" when there is no quota.
+            values = CPUBudget._read_values(os.path.join(directory, 'cpu.max'))
+            if values is not None and len(values) == 2:
+                if values[0] == 'max':
+                    return None
+                return CPUBudget._quota_to_cpus(values[0], values[1])
+
+            # cgroup v1: the quota is -1 when there is none.
+            quota = CPUBudget._read_values(os.path.join(directory, 'cpu.cfs_quota_us'))
+            period = CPUBudget._read_values(os.path.join(directory, 'cpu.cfs_period_us'))
+            if quota is not None and period is not None:
+                return CPUBudget._quota_to_cpus(quota[0], period[0])
+        return None
+
+    @staticmethod
+    def _get_cgroup_dirs():
+        """
+            Get the directories in which the CPU controller files of the cgroup of
+            the current process may be found. The directory of the cgroup of the
+            process is looked up first, followed by the root of the hierarchy which
+            is what a container usually sees.
+
+            Returns
+            -------
+                list:
+                    The list of directories that exist.
+        """
+        root = CPUBudget._cgroup_root
+        dirs = []
+        try:
+            with open('/proc/self/cgroup') as file:
+                for line in file:
+                    _, controllers, path = line.strip().split(':', 2)
+                    if controllers == '':
+                        dirs.append(os.path.join(root, path.lstrip('/')))
+                    elif 'cpu' in controllers.split(','):
+                        for name in ['cpu', 'cpu,cpuacct', 'cpuacct,cpu']:
+                            dirs.append(os.path.join(root, name, path.lstrip('/')))
+        except (OSError, ValueError):
+            pass
+
+        dirs += [root, os.path.join(root, 'cpu'), os.path.join(root, 'cpu,cpuacct')]
+        dirs = [os.path.normpath(directory) for directory in dirs]
+        return [directory for directory in dict.fromkeys(dirs) if os.path.isdir(directory)]
+
+    @staticmethod
+    def _read_values(path):
+        """
+            Read the whitespace separated values of a cgroup file.
+
+            Parameters
+            ----------
+                path: Text
+                    The path of the file.
+
+            Returns
+            -------
+                Optional[list]:
+                    The values of the file or None if it cannot be read.
+        """
+        try:
+            with open(path) as file:
+                return file.read().split()
+        except OSError:
+            return None
+
+    @staticmethod
+    def _quota_to_cpus(quota, period):
+        """
+            Convert a CPU quota and its period into a whole number of CPUs.
+
+            Parameters
+            ----------
+                quota: Text
+                    The CPU time that may be used in each period.
+                period: Text
+                    The length of the period.
+
+            Returns
+            -------
+                Optional[int]:
+                    The number of CPUs or None if there is no valid quota.
+        """
+        try:
+            quota, period = int(quota), int(period)
+        except ValueError:
+            return None
+        if quota <= 0 or period <= 0:
+            return None
+        return max(1, ceil(quota / period))
@@ -0,0 +1,45 @@
+import unittest
+
+from ptrail.utilities.executor import WorkerPool
+
+
+class WorkerPoolTest(unittest.TestCase):
+    _args = [(2, i) for i in range(10)]
+
+    def test_shared_worker_pool(self):
+        WorkerPool.set_num_workers(2)
+        try:
+            # The same pool is reused across calls until it is shut down.
+            first = WorkerPool.starmap(pow, self._args)
+            pool = WorkerPool.get_pool()
+            second = WorkerPool.starmap(pow, self._args)
+            self.assertIs(WorkerPool.get_pool(), pool)
+            self.assertListEqual(first, second)
+        finally:
+            WorkerPool.set_num_workers(None)
+            WorkerPool.shutdown()
+        self.assertDictEqual(WorkerPool._pools, {})
+
+    def test_backends(self):
+        expected = [2 ** i for i in range(10)]
+        for backend in ['serial', 'threads', 'processes']:
+            self.assertListEqual(WorkerPool.starmap(pow, self._args, backend=backend), expected)
+            self.assertListEqual(WorkerPool.starmap(pow, self._args, max_workers=1, backend=backend), expected)
+
+        # The backend set globally is used when none is given for the call.
+        WorkerPool.set_backend('threads')
+        try:
+            self.assertEqual(WorkerPool.get_backend(), 'threads')
+            self.assertListEqual(WorkerPool.map(abs, [-1, 2, -3]), [1, 2, 3])
+            self.assertIn('threads', WorkerPool._pools)
+        finally:
+            WorkerPool.set_backend(None)
+
+        with self.assertRaises(ValueError):
+            WorkerPool.set_backend('gpu')
+        with self.assertRaises(ValueError):
+            WorkerPool.starmap(pow, self._args, max_workers=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from ptrail.core.TrajectoryDF import PTRAILDataFrame
+from ptrail.utilities.partitioner import Partitioner
+
+
+class PartitionerTest(unittest.TestCase):
+    _offsets = np.cumsum([0, 400, 5, 7, 60, 3, 120, 9, 11])
+
+    def test_balanced_partitions(self):
+        # The partitions are balanced by the number of points instead of the number of IDs.
+        partitions = Partitioner.partition_ranges(self._offsets, num_partitions=3)
+        self.assertListEqual(sorted(int(np.sum(r[:, 1] - r[:, 0])) for r in partitions), [95, 120, 400])
+
+        # The long trajectories are split only when allowed and every row is covered once.
+        partitions = Partitioner.partition_ranges(self._offsets, split_long=True, num_partitions=3)
+        self.assertLessEqual(max(int(np.sum(r[:, 1] - r[:, 0])) for r in partitions), 215)
+        rows = np.sort(np.concatenate([Partitioner._range_rows(r) if len(r) > 1 else np.arange(*r[0])
+                                       for r in partitions]))
+        assert np.all(rows == np.arange(self._offsets[-1]))
+
+    def test_split_and_restore_order(self):
+        sizes = np.diff(self._offsets)
+        df = PTRAILDataFrame(pd.DataFrame({'lat': np.linspace(40, 41, self._offsets[-1]),
+                                           'lon': np.linspace(-70, -69, self._offsets[-1]),
+                                           'DateTime': pd.date_range('2020-01-01', periods=self._offsets[-1],
+                                                                     freq='min'),
+                                           'traj_id': np.repeat([f'id_{i}' for i in range(len(sizes))], sizes)}),
+                             'lat', 'lon', 'DateTime', 'traj_id')
+
+        # The chunks hold whole trajectories and are put back into the original order.
+        chunks = Partitioner.split(df, num_partitions=3)
+        self.assertEqual(len(chunks), 3)
+        for chunk in chunks:
+            self.assertTrue(chunk.groupby('traj_id').size().equals(df.reset_index().groupby('traj_id').size()
+                                                                  .loc[chunk['traj_id'].unique()]))
+        restored = Partitioner.restore_order(pd.concat(chunks), df.traj_offsets[0])
+        assert np.all(restored.values == df.reset_index().values)
+
+
+if __name__ == '__main__':
+    unittest.main()
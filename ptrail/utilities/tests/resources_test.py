@@ -0,0 +1,43 @@
+import os
+import tempfile
+import unittest
+
+from ptrail.utilities.executor import WorkerPool
+from ptrail.utilities.resources import CPUBudget, CPU_BUDGET_ENV
+
+
+class CPUBudgetTest(unittest.TestCase):
+    def test_cpu_budget(self):
+        root, env = CPUBudget._cgroup_root, os.environ.pop(CPU_BUDGET_ENV, None)
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                CPUBudget._cgroup_root = tmp_dir
+                # A cgroup v2 quota of 1.5 CPUs allows 2 CPUs at most.
+                with open(os.path.join(tmp_dir, 'cpu.max'), 'w') as file:
+                    file.write('150000 100000')
+                self.assertEqual(CPUBudget._get_cgroup_quota(), 2)
+                self.assertLessEqual(CPUBudget.get_available_cpus(), 2)
+
+                with open(os.path.join(tmp_dir, 'cpu.max'), 'w') as file:
+                    file.write('max 100000')
+                self.assertIsNone(CPUBudget._get_cgroup_quota())
+
+            # The overrides are read on each call, the API one taking precedence.
+            os.environ[CPU_BUDGET_ENV] = '3'
+            self.assertEqual(WorkerPool.get_num_workers(), 3)
+            CPUBudget.set_budget(2)
+            self.assertEqual(WorkerPool.get_num_workers(), 2)
+            os.environ[CPU_BUDGET_ENV] = 'many'
+            CPUBudget.set_budget(None)
+            with self.assertRaises(ValueError):
+                CPUBudget.get_budget()
+        finally:
+            CPUBudget._cgroup_root = root
+            CPUBudget.set_budget(None)
+            os.environ.pop(CPU_BUDGET_ENV, None)
+            if env is not None:
+                os.environ[CPU_BUDGET_ENV] = env
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from ptrail.core.TrajectoryDF import PTRAILDataFrame
+from ptrail.utilities.transport import SharedColumns
+
+
+class SharedColumnsTest(unittest.TestCase):
+    _df = PTRAILDataFrame(pd.DataFrame({'lat': np.linspace(40, 41, 10), 'lon': np.linspace(-70, -69, 10),
+                                        'DateTime': pd.date_range('2020-01-01', periods=10, freq='h'),
+                                        'traj_id': ['a'] * 4 + ['b'] * 6}),
+                          'lat', 'lon', 'DateTime', 'traj_id')
+
+    def test_shared_columns(self):
+        raw = self._df.reset_index()
+        with SharedColumns(self._df) as shared:
+            self.assertEqual(shared.num_trajectories, 2)
+            self.assertListEqual(list(shared.offsets), [0, 4, 10])
+
+            # The ranges of rows are read back with the trajectory IDs stored as codes.
+            columns = SharedColumns.read(shared.handle, [[1, 3], [5, 7]])
+            rows = [1, 2, 5, 6]
+            np.testing.assert_array_equal(columns['lat'], raw['lat'].to_numpy()[rows])
+            np.testing.assert_array_equal(columns['DateTime'],
+                                          raw['DateTime'].to_numpy(dtype='datetime64[ns]').view(np.int64)[rows])
+            self.assertListEqual(list(shared.to_traj_ids(columns['traj_id'])), ['a', 'a', 'b', 'b'])
+
+            # The partitions cover every row exactly once.
+            ranges = np.concatenate(shared.partitions())
+            self.assertEqual(int(np.sum(ranges[:, 1] - ranges[:, 0])), len(raw))
+
+
+if __name__ == '__main__':
+    unittest.main()
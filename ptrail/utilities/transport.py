@@ -0,0 +1,164 @@
+"""
+    The transport module contains the SharedColumns container which places the
+    mandatory columns of a PTRAILDataFrame (latitude, longitude, DateTime and
+    the trajectory ID codes) in shared memory, so that the worker processes of
+    the shared pool can read them without the dataframe being pickled and sent
+    to each one of them. The workers only receive a small handle and the ranges
+    of rows that they are supposed to work on.
+
+    Note
+    ----
+        Shared memory requires Python 3.8 or above. On older versions of Python,
+        the arrays are sent along with the handle instead.
+
+    | Authors: Yaksh J Haranwala, Salman Haidri
+"""
+import numpy as np
+import pandas as pd
+
+from ptrail.core.TrajectoryDF import PTRAILDataFrame
+from ptrail.utilities import constants as const
+from ptrail.utilities.partitioner import Partitioner
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    shared_memory = None
+
+
+class SharedColumns:
+    def __init__(self, dataframe: pd.DataFrame):
+        """
+            Copy the mandatory columns of the dataframe into shared memory.
+
+            Note
+            ----
+                The dataframe is expected to be sorted by the trajectory ID and DateTime
+                as it is in a PTRAILDataFrame. The trajectory IDs are stored as integer
+                codes in the order in which they appear in the dataframe and can be
+                converted back to the original IDs using the traj_ids attribute.
+
+            Parameters
+            ----------
+                dataframe: pd.DataFrame
+                    The dataframe whose columns are to be shared.
+        """
+        # Reuse the cached offset index of a PTRAILDataFrame, otherwise build it. The
+        # offsets are the first row of each trajectory along with the total number of rows.
+        traj_offsets = dataframe.traj_offsets if isinstance(dataframe, PTRAILDataFrame) else None
+        if const.TRAJECTORY_ID in dataframe.index.names:
+            dataframe = dataframe.reset_index()
+        if traj_offsets is None:
+            traj_offsets = PTRAILDataFrame._build_traj_offsets(dataframe[const.TRAJECTORY_ID])
+
+        self.traj_ids, self.offsets = traj_offsets
+        codes = np.repeat(np.arange(len(self.traj_ids), dtype=np.int64), np.diff(self.offsets))
+        arrays = {
+            const.LAT: dataframe[const.LAT].to_numpy(dtype=np.float64),
+            const.LONG: dataframe[const.LONG].to_numpy(dtype=np.float64),
+            const.DateTime: dataframe[const.DateTime].to_numpy(dtype='datetime64[ns]').view(np.int64),
+            const.TRAJECTORY_ID: codes,
+        }
+
+        self._blocks = []
+        self.handle = {}
+        for name, array in arrays.items():
+            if shared_memory is None:
+                self.handle[name] = array
+                continue
+
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+            self._blocks.append(block)
+            self.handle[name] = (block.name, array.dtype.str, len(array))
+
+    @property
+    def num_trajectories(self):
+        """
+            The number of unique trajectories in the shared data.
+        """
+        return len(self.offsets) - 1
+
+    def partitions(self):
+        """
+            Split the rows into partitions containing balanced numbers of points.
+            A trajectory is never split across 2 partitions.
+
+            Returns
+            -------
+                list:
+                    The list containing an array of (start_row, stop_row) pairs for
+                    each partition.
+        """
+        return Partitioner.partition_ranges(self.offsets)
+
+    def to_traj_ids(self, codes):
+        """
+            Convert the integer trajectory codes back to the original trajectory IDs.
+
+            Parameters
+            ----------
+                codes: array-like
+                    The codes of the trajectories.
+
+            Returns
+            -------
+                pandas.core.indexes.base.Index
+                    The Index containing the trajectory IDs named traj_id.
+        """
+        return pd.Index(np.asarray(self.traj_ids)[np.asarray(codes, dtype=np.int64)], name=const.TRAJECTORY_ID)
+
+    def close(self):
+        """
+            Release and remove the shared memory blocks. The handle cannot be used
+            by the workers anymore after the blocks are closed.
+        """
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def read(handle: dict, ranges):
+        """
+            Read the ranges of rows of the shared columns. This function is meant
+            to be called from the worker processes.
+
+            Note
+            ----
+                The rows are copied out of the shared memory, hence the arrays returned
+                are valid even after the shared memory blocks are closed.
+
+            Parameters
+            ----------
+                handle: dict
+                    The handle of the SharedColumns.
+                ranges: array-like
+                    The (start_row, stop_row) pairs of the ranges that are to be read.
+
+            Returns
+            -------
+                dict:
+                    The dictionary mapping the column names to the arrays of the rows in
+                    the ranges.
+        """
+        rows = Partitioner._range_rows(np.asarray(ranges, dtype=np.int64).reshape(-1, 2))
+        columns = {}
+        for name, spec in handle.items():
+            if isinstance(spec, np.ndarray):
+                columns[name] = spec[rows].copy()
+                continue
+
+            block_name, dtype, length = spec
+            block = shared_memory.SharedMemory(name=block_name)
+            try:
+                columns[name] = np.ndarray((length,), dtype=dtype, buffer=block.buf)[rows].copy()
+            finally:
+                block.close()
+        return columns
@@ -14,10 +14,13 @@
 
     | Authors: Yaksh J Haranwala
 """
+from typing import Union
+
 import pandas as pd
 from IPython.core.display import display
 from ipywidgets import widgets, AppLayout
 from ptrail.core.TrajectoryDF import PTRAILDataFrame
+from ptrail.features.geo_layer_index import GeoLayerIndex
 
 from ptrail.features.temporal_features import TemporalFeatures as temp
 from ptrail.preprocessing.filters import Filters as filt
@@ -37,7 +40,7 @@ class HydrationTrends:
     __list = None
 
     @staticmethod
-    def show_hydration_trends(trajectories: PTRAILDataFrame, habitat: pd.DataFrame,
+    def show_hydration_trends(trajectories: PTRAILDataFrame, habitat: Union[pd.DataFrame, GeoLayerIndex],
                               dist_from_water: int):
         """
             Plot the interactive plotly Radar chart that shows the number of days spent
@@ -53,8 +56,8 @@ class HydrationTrends:
             ----------
                 trajectories: PTRAILDataFrame
                     The dataframe containing the trajectory data.
-                habitat: pd.DataFrame
-                    The dataframe containing the habitat data.
+                habitat: Union[pd.DataFrame, GeoLayerIndex]
+                    The dataframe containing the habitat data or its index.
                 dist_from_water: int
                     The maximum distance from the water water body that the animal should
                     be in.
@@ -64,7 +67,7 @@ class HydrationTrends:
                 None
         """
         # Store the datasets in the class variables.
-        HydrationTrends.__habitat_data = habitat
+        HydrationTrends.__habitat_data = GeoLayerIndex.from_layers(habitat)
         HydrationTrends.__traj_data = trajectories
 
         # First, create the date column on the trajectory dataset.
@@ -72,7 +75,7 @@ class HydrationTrends:
         HydrationTrends.__traj_data = temp.create_time_of_day_column(HydrationTrends.__traj_data)
 
         # Now, filter out the moving water bodies.
-        a = habitat[(habitat['EcoGener'] == 'WR')]
+        a = HydrationTrends.__habitat_data.select('EcoGener', 'WR')
         water_bodies = a.loc[(a['DistEWat'] == 0)]
 
         # Add an extra column that has bounding boxes for all the water bodies.
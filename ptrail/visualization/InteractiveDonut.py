@@ -13,14 +13,15 @@
 
     | Authors: Yaksh J Haranwala
 """
+from typing import Union
+
 import pandas as pd
-import geopandas as gpd
 from IPython.core.display import display
 from ipywidgets import widgets
-from shapely.geometry import Polygon
 import matplotlib.pyplot as plt
 
 from ptrail.core.TrajectoryDF import PTRAILDataFrame
+from ptrail.features.geo_layer_index import GeoLayerIndex
 from ptrail.preprocessing.filters import Filters as filt
 
 
@@ -31,7 +32,7 @@ class InteractiveDonut:
     __dropdown = None
 
     @staticmethod
-    def animals_by_pasture(trajectories: PTRAILDataFrame, habitat: pd.DataFrame):
+    def animals_by_pasture(trajectories: PTRAILDataFrame, habitat: Union[pd.DataFrame, GeoLayerIndex]):
         """
             Plot a donut chart that shows the proportion of animals for each pasture.
 
@@ -39,8 +40,8 @@ class InteractiveDonut:
             ----------
                 trajectories: PTRAILDataFrame
                     The dataframe that contains trajectory data.
-                habitat: pd.DataFrame
-                    The dataframe that contains habitat data.
+                habitat: Union[pd.DataFrame, GeoLayerIndex]
+                    The dataframe that contains habitat data or its index.
 
             Returns
             -------
@@ -48,8 +49,7 @@ class InteractiveDonut:
         """
         # Store the datasets in the class variables.
         InteractiveDonut.__traj_data = trajectories
-        InteractiveDonut.__habitat_data = gpd.GeoDataFrame(habitat.reset_index(),
-                                                           geometry=gpd.points_from_xy(habitat['lon'], habitat['lat']))
+        InteractiveDonut.__habitat_data = GeoLayerIndex.from_layers(habitat)
 
         # The list of available pastures.
         habitats = ['MDWCRK', 'SMITH-BALLY', 'STRIP', 'HORSE', 'BEAR', 'HALFMOON']
@@ -81,9 +81,9 @@ class InteractiveDonut:
             -------
                 None
         """
-        small = InteractiveDonut.__habitat_data.loc[InteractiveDonut.__habitat_data['CowPast'] == pasture_name]
-        animals = InteractiveDonut._get_count_by_pasture(small,
-                                                         InteractiveDonut.__traj_data)
+        animals = InteractiveDonut._get_count_by_pasture(InteractiveDonut.__habitat_data,
+                                                         InteractiveDonut.__traj_data,
+                                                         pasture_name)
 
         deer, cattle, elk = 0, 0, 0
         for i in range(len(animals)):
@@ -142,7 +142,7 @@ class InteractiveDonut:
                     String containing the habitat stats.
         """
         # First, filter the dataset by pasture.
-        pasture_df = InteractiveDonut.__habitat_data.loc[InteractiveDonut.__habitat_data['CowPast'] == pasture]
+        pasture_df = InteractiveDonut.__habitat_data.select('CowPast', pasture)
 
         # Calculate the average canopy cover of the pasture.
         mean_canopy = pasture_df['Canopy'].mean()
@@ -163,31 +163,27 @@ class InteractiveDonut:
                f"Average Distance to Nearest Road: {round(mean_open_dist, 2)} m\n"
 
     @staticmethod
-    def _get_count_by_pasture(habitat: gpd.GeoDataFrame, trajectories: PTRAILDataFrame):
+    def _get_count_by_pasture(habitat: GeoLayerIndex, trajectories: PTRAILDataFrame, pasture: str):
         """
             Filter the dataset by pasture and return the counts of deer, elk
             and cattle individually.
 
             Parameters
             ----------
-                habitat: gpd.GeoDataFrame
-                    The dataframe containing the habitat data.
+                habitat: GeoLayerIndex
+                    The index of the habitat data.
                 trajectories: PTRAILDataFrame
                     The dataframe containing the Trajectory data.
+                pasture: str
+                    The name of the pasture.
 
             Returns
             -------
                 dict:
                     animal, count pairs.
         """
-        # Using GeoPandas, get the bounding box of the pasture.
-        bbox = habitat.geometry.total_bounds
-
-        # Since GeoPandas uses lon, lat format, we need to swap it
-        # in order to make it lat, lon format.
-        bbox[0], bbox[1] = bbox[1], bbox[0]
-        bbox[2], bbox[3] = bbox[3], bbox[2]
-        bbox = tuple(bbox)
+        # Get the (lat, lon) bounding box of the pasture from the index.
+        bbox = habitat.bounds('CowPast', pasture)
 
         # Using PTRAIL, filter the points that are inside the bounding box.
         filtered_df = filt.filter_by_bounding_box(dataframe=trajectories, bounding_box=bbox, inside=True)
@@ -196,7 +192,7 @@ class InteractiveDonut:
         return filtered_df.reset_index()['traj_id'].unique().tolist()
 
     @staticmethod
-    def plot_area_donut(habitat: pd.DataFrame):
+    def plot_area_donut(habitat: Union[pd.DataFrame, GeoLayerIndex]):
         """
             Given the trajectories and the habitat dataset, plot a donut plot
             which shows the area of each individual pasture as a ring and then
@@ -205,8 +201,8 @@ class InteractiveDonut:
 
             Parameters
             ----------
-                habitat: pd.core.dataframe.DataFrame
-                    The dataset containing the habitat data.
+                habitat: Union[pd.core.dataframe.DataFrame, GeoLayerIndex]
+                    The dataset containing the habitat data or its index.
 
             Returns
             -------
@@ -239,7 +235,7 @@ class InteractiveDonut:
         plt.tight_layout()
 
     @staticmethod
-    def _get_pasture_area(dataset: pd.DataFrame):
+    def _get_pasture_area(dataset: Union[pd.DataFrame, GeoLayerIndex]):
         """
             Given the dataset containing the habitat data, return a dataframe
             containing the name of the pasture and the area of the pasture.
@@ -258,8 +254,8 @@ class InteractiveDonut:
 
             Parameters
             ----------
-                dataset: PTRAILDataFrame
-                    The dataframe containing habitat data.
+                dataset: Union[pd.DataFrame, GeoLayerIndex]
+                    The dataframe containing habitat data or its index.
 
             Returns
             -------
@@ -267,31 +263,24 @@ class InteractiveDonut:
                     The pandas dataframe containing the name of the pastures and their
                     respective areas.
         """
-        # Convert the dataframe given into a GeoDataFrame.
-        habitat_gdf = gpd.GeoDataFrame(dataset.reset_index(),
-                                       geometry=gpd.points_from_xy(dataset['lon'], dataset['lat']))
-
-        # Set the crs to EPSG:4326 and then make sure that it projected to EPSG:3857
-        # since we want the area to be in metres.
-        habitat_gdf.crs = "EPSG:4326"
-        habitat_gdf = habitat_gdf.to_crs('EPSG:3857')
+        # Get the index of the habitat data.
+        habitat_index = GeoLayerIndex.from_layers(dataset)
 
         # Get a list of all the unique habitats.
-        habitats = habitat_gdf['CowPast'].unique()
+        habitats = habitat_index.data['CowPast'].unique()
 
         df = pd.DataFrame(columns=['pasture', 'area'])
         for val in habitats:
             # the try catch does the job of ignoring the pasture with less
             # than 2 points.
             try:
-                small = habitat_gdf.loc[habitat_gdf['CowPast'] == val]
-
                 # Rename the nan pasture to STARK
                 if type(val) != str:
                     continue
 
-                # Calculate the area and then append it to the dataframe.
-                df.loc[val] = Polygon(small['geometry'].tolist()).area / 10e6
+                # Calculate the area of the pasture projected to EPSG:3857 since we want
+                # the area to be in metres and then append it to the dataframe.
+                df.loc[val] = habitat_index.polygon('CowPast', val, 'EPSG:3857').area / 10e6
             except ValueError:
                 continue
 
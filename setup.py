@@ -5,13 +5,12 @@ with open('README.md', 'r') as f:
     LONG_DESCRIPTION = f.read()
 
 REQUIRED_PKGS = ['numpy >= 1.20',
-                 'hampel >= 0.0.5',
                  'pandas >= 1.2.5',
                  'scipy >= 1.6.2',
                  'folium >= 0.12',
                  'osmnx >= 1.1.1',
                  'geopandas >= 0.8.1',
-                 'shapely',
+                 'shapely >= 2.0',
                  'IPython >= 7.27.0',
                  'ipywidgets >= 7.6.5',
                  'plotly >= 5.3.1',